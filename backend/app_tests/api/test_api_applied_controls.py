@@ -1,9 +1,9 @@
 import pytest
 from rest_framework.test import APIClient
-from core.models import ReferenceControl, AppliedControl
+from core.models import ReferenceControl, AppliedControl, Evidence
 from iam.models import Folder
 
-from test_utils import EndpointTestsQueries
+from test_utils import EndpointTestsQueries, EndpointTestsUtils
 
 # Generic applied control data for tests
 APPLIED_CONTROL_NAME = "Test Applied Control"
@@ -240,3 +240,36 @@ class TestAppliedControlsAuthenticated:
             AppliedControl.CATEGORY,
             user_group=test.user_group,
         )
+
+
+@pytest.mark.django_db
+class TestAppliedControlsQueries:
+    """Check the number of queries of the Applied Controls API endpoint"""
+
+    def test_applied_controls_query_count(
+        self, authenticated_client, django_assert_max_num_queries
+    ):
+        """test that listing and retrieving applied controls uses a bounded number of queries"""
+
+        folder = Folder.objects.create(name="test")
+        for i in range(10):
+            applied_control = AppliedControl.objects.create(
+                name=f"{APPLIED_CONTROL_NAME} {i}",
+                folder=folder,
+                reference_control=ReferenceControl.objects.create(
+                    name=f"reference control {i}", folder=folder
+                ),
+            )
+            applied_control.evidences.add(
+                Evidence.objects.create(name=f"evidence {i}", folder=folder)
+            )
+        url = EndpointTestsUtils.get_endpoint_url("Applied controls")
+
+        with django_assert_max_num_queries(13):
+            response = authenticated_client.get(url)
+        assert response.status_code == 200
+        assert response.json()["count"] == 10
+
+        with django_assert_max_num_queries(12):
+            response = authenticated_client.get(f"{url}{applied_control.id}/")
+        assert response.status_code == 200
@@ -10,7 +10,7 @@ from core.models import (
 from core.models import Perimeter, AppliedControl
 from iam.models import Folder
 
-from test_utils import EndpointTestsQueries
+from test_utils import EndpointTestsQueries, EndpointTestsUtils
 
 # Generic requirement assessment data for tests
 REQUIREMENT_ASSESSMENT_STATUS = "to_do"
@@ -307,3 +307,50 @@ class TestRequirementAssessmentsAuthenticated:
             RequirementAssessment.Status.choices,
             user_group=test.user_group,
         )
+
+
+@pytest.mark.django_db
+class TestRequirementAssessmentsQueries:
+    """Check the number of queries of the Requirement Assessments API endpoint"""
+
+    def test_requirement_assessments_query_count(
+        self, authenticated_client, django_assert_max_num_queries
+    ):
+        """test that listing and retrieving requirement assessments uses a bounded number of queries"""
+
+        folder = Folder.objects.create(name="test")
+        framework = Framework.objects.create(
+            name="test", folder=Folder.get_root_folder()
+        )
+        compliance_assessment = ComplianceAssessment.objects.create(
+            name="test",
+            perimeter=Perimeter.objects.create(name="test", folder=folder),
+            framework=framework,
+            folder=folder,
+        )
+        for i in range(10):
+            requirement_assessment = RequirementAssessment.objects.create(
+                requirement=RequirementNode.objects.create(
+                    name=f"requirement {i}",
+                    urn=f"urn:test:req_node:{i}",
+                    framework=framework,
+                    folder=Folder.get_root_folder(),
+                    assessable=True,
+                ),
+                compliance_assessment=compliance_assessment,
+                folder=folder,
+            )
+            requirement_assessment.applied_controls.add(
+                AppliedControl.objects.create(name=f"control {i}", folder=folder)
+            )
+        url = EndpointTestsUtils.get_endpoint_url("Requirement Assessments")
+
+        # The parent requirement of each assessment is looked up by urn
+        with django_assert_max_num_queries(11 + 10):
+            response = authenticated_client.get(url)
+        assert response.status_code == 200
+        assert response.json()["count"] == 10
+
+        with django_assert_max_num_queries(16):
+            response = authenticated_client.get(f"{url}{requirement_assessment.id}/")
+        assert response.status_code == 200
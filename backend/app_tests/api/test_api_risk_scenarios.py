@@ -2,6 +2,7 @@ import pytest
 from rest_framework.test import APIClient
 from core.models import (
     Asset,
+    Evidence,
     Perimeter,
     RiskAssessment,
     RiskMatrix,
@@ -11,7 +12,7 @@ from core.models import (
 )
 from iam.models import Folder
 
-from test_utils import EndpointTestsQueries
+from test_utils import EndpointTestsQueries, EndpointTestsUtils
 
 # Generic perimeter data for tests
 RISK_SCENARIO_NAME = "Test scenario"
@@ -443,3 +444,46 @@ class TestRiskScenariosAuthenticated:
             RiskScenario.TREATMENT_OPTIONS,
             user_group=test.user_group,
         )
+
+
+@pytest.mark.django_db
+class TestRiskScenariosQueries:
+    """Check the number of queries of the Risk Scenarios API endpoint"""
+
+    def test_risk_scenarios_query_count(
+        self, authenticated_client, django_assert_max_num_queries
+    ):
+        """test that listing and retrieving risk scenarios uses a bounded number of queries"""
+
+        EndpointTestsQueries.Auth.import_object(authenticated_client, "Risk matrix")
+        folder = Folder.objects.create(name="test")
+        risk_assessment = RiskAssessment.objects.create(
+            name="test",
+            perimeter=Perimeter.objects.create(name="testPerimeter", folder=folder),
+            risk_matrix=RiskMatrix.objects.all()[0],
+        )
+        for i in range(10):
+            applied_control = AppliedControl.objects.create(
+                name=f"control {i}", folder=folder
+            )
+            applied_control.evidences.add(
+                Evidence.objects.create(name=f"evidence {i}", folder=folder)
+            )
+            scenario = RiskScenario.objects.create(
+                name=f"scenario {i}", risk_assessment=risk_assessment
+            )
+            scenario.threats.add(
+                Threat.objects.create(name=f"threat {i}", folder=folder)
+            )
+            scenario.assets.add(Asset.objects.create(name=f"asset {i}", folder=folder))
+            scenario.applied_controls.add(applied_control)
+        url = EndpointTestsUtils.get_endpoint_url("Risk Scenarios")
+
+        with django_assert_max_num_queries(13):
+            response = authenticated_client.get(url)
+        assert response.status_code == 200
+        assert response.json()["count"] == 10
+
+        with django_assert_max_num_queries(16):
+            response = authenticated_client.get(f"{url}{scenario.id}/")
+        assert response.status_code == 200
@@ -11,6 +11,16 @@ class CoreConfig(AppConfig):
     verbose_name = "Core"
 
     def ready(self):
+        from iam.models import Folder, PermissionRegistry
+
+        # permissions are only created or recreated by migrate and flush
+        post_migrate.connect(PermissionRegistry.clear)
+        # flush deletes the root folder without sending signals
+        post_migrate.connect(Folder.clear_root_folder_cache)
+        from core.serializers import SerializerFactory
+
+        # resolve the serializers of core viewsets once, rather than on each request
+        SerializerFactory.for_module("core.serializers")
         # avoid post_migrate handler if we are in the main, as it interferes with restore
         if not os.environ.get("RUN_MAIN"):
             post_migrate.connect(startup, sender=self)
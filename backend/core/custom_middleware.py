@@ -3,6 +3,7 @@ from django.utils.functional import SimpleLazyObject
 from auditlog.models import LogEntry
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from iam.models import RBACContext
 
 import structlog
 
@@ -19,6 +20,23 @@ class AuditlogMiddleware(middleware.AuditlogMiddleware):
         )
 
 
+class RBACContextMiddleware:
+    """
+    Activate a RBAC context for the duration of the request, so that the role assignments
+    of the user are loaded once and permission checks are answered from memory.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = RBACContext.activate()
+        try:
+            return self.get_response(request)
+        finally:
+            RBACContext.deactivate(token)
+
+
 # Add a post-save signal to add the additional info after the log entry is saved
 # Think about the potential perf overhead of this
 @receiver(post_save, sender=LogEntry)
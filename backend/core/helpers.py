@@ -1,4 +1,6 @@
 import json
+import time
+from collections import defaultdict
 from collections.abc import MutableMapping
 from datetime import date, timedelta
 from typing import Optional
@@ -7,19 +9,23 @@ from typing import Dict, List
 # from icecream import ic
 from django.core.exceptions import NON_FIELD_ERRORS as DJ_NON_FIELD_ERRORS
 from django.core.exceptions import ValidationError as DjValidationError
-from django.db.models import Count
+from django.db.models import Count, Q
+from django.core.cache import caches
+from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.utils.translation import get_language
 from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.views import api_settings
 from rest_framework.views import exception_handler as drf_exception_handler
 
-from iam.models import Folder, Permission, RoleAssignment, User
-from library.helpers import get_referential_translation
+from iam.models import Folder, PermissionRegistry, RoleAssignment, User
+from library.helpers import get_translated_fields
 
 from statistics import mean
 import math
 
 from .models import *
+from .tasks import refresh_metrics_snapshot_task
 from .utils import camel_case
 
 DRF_NON_FIELD_ERRORS = api_settings.NON_FIELD_ERRORS_KEY
@@ -86,30 +92,19 @@ def applied_control_priority(user: User):
         "4th": list(),
         "undefined": list(),
     }
-    (
-        object_ids_view,
-        object_ids_change,
-        object_ids_delete,
-    ) = RoleAssignment.get_accessible_object_ids(
+    for mtg in RoleAssignment.get_accessible_queryset(
         Folder.get_root_folder(), user, AppliedControl
-    )
-
-    for mtg in AppliedControl.objects.filter(id__in=object_ids_view):
+    ):
         clusters[get_quadrant(mtg)].append(mtg)
 
     return clusters
 
 
 def measures_to_review(user: User):
-    (
-        object_ids_view,
-        object_ids_change,
-        object_ids_delete,
-    ) = RoleAssignment.get_accessible_object_ids(
-        Folder.get_root_folder(), user, AppliedControl
-    )
     measures = (
-        AppliedControl.objects.filter(id__in=object_ids_view)
+        RoleAssignment.get_accessible_queryset(
+            Folder.get_root_folder(), user, AppliedControl
+        )
         .filter(expiry_date__lte=date.today() + timedelta(days=30))
         .order_by("expiry_date")
     )
@@ -172,7 +167,7 @@ def compile_perimeter_for_composer(user: User, perimeters_list: list):
         "applied_control_status": applied_control_status,
         "change_usergroup": RoleAssignment.is_access_allowed(
             user=user,
-            perm=Permission.objects.get(codename="change_usergroup"),
+            perm=PermissionRegistry.get("change_usergroup"),
             folder=Folder.get_root_folder(),
         ),
     }
@@ -258,6 +253,8 @@ def get_sorted_requirement_nodes(
         str(ra.requirement_id): ra for ra in (requirements_assessed or [])
     }
 
+    locale = get_language()
+
     # Build a dictionary to quickly access children nodes
     children_dict = {}
     for node in requirement_nodes:
@@ -277,12 +274,13 @@ def get_sorted_requirement_nodes(
         result = {}
         for node in start:
             req_as = requirement_assessment_from_requirement_id.get(str(node.id))
+            node_translations = get_translated_fields(node, locale)
 
             node_data = {
                 "urn": node.urn,
                 "parent_urn": node.parent_urn,
                 "ref_id": node.ref_id,
-                "name": get_referential_translation(node, "name"),
+                "name": node_translations["name"],
                 "implementation_groups": node.implementation_groups or None,
                 "ra_id": str(req_as.id) if req_as else None,
                 "status": req_as.status if req_as else None,
@@ -301,7 +299,7 @@ def get_sorted_requirement_nodes(
                 "node_content": node.display_long,
                 "style": "node",
                 "assessable": node.assessable,
-                "description": get_referential_translation(node, "description"),
+                "description": node_translations["description"],
                 "children": {},
             }
 
@@ -317,13 +315,14 @@ def get_sorted_requirement_nodes(
                 child_req_as = requirement_assessment_from_requirement_id.get(
                     str(child.id)
                 )
+                child_translations = get_translated_fields(child, locale)
 
                 child_data = {
                     "urn": child.urn,
                     "ref_id": child.ref_id,
                     "implementation_groups": child.implementation_groups or None,
-                    "name": get_referential_translation(child, "name"),
-                    "description": get_referential_translation(child, "description"),
+                    "name": child_translations["name"],
+                    "description": child_translations["description"],
                     "ra_id": str(child_req_as.id) if child_req_as else None,
                     "status": child_req_as.status if child_req_as else None,
                     "is_scored": child_req_as.is_scored if child_req_as else None,
@@ -392,21 +391,18 @@ def get_parsed_matrices(
     scoped_folder = (
         Folder.objects.get(id=folder_id) if folder_id else Folder.get_root_folder()
     )
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(scoped_folder, user, RiskScenario)
+    viewable_scenarios = RoleAssignment.get_accessible_queryset(
+        scoped_folder, user, RiskScenario
+    )
     if risk_assessments is None:
         risk_matrices = list(
-            RiskScenario.objects.filter(id__in=object_ids_view)
-            .values_list("risk_assessment__risk_matrix__json_definition", flat=True)
-            .distinct()
+            viewable_scenarios.values_list(
+                "risk_assessment__risk_matrix__json_definition", flat=True
+            ).distinct()
         )
     else:
         risk_matrices = list(
-            RiskScenario.objects.filter(id__in=object_ids_view)
-            .filter(risk_assessment__in=risk_assessments)
+            viewable_scenarios.filter(risk_assessment__in=risk_assessments)
             .values_list("risk_assessment__risk_matrix__json_definition", flat=True)
             .distinct()
         )
@@ -492,19 +488,11 @@ def risk_per_status(user: User):
         "transfer": "#3ba272",
     }
 
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(
+    viewable_scenarios = RoleAssignment.get_accessible_queryset(
         Folder.get_root_folder(), user, RiskScenario
     )
     for st in RiskScenario.TREATMENT_OPTIONS:
-        count = (
-            RiskScenario.objects.filter(id__in=object_ids_view)
-            .filter(treatment=st[0])
-            .count()
-        )
+        count = viewable_scenarios.filter(treatment=st[0]).count()
         v = {
             "value": count,
             "localName": st[0],
@@ -529,14 +517,9 @@ def applied_control_per_status(user: User):
         AppliedControl.Status.ON_HOLD: "#F4D06F",
         AppliedControl.Status.DEPRECATED: "#E55759",
     }
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(
+    viewable_applied_controls = RoleAssignment.get_accessible_queryset(
         Folder.get_root_folder(), user, AppliedControl
     )
-    viewable_applied_controls = AppliedControl.objects.filter(id__in=object_ids_view)
     for st in AppliedControl.Status.choices:
         count = viewable_applied_controls.filter(status=st[0]).count()
         v = {"value": count, "itemStyle": {"color": color_map[st[0]]}}
@@ -558,12 +541,9 @@ def assessment_per_status(user: User, model: RiskAssessment | ComplianceAssessme
         "done": "#46D39A",
         "deprecated": "#E55759",
     }
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(Folder.get_root_folder(), user, model)
-    viewable_applied_controls = model.objects.filter(id__in=object_ids_view)
+    viewable_applied_controls = RoleAssignment.get_accessible_queryset(
+        Folder.get_root_folder(), user, model
+    )
     undefined_count = viewable_applied_controls.filter(status__isnull=True).count()
     values.append(
         {"value": undefined_count, "itemStyle": {"color": color_map["undefined"]}}
@@ -581,17 +561,12 @@ def assessment_per_status(user: User, model: RiskAssessment | ComplianceAssessme
 
 def applied_control_per_cur_risk(user: User):
     output = list()
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(
+    viewable_applied_controls = RoleAssignment.get_accessible_queryset(
         Folder.get_root_folder(), user, AppliedControl
     )
     for lvl in get_rating_options(user):
         cnt = (
-            AppliedControl.objects.filter(id__in=object_ids_view)
-            .exclude(status="active")
+            viewable_applied_controls.exclude(status="active")
             .filter(risk_scenarios__current_level=lvl[0])
             .count()
         )
@@ -603,16 +578,10 @@ def applied_control_per_cur_risk(user: User):
 def applied_control_per_reference_control(user: User):
     indicators = list()
     values = list()
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(
-        Folder.get_root_folder(), user, AppliedControl
-    )
-
     tmp = (
-        AppliedControl.objects.filter(id__in=object_ids_view)
+        RoleAssignment.get_accessible_queryset(
+            Folder.get_root_folder(), user, AppliedControl
+        )
         .values("reference_control__name")
         .annotate(total=Count("reference_control"))
         .order_by("reference_control")
@@ -639,11 +608,9 @@ def aggregate_risks_per_field(
     scoped_folder = (
         Folder.objects.get(id=folder_id) if folder_id else Folder.get_root_folder()
     )
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(scoped_folder, user, RiskScenario)
+    viewable_scenarios = RoleAssignment.get_accessible_queryset(
+        scoped_folder, user, RiskScenario
+    )
     parsed_matrices: list = get_parsed_matrices(
         user=user, risk_assessments=risk_assessments, folder_id=folder_id
     )
@@ -655,15 +622,13 @@ def aggregate_risks_per_field(
 
             if residual:
                 count = (
-                    RiskScenario.objects.filter(id__in=object_ids_view)
-                    .filter(residual_level=i)
+                    viewable_scenarios.filter(residual_level=i)
                     # .filter(risk_assessment__risk_matrix__name=["name"])
                     .count()
                 )  # What the second filter does ? Is this useful ?
             else:
                 count = (
-                    RiskScenario.objects.filter(id__in=object_ids_view)
-                    .filter(current_level=i)
+                    viewable_scenarios.filter(current_level=i)
                     # .filter(risk_assessment__risk_matrix__name=["name"])
                     .count()
                 )  # What the second filter does ? Is this useful ?
@@ -712,12 +677,9 @@ def risks_count_per_level(
 def p_risks(user: User):
     p_risks_labels = list()
     p_risks_counts = list()
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(Folder.get_root_folder(), user, Threat)
-    for p_risk in Threat.objects.filter(id__in=object_ids_view).order_by("name"):
+    for p_risk in RoleAssignment.get_accessible_queryset(
+        Folder.get_root_folder(), user, Threat
+    ).order_by("name"):
         p_risks_labels.append(p_risk.name)
         p_risks_counts.append(RiskScenario.objects.filter(threat=p_risk).count())
 
@@ -731,12 +693,9 @@ def p_risks(user: User):
 
 def p_risks_2(user: User):
     data = list()
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(Folder.get_root_folder(), user, Threat)
-    for p_risk in Threat.objects.filter(id__in=object_ids_view).order_by("name"):
+    for p_risk in RoleAssignment.get_accessible_queryset(
+        Folder.get_root_folder(), user, Threat
+    ).order_by("name"):
         cnt = RiskScenario.objects.filter(threat=p_risk).count()
         if cnt > 0:
             data.append(
@@ -750,17 +709,12 @@ def p_risks_2(user: User):
 
 def risks_per_perimeter_groups(user: User):
     output = list()
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(
+    viewable_scenarios = RoleAssignment.get_accessible_queryset(
         Folder.get_root_folder(), user, RiskScenario
     )
     for folder in Folder.objects.all().order_by("name"):
         ri_level = (
-            RiskScenario.objects.filter(id__in=object_ids_view)
-            .filter(risk_assessment__perimeter__folder=folder)
+            viewable_scenarios.filter(risk_assessment__perimeter__folder=folder)
             .values("current_level")
             .annotate(total=Count("current_level"))
         )
@@ -769,68 +723,48 @@ def risks_per_perimeter_groups(user: User):
 
 
 def get_counters(user: User):
-    controls_count = len(
-        RoleAssignment.get_accessible_object_ids(
-            Folder.get_root_folder(), user, AppliedControl
-        )[0]
-    )
+    def count(model):
+        return RoleAssignment.get_accessible_queryset(
+            Folder.get_root_folder(), user, model
+        ).count()
+
     return {
-        "domains": len(
-            RoleAssignment.get_accessible_object_ids(
-                Folder.get_root_folder(), user, Folder
-            )[0]
-        ),
-        "perimeters": len(
-            RoleAssignment.get_accessible_object_ids(
-                Folder.get_root_folder(), user, Perimeter
-            )[0]
-        ),
-        "applied_controls": controls_count,
-        "risk_assessments": len(
-            RoleAssignment.get_accessible_object_ids(
-                Folder.get_root_folder(), user, RiskAssessment
-            )[0]
-        ),
-        "compliance_assessments": len(
-            RoleAssignment.get_accessible_object_ids(
-                Folder.get_root_folder(), user, ComplianceAssessment
-            )[0]
-        ),
-        "policies": len(
-            RoleAssignment.get_accessible_object_ids(
-                Folder.get_root_folder(), user, Policy
-            )[0]
-        ),
+        "domains": count(Folder),
+        "perimeters": count(Perimeter),
+        "applied_controls": count(AppliedControl),
+        "risk_assessments": count(RiskAssessment),
+        "compliance_assessments": count(ComplianceAssessment),
+        "policies": count(Policy),
     }
 
 
 def build_audits_tree_metrics(user):
-    (object_ids, _, _) = RoleAssignment.get_accessible_object_ids(
-        Folder.get_root_folder(), user, Folder
+    viewable_domains = list(
+        RoleAssignment.get_accessible_queryset(
+            Folder.get_root_folder(), user, Folder
+        ).exclude(name="Global")
+    )
+    perimeters = defaultdict(list)
+    for perimeter in Perimeter.objects.filter(folder__in=viewable_domains):
+        perimeters[perimeter.folder_id].append(perimeter)
+    audits = defaultdict(list)
+    for audit in ComplianceAssessment.objects.filter(
+        perimeter__folder__in=viewable_domains
+    ):
+        audits[audit.perimeter_id].append(audit)
+    results = ComplianceAssessment.get_results_per_assessment(
+        [audit.id for perimeter_audits in audits.values() for audit in perimeter_audits]
     )
-    viewable_domains = Folder.objects.filter(id__in=object_ids)
 
     tree = list()
-    domain_prj_children = list()
-    for domain in viewable_domains.exclude(name="Global"):
+    for domain in viewable_domains:
         block_domain = {"name": domain.name, "children": []}
         domain_prj_children = []
-        for perimeter in Perimeter.objects.filter(folder=domain):
+        for perimeter in perimeters[domain.id]:
             block_prj = {"name": perimeter.name, "domain": domain.name, "children": []}
             children = []
-            for audit in ComplianceAssessment.objects.filter(perimeter=perimeter):
-                cnt_res = {}
-                for result in RequirementAssessment.Result.choices:
-                    requirement_assessments = audit.get_requirement_assessments(
-                        include_non_assessable=False
-                    )
-                    cnt_res[result[0]] = len(
-                        [
-                            requirement
-                            for requirement in requirement_assessments
-                            if requirement.result == result[0]
-                        ]
-                    )
+            for audit in audits[perimeter.id]:
+                cnt_res = results[audit.id]
                 blk_audit = {
                     "name": audit.name,
                     "children": [
@@ -868,14 +802,19 @@ def build_audits_stats(user, folder_id=None):
     scoped_folder = (
         Folder.objects.get(id=folder_id) if folder_id else Folder.get_root_folder()
     )
-    (object_ids, _, _) = RoleAssignment.get_accessible_object_ids(
-        scoped_folder, user, ComplianceAssessment
-    )
     data = list()
     names = list()
     uuids = list()
-    for audit in ComplianceAssessment.objects.filter(id__in=object_ids):
-        data.append([rs[0] for rs in audit.get_requirements_result_count()])
+    audits = list(
+        RoleAssignment.get_accessible_queryset(
+            scoped_folder, user, ComplianceAssessment
+        )
+    )
+    results = ComplianceAssessment.get_results_per_assessment(
+        [audit.id for audit in audits]
+    )
+    for audit in audits:
+        data.append(list(results[audit.id].values()))
         names.append(audit.name)
         uuids.append(audit.id)
     return {"data": data, "names": names, "uuids": uuids}
@@ -885,14 +824,16 @@ def csf_functions(user, folder_id=None):
     scoped_folder = (
         Folder.objects.get(id=folder_id) if folder_id else Folder.get_root_folder()
     )
-    (object_ids, _, _) = RoleAssignment.get_accessible_object_ids(
+    viewable_controls = RoleAssignment.get_accessible_queryset(
         scoped_folder, user, AppliedControl
     )
-    viewable_controls = AppliedControl.objects.filter(id__in=object_ids)
-    cnt = dict()
-    for choice in ReferenceControl.CSF_FUNCTION:
-        cnt[choice[0]] = viewable_controls.filter(csf_function=choice[0]).count()
-    undefined = viewable_controls.filter(csf_function__isnull=True).count()
+    cnt = {choice[0]: 0 for choice in ReferenceControl.CSF_FUNCTION}
+    undefined = 0
+    for item in viewable_controls.values("csf_function").annotate(total=Count("id")):
+        if item["csf_function"] is None:
+            undefined = item["total"]
+        else:
+            cnt[item["csf_function"]] = item["total"]
     data = [
         {"name": "Govern", "value": cnt["govern"]},
         {"name": "Identify", "value": cnt["identify"]},
@@ -908,46 +849,54 @@ def csf_functions(user, folder_id=None):
 
 
 def get_metrics(user: User, folder_id):
-    def viewable_items(model, folder_id=None):
-        scoped_folder = (
-            Folder.objects.get(id=folder_id) if folder_id else Folder.get_root_folder()
-        )
-        (object_ids, _, _) = RoleAssignment.get_accessible_object_ids(
-            scoped_folder, user, model
-        )
-        return model.objects.filter(id__in=object_ids)
-
-    viewable_controls = viewable_items(AppliedControl, folder_id)
-    viewable_risk_assessments = viewable_items(RiskAssessment, folder_id)
-    viewable_compliance_assessments = viewable_items(ComplianceAssessment, folder_id)
-    viewable_risk_scenarios = viewable_items(RiskScenario, folder_id)
-    viewable_threats = viewable_items(Threat, folder_id)
-    viewable_risk_acceptances = viewable_items(RiskAcceptance, folder_id)
-    viewable_evidences = viewable_items(Evidence, folder_id)
-    viewable_requirement_assessments = viewable_items(RequirementAssessment, folder_id)
-    controls_count = viewable_controls.count()
-    progress_avg = math.ceil(
-        mean([x.get_progress() for x in viewable_compliance_assessments] or [0])
+    scoped_folder = (
+        Folder.objects.get(id=folder_id) if folder_id else Folder.get_root_folder()
     )
-    missed_eta_count = (
-        viewable_controls.filter(
-            eta__lt=date.today(),
-        )
-        .exclude(status="active")
-        .count()
+
+    def viewable_items(model):
+        return RoleAssignment.get_accessible_queryset(scoped_folder, user, model)
+
+    viewable_controls = viewable_items(AppliedControl)
+    viewable_risk_assessments = viewable_items(RiskAssessment)
+    viewable_compliance_assessments = viewable_items(ComplianceAssessment)
+    viewable_risk_scenarios = viewable_items(RiskScenario)
+    viewable_threats = viewable_items(Threat)
+    viewable_risk_acceptances = viewable_items(RiskAcceptance)
+    viewable_evidences = viewable_items(Evidence)
+    viewable_requirement_assessments = viewable_items(RequirementAssessment)
+    controls = viewable_controls.aggregate(
+        total=Count("id"),
+        to_do=Count("id", filter=Q(status="to_do")),
+        in_progress=Count("id", filter=Q(status="in_progress")),
+        on_hold=Count("id", filter=Q(status="on_hold")),
+        active=Count("id", filter=Q(status="active")),
+        deprecated=Count("id", filter=Q(status="deprecated")),
+        p1=Count("id", filter=Q(priority=1) & ~Q(status="active")),
+        eta_missed=Count("id", filter=Q(eta__lt=date.today()) & ~Q(status="active")),
+    )
+    compliance = viewable_compliance_assessments.aggregate(
+        used_frameworks=Count("framework", distinct=True),
+        audits=Count("id"),
+        active_audits=Count(
+            "id", filter=Q(status__in=["in_progress", "in_review", "done"])
+        ),
+    )
+    compliance_assessment_ids = list(
+        viewable_compliance_assessments.values_list("id", flat=True)
+    )
+    results_per_assessment = ComplianceAssessment.get_results_per_assessment(
+        compliance_assessment_ids
     )
+    progress = list()
+    for compliance_assessment_id in compliance_assessment_ids:
+        results = results_per_assessment[compliance_assessment_id]
+        total = sum(results.values())
+        assessed = total - results[RequirementAssessment.Result.NOT_ASSESSED]
+        progress.append(int((assessed / total) * 100) if total > 0 else 0)
+    progress_avg = math.ceil(mean(progress or [0]))
 
     data = {
-        "controls": {
-            "total": controls_count,
-            "to_do": viewable_controls.filter(status="to_do").count(),
-            "in_progress": viewable_controls.filter(status="in_progress").count(),
-            "on_hold": viewable_controls.filter(status="on_hold").count(),
-            "active": viewable_controls.filter(status="active").count(),
-            "deprecated": viewable_controls.filter(status="deprecated").count(),
-            "p1": viewable_controls.filter(priority=1).exclude(status="active").count(),
-            "eta_missed": missed_eta_count,
-        },
+        "controls": controls,
         "risk": {
             "assessments": viewable_risk_assessments.count(),
             "scenarios": viewable_risk_scenarios.count(),
@@ -957,13 +906,7 @@ def get_metrics(user: User, folder_id):
             "acceptances": viewable_risk_acceptances.count(),
         },
         "compliance": {
-            "used_frameworks": viewable_compliance_assessments.values("framework_id")
-            .distinct()
-            .count(),
-            "audits": viewable_compliance_assessments.count(),
-            "active_audits": viewable_compliance_assessments.filter(
-                status__in=["in_progress", "in_review", "done"]
-            ).count(),
+            **compliance,
             "evidences": viewable_evidences.count(),
             "non_compliant_items": viewable_requirement_assessments.filter(
                 result="non_compliant"
@@ -976,6 +919,51 @@ def get_metrics(user: User, folder_id):
     return data
 
 
+METRICS_SNAPSHOTS = {
+    "counters": lambda user, folder_id: get_counters(user),
+    "metrics": get_metrics,
+}
+
+
+def get_metrics_snapshot_key(name: str, user: User, folder_id=None) -> str:
+    """
+    Snapshots are shared by users with the same permissions on the same folder scope
+    """
+    fingerprint = RoleAssignment.get_permissions_fingerprint(user)
+    return f"{name}:{folder_id or 'root'}:{fingerprint}"
+
+
+def refresh_metrics_snapshot(name: str, user: User, folder_id=None):
+    """
+    Compute a dashboard snapshot and store it in the metrics cache
+    """
+    data = METRICS_SNAPSHOTS[name](user, folder_id)
+    key = get_metrics_snapshot_key(name, user, folder_id)
+    caches["metrics"].set(key, {"data": data, "computed_at": time.time()})
+    return data
+
+
+def get_metrics_snapshot(name: str, user: User, folder_id=None):
+    """
+    Serve a dashboard snapshot from the metrics cache.
+    Snapshots older than METRICS_SNAPSHOT_TTL are still served while a background task
+    refreshes them; past METRICS_SNAPSHOT_MAX_AGE they expire and are computed inline.
+    """
+    metrics_cache = caches["metrics"]
+    key = get_metrics_snapshot_key(name, user, folder_id)
+    snapshot = metrics_cache.get(key)
+    if snapshot is None:
+        return refresh_metrics_snapshot(name, user, folder_id)
+    if time.time() - snapshot["computed_at"] > settings.METRICS_SNAPSHOT_TTL:
+        # Only one refresh per snapshot is queued at a time, until it completes
+        refreshing_key = f"{key}:refreshing"
+        if metrics_cache.add(
+            refreshing_key, True, timeout=settings.METRICS_SNAPSHOT_MAX_AGE
+        ):
+            refresh_metrics_snapshot_task(name, user.id, folder_id, refreshing_key)
+    return snapshot["data"]
+
+
 def risk_status(user: User, risk_assessment_list):
     risk_color_map = get_risk_color_map(user)
     names = list()
@@ -1055,15 +1043,10 @@ def risk_status(user: User, risk_assessment_list):
 
 
 def acceptances_to_review(user: User):
-    (
-        object_ids_view,
-        _,
-        _,
-    ) = RoleAssignment.get_accessible_object_ids(
-        Folder.get_root_folder(), user, RiskAcceptance
-    )
     acceptances = (
-        RiskAcceptance.objects.filter(id__in=object_ids_view)
+        RoleAssignment.get_accessible_queryset(
+            Folder.get_root_folder(), user, RiskAcceptance
+        )
         .filter(expiry_date__lte=date.today() + timedelta(days=30))
         .filter(approver=user)
         .filter(state__in=["submitted", "accepted"])
@@ -1177,16 +1160,13 @@ def threats_count_per_name(user: User, folder_id=None) -> Dict[str, List]:
     scoped_folder = (
         Folder.objects.get(id=folder_id) if folder_id else Folder.get_root_folder()
     )
-    object_ids_view, _, _ = RoleAssignment.get_accessible_object_ids(
-        scoped_folder, user, Threat
-    )
-    viewable_scenarios = RoleAssignment.get_accessible_object_ids(
+    viewable_scenarios = RoleAssignment.get_accessible_queryset(
         scoped_folder, user, RiskScenario
-    )[0]
+    ).values("id")
 
     # Updated field name from 'riskscenario' to 'risk_scenarios'
     threats_with_counts = (
-        Threat.objects.filter(id__in=object_ids_view)
+        RoleAssignment.get_accessible_queryset(scoped_folder, user, Threat)
         .annotate(
             scenario_count=Count(
                 "risk_scenarios",
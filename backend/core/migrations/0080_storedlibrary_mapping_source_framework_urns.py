@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def set_mapping_source_framework_urns(apps, schema_editor):
+    StoredLibrary = apps.get_model("core", "StoredLibrary")
+    libraries = StoredLibrary.objects.filter(
+        models.Q(objects_meta__requirement_mapping_set__isnull=False)
+        | models.Q(objects_meta__requirement_mapping_sets__isnull=False)
+    )
+    for library in libraries.iterator():
+        mapping_sets = library.content.get(
+            "requirement_mapping_set"
+        ) or library.content.get("requirement_mapping_sets", [])
+        if isinstance(mapping_sets, dict):
+            mapping_sets = [mapping_sets]
+        library.mapping_source_framework_urns = sorted(
+            {
+                mapping_set["source_framework_urn"].lower()
+                for mapping_set in mapping_sets
+                if mapping_set.get("source_framework_urn")
+            }
+        )
+        library.save(update_fields=["mapping_source_framework_urns"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0079_finding_evidences_findingsassessment_evidences"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="storedlibrary",
+            name="mapping_source_framework_urns",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(
+            set_mapping_source_framework_urns, migrations.RunPython.noop
+        ),
+    ]
@@ -2,9 +2,11 @@ import json
 import os
 import re
 import hashlib
+import copy
 from datetime import date, datetime
 from pathlib import Path
 from typing import Self, Union, List
+from weakref import WeakValueDictionary
 
 from icecream import ic
 from auditlog.registry import auditlog
@@ -12,12 +14,13 @@ from auditlog.registry import auditlog
 from django.utils.functional import cached_property
 import yaml
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core import serializers
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, RegexValidator, MinValueValidator
-from django.db import models, transaction
-from django.db.models import F, Q, OuterRef, Subquery
+from django.db import connection, models, transaction
+from django.db.models import Count, F, Q, OuterRef, Subquery, Sum
 from django.forms.models import model_to_dict
 from django.urls import reverse
 from django.utils.html import format_html
@@ -29,14 +32,14 @@ from django.utils.timezone import now
 from iam.models import Folder, FolderMixin, PublishInRootFolderMixin
 from library.helpers import (
     get_referential_translation,
-    update_translations,
+    translate_object,
+    load_library_yaml,
     update_translations_as_string,
-    update_translations_in_object,
 )
 from global_settings.models import GlobalSettings
 
 from .base_models import AbstractBaseModel, ETADueDateMixin, NameDescriptionMixin
-from .utils import camel_case, sha256
+from .utils import camel_case, log_bulk_changes, sha256
 from .validators import (
     validate_file_name,
     validate_file_size,
@@ -234,6 +237,8 @@ class StoredLibrary(LibraryMixin):
     is_loaded = models.BooleanField(default=False)
     hash_checksum = models.CharField(max_length=64)
     content = models.JSONField()
+    # Denormalized from the content, so that libraries can be filtered without reading it
+    mapping_source_framework_urns = models.JSONField(default=list, blank=True)
 
     REQUIRED_FIELDS = {"urn", "name", "version", "objects"}
     FIELDS_VERIFIERS = {}
@@ -246,6 +251,27 @@ class StoredLibrary(LibraryMixin):
             value["hash_checksum"] for value in cls.objects.values("hash_checksum")
         )
 
+    @staticmethod
+    def get_requirement_mapping_sets(library_objects: dict) -> list[dict]:
+        """Get the requirement mapping sets of the content of a library."""
+        mapping_sets = library_objects.get(
+            "requirement_mapping_set"
+        ) or library_objects.get("requirement_mapping_sets", [])
+        if isinstance(mapping_sets, dict):
+            return [mapping_sets]
+        return mapping_sets if isinstance(mapping_sets, list) else []
+
+    @classmethod
+    def get_mapping_source_framework_urns(cls, library_objects: dict) -> list[str]:
+        """Get the source framework URNs of the mapping sets of a library."""
+        return sorted(
+            {
+                mapping_set["source_framework_urn"].lower()
+                for mapping_set in cls.get_requirement_mapping_sets(library_objects)
+                if mapping_set.get("source_framework_urn")
+            }
+        )
+
     @classmethod
     def store_library_content(
         cls, library_content: bytes, builtin: bool = False
@@ -255,14 +281,21 @@ class StoredLibrary(LibraryMixin):
             # We do not store the library if its hash checksum is in the database.
             return None
         try:
-            library_data = yaml.safe_load(library_content)
-            if not isinstance(library_data, dict):
-                raise yaml.YAMLError(
-                    f"The YAML content must be a dictionary but it's been interpreted as a {type(library_data).__name__} !"
-                )
+            library_data = load_library_yaml(
+                library_content,
+                cache_dir=settings.LIBRARIES_CACHE_PATH,
+                hash_checksum=hash_checksum,
+            )
         except yaml.YAMLError as e:
             logger.error("Error while loading library content", error=e)
             raise e
+        return StoredLibrary.store_library_data(library_data, hash_checksum, builtin)
+
+    @classmethod
+    def store_library_data(
+        cls, library_data: dict, hash_checksum: str, builtin: bool = False
+    ) -> "StoredLibrary | None":
+        """Store the parsed content of a library, whose checksum is hash_checksum."""
         missing_fields = StoredLibrary.REQUIRED_FIELDS - set(library_data.keys())
 
         if missing_fields:
@@ -331,6 +364,9 @@ class StoredLibrary(LibraryMixin):
             builtin=builtin,
             hash_checksum=hash_checksum,
             content=library_objects,
+            mapping_source_framework_urns=StoredLibrary.get_mapping_source_framework_urns(
+                library_objects
+            ),
         )
 
     @classmethod
@@ -452,7 +488,25 @@ class LibraryUpdater:
                 },
             )
 
-    def update_frameworks(self):
+    def update_frameworks(self) -> dict[str, int]:
+        """
+        Update the frameworks of the library and their requirement nodes, with a diff
+        of the requirement nodes by URN: obsolete nodes are deleted, existing ones are
+        updated and missing ones are created in bulk, along with the requirement
+        assessments missing from the compliance assessments of the frameworks.
+        Return the number of objects deleted, updated and created.
+        """
+        counts = dict.fromkeys(
+            [
+                "deleted_requirement_nodes",
+                "created_requirement_nodes",
+                "updated_requirement_nodes",
+                "created_requirement_assessments",
+                "updated_requirement_assessments",
+            ],
+            0,
+        )
+        root_folder_id = Folder.get_root_folder_id()
         for new_framework in self.new_frameworks:
             requirement_nodes = new_framework["requirement_nodes"]
             framework_dict = {**new_framework}
@@ -470,61 +524,89 @@ class LibraryUpdater:
             )
 
             # update requirement_nodes
-            requirement_node_urns = set(
-                rc.urn.lower()
-                for rc in RequirementNode.objects.filter(framework=new_framework)
-            )
+            existing_requirement_node_objects = {
+                rn.urn.lower(): rn
+                for rn in RequirementNode.objects.filter(framework=new_framework)
+            }
             new_requirement_node_urns = set(
-                rc["urn"].lower() for rc in requirement_nodes
-            )
-            deleted_requirement_node_urns = (
-                requirement_node_urns - new_requirement_node_urns
+                rn["urn"].lower() for rn in requirement_nodes
             )
-
-            for requirement_node_urn in deleted_requirement_node_urns:
-                requirement_node = RequirementNode.objects.filter(
-                    urn=requirement_node_urn
-                ).first()
-                if requirement_node is not None:
-                    requirement_node.delete()
-
-            involved_library_urns = [*self.dependencies, self.old_library.urn]
-            involved_libraries = set(
-                LoadedLibrary.objects.filter(urn__in=involved_library_urns)
-            )
-            objects_tracked = {}
-
-            for threat in Threat.objects.filter(library__in=involved_libraries):
-                objects_tracked[threat.urn.lower()] = threat
-
-            for rc in ReferenceControl.objects.filter(library__in=involved_libraries):
-                objects_tracked[rc.urn.lower()] = rc
+            deleted_requirement_node_ids = [
+                rn.id
+                for urn, rn in existing_requirement_node_objects.items()
+                if urn not in new_requirement_node_urns
+            ]
+            if deleted_requirement_node_ids:
+                RequirementNode.objects.filter(
+                    id__in=deleted_requirement_node_ids
+                ).delete()
+                counts["deleted_requirement_nodes"] += len(deleted_requirement_node_ids)
 
             compliance_assessments = [
-                *ComplianceAssessment.objects.filter(framework=new_framework)
+                *ComplianceAssessment.objects.filter(
+                    framework=new_framework
+                ).select_related("perimeter")
             ]
 
-            existing_requirement_node_objects = {
-                rn.urn.lower(): rn
-                for rn in RequirementNode.objects.filter(framework=new_framework)
-            }
             existing_requirement_assessment_objects = defaultdict(list)
             for ra in RequirementAssessment.objects.filter(
                 requirement__framework=new_framework
-            ):
+            ).annotate(requirement_urn=F("requirement__urn")):
                 existing_requirement_assessment_objects[
-                    ra.requirement.urn.lower()
+                    ra.requirement_urn.lower()
                 ].append(ra)
 
-            requirement_assessment_objects_to_create = []
+            # Threats and reference controls are looked up by URN among the objects of
+            # the involved libraries first, then among all objects
+            involved_libraries = LoadedLibrary.objects.filter(
+                urn__in=[*self.dependencies, self.old_library.urn]
+            )
+
+            def get_ids_by_urn(model, urns):
+                # The index of the involved libraries overrides the global one, as
+                # the same URN may be used by objects of other libraries
+                ids = {
+                    urn.lower(): id
+                    for urn, id in model.objects.filter(urn__in=urns).values_list(
+                        "urn", "id"
+                    )
+                }
+                ids.update(
+                    (urn.lower(), id)
+                    for urn, id in model.objects.filter(
+                        library__in=involved_libraries
+                    ).values_list("urn", "id")
+                )
+                return ids
+
+            threat_ids = get_ids_by_urn(
+                Threat,
+                {
+                    urn.lower()
+                    for rn in requirement_nodes
+                    for urn in rn.get("threats", [])
+                },
+            )
+            reference_control_ids = get_ids_by_urn(
+                ReferenceControl,
+                {
+                    urn.lower()
+                    for rn in requirement_nodes
+                    for urn in rn.get("reference_controls", [])
+                },
+            )
+
             requirement_assessment_objects_to_update = []
+            requirement_node_objects_to_create = []
             requirement_node_objects_to_update = []
-            order_id = 0
+            threat_links = []
+            reference_control_links = []
             all_fields_to_update = set()
+            updated_at = now()
 
             # main loop by requirement_node
-            for requirement_node in requirement_nodes:
-                urn = requirement_node["urn"].lower()
+            for order_id, requirement_node in enumerate(requirement_nodes):
+                node_urn = requirement_node["urn"].lower()
                 questions = requirement_node.get("questions")
 
                 requirement_node_dict = {
@@ -533,40 +615,34 @@ class LibraryUpdater:
                     if k not in ["urn", "depth", "reference_controls", "threats"]
                 }
                 requirement_node_dict["order_id"] = order_id
-                order_id += 1
                 all_fields_to_update.update(requirement_node_dict.keys())
 
-                if urn in existing_requirement_node_objects:
-                    requirement_node_object = existing_requirement_node_objects[urn]
+                if node_urn in existing_requirement_node_objects:
+                    requirement_node_object = existing_requirement_node_objects[
+                        node_urn
+                    ]
                     for key, value in requirement_node_dict.items():
                         setattr(requirement_node_object, key, value)
+                    # bulk_update() does not set auto_now fields, and updated_at
+                    # keys the cache of translated fields
+                    requirement_node_object.updated_at = updated_at
                     requirement_node_objects_to_update.append(requirement_node_object)
                 else:
-                    requirement_node_object = RequirementNode.objects.create(
-                        urn=urn,
+                    requirement_node_object = RequirementNode(
+                        urn=node_urn,
                         framework=new_framework,
+                        folder_id=root_folder_id,
                         **self.referential_object_dict,
                         **requirement_node_dict,
                     )
-                    for ca in compliance_assessments:
-                        requirement_assessment_objects_to_create.append(
-                            RequirementAssessment(
-                                compliance_assessment=ca,
-                                requirement=requirement_node_object,
-                                folder=ca.perimeter.folder,
-                                answers=transform_questions_to_answers(questions)
-                                if questions
-                                else {},
-                            )
-                        )
+                    requirement_node_objects_to_create.append(requirement_node_object)
 
                 # update anwsers for each ra for the current requirement_node, when relevant
-                for ra in existing_requirement_assessment_objects.get(urn, []):
+                for ra in existing_requirement_assessment_objects.get(node_urn, []):
                     if not questions:
-                        requirement_assessment_objects_to_update.append(ra)
                         continue
 
-                    answers = ra.answers or {}
+                    answers = {**(ra.answers or {})}
 
                     # Remove answers corresponding to questions that have been removed
                     for urn in list(answers.keys()):
@@ -632,37 +708,39 @@ class LibraryUpdater:
                                 except Exception:
                                     answers[urn] = None
 
-                    ra.answers = answers
-                    requirement_assessment_objects_to_update.append(ra)
+                    if answers != ra.answers:
+                        ra.answers = answers
+                        requirement_assessment_objects_to_update.append(ra)
 
-                # update threats linked to the requirement_node
+                # update threats and reference_controls linked to the requirement_node
                 for threat_urn in requirement_node.get("threats", []):
-                    normalized_threat_urn = threat_urn.lower()
-                    threat_object = (
-                        objects_tracked.get(normalized_threat_urn)
-                        or Threat.objects.filter(urn=normalized_threat_urn).first()
-                    )
-                    if threat_object:
-                        requirement_node_object.threats.add(threat_object)
-
-                # update reference_controls linked to the requirement_node
+                    if threat_id := threat_ids.get(threat_urn.lower()):
+                        threat_links.append(
+                            RequirementNode.threats.through(
+                                requirementnode_id=requirement_node_object.id,
+                                threat_id=threat_id,
+                            )
+                        )
                 for rc_urn in requirement_node.get("reference_controls", []):
-                    normalized_rc_urn = rc_urn.lower()
-                    rc_object = (
-                        objects_tracked.get(normalized_rc_urn)
-                        or ReferenceControl.objects.filter(
-                            urn=normalized_rc_urn
-                        ).first()
-                    )
-                    if rc_object:
-                        requirement_node_object.reference_controls.add(rc_object)
+                    if rc_id := reference_control_ids.get(rc_urn.lower()):
+                        reference_control_links.append(
+                            RequirementNode.reference_controls.through(
+                                requirementnode_id=requirement_node_object.id,
+                                referencecontrol_id=rc_id,
+                            )
+                        )
+
+            if requirement_node_objects_to_create:
+                RequirementNode.objects.bulk_create(
+                    requirement_node_objects_to_create, batch_size=200
+                )
 
             # Fix for the dual bulk_update issue - consolidate into one update
             if requirement_node_objects_to_update:
                 # Ensure all needed fields are included
                 fields_to_update = sorted(
                     all_fields_to_update.union(
-                        {"name", "description", "order_id", "questions"}
+                        {"name", "description", "order_id", "questions", "updated_at"}
                     )
                 )
                 RequirementNode.objects.bulk_update(
@@ -671,6 +749,14 @@ class LibraryUpdater:
                     batch_size=200,
                 )
 
+            # Links are only added, existing links are kept
+            RequirementNode.threats.through.objects.bulk_create(
+                threat_links, batch_size=500, ignore_conflicts=True
+            )
+            RequirementNode.reference_controls.through.objects.bulk_create(
+                reference_control_links, batch_size=500, ignore_conflicts=True
+            )
+
             if requirement_assessment_objects_to_update:
                 RequirementAssessment.objects.bulk_update(
                     requirement_assessment_objects_to_update,
@@ -678,11 +764,52 @@ class LibraryUpdater:
                     batch_size=100,
                 )
 
+            # Create the requirement assessments missing from the compliance assessments
+            existing_requirement_assessments = set(
+                RequirementAssessment.objects.filter(
+                    compliance_assessment__in=compliance_assessments
+                ).values_list("compliance_assessment_id", "requirement_id")
+            )
+            requirement_assessment_objects_to_create = [
+                RequirementAssessment(
+                    compliance_assessment=ca,
+                    requirement=requirement_node_object,
+                    folder_id=ca.perimeter.folder_id,
+                    answers=transform_questions_to_answers(
+                        requirement_node_object.questions
+                    )
+                    if requirement_node_object.questions
+                    else {},
+                )
+                for requirement_node_object in (
+                    requirement_node_objects_to_update
+                    + requirement_node_objects_to_create
+                )
+                for ca in compliance_assessments
+                if (ca.id, requirement_node_object.id)
+                not in existing_requirement_assessments
+            ]
             if requirement_assessment_objects_to_create:
                 RequirementAssessment.objects.bulk_create(
                     requirement_assessment_objects_to_create, batch_size=100
                 )
 
+            counts["created_requirement_nodes"] += len(
+                requirement_node_objects_to_create
+            )
+            counts["updated_requirement_nodes"] += len(
+                requirement_node_objects_to_update
+            )
+            counts["created_requirement_assessments"] += len(
+                requirement_assessment_objects_to_create
+            )
+            counts["updated_requirement_assessments"] += len(
+                requirement_assessment_objects_to_update
+            )
+
+        logger.info("Frameworks updated", library=self.old_library.urn, **counts)
+        return counts
+
     def update_risk_matrices(self):
         for matrix in self.new_matrices:
             json_definition_keys = {
@@ -746,7 +873,9 @@ class LibraryUpdater:
                 return "invalidLibraryUpdate"
 
             queryset.update(
-                **self.referential_object_dict, **requirement_mapping_set_dict
+                **self.referential_object_dict,
+                **requirement_mapping_set_dict,
+                updated_at=now(),
             )
 
             # Delete existing RequirementMapping objects for the given mapping_set
@@ -868,26 +997,26 @@ class LoadedLibrary(LibraryMixin):
     def _objects(self):
         res = {}
         if self.frameworks.count() > 0:
-            res["framework"] = update_translations_in_object(
-                model_to_dict(self.frameworks.first())
-            )
+            res["framework"] = translate_object(model_to_dict(self.frameworks.first()))
             res["framework"].update(self.frameworks.first().library_entry)
         if self.threats.count() > 0:
             res["threats"] = [
-                update_translations_in_object(model_to_dict(threat))
-                for threat in self.threats.all()
+                translate_object(model_to_dict(threat)) for threat in self.threats.all()
             ]
         if self.reference_controls.count() > 0:
             res["reference_controls"] = [
-                update_translations_in_object(model_to_dict(reference_control))
+                translate_object(model_to_dict(reference_control))
                 for reference_control in self.reference_controls.all()
             ]
         if self.risk_matrices.count() > 0:
             matrix = self.risk_matrices.first()
-            res["risk_matrix"] = update_translations_in_object(model_to_dict(matrix))
-            res["risk_matrix"]["probability"] = update_translations(matrix.probability)
-            res["risk_matrix"]["impact"] = update_translations(matrix.impact)
-            res["risk_matrix"]["risk"] = update_translations(matrix.risk)
+            res["risk_matrix"] = translate_object(model_to_dict(matrix))
+            translated_definition = matrix.parse_json_translated()
+            res["risk_matrix"]["probability"] = list(
+                translated_definition["probability"]
+            )
+            res["risk_matrix"]["impact"] = list(translated_definition["impact"])
+            res["risk_matrix"]["risk"] = list(translated_definition["risk"])
             res["risk_matrix"]["grid"] = matrix.grid
             res["strength_of_knowledge"] = matrix.strength_of_knowledge
             res["risk_matrix"] = [res["risk_matrix"]]
@@ -1093,6 +1222,11 @@ class RiskMatrix(ReferentialObjectMixin, I18nObjectMixin):
         ),
     )
 
+    # (updated_at, translated JSON definition), keyed by (id, language). A matrix
+    # updated by another process replaces its entry when its new version is translated
+    _translated_definitions: dict[tuple, tuple] = {}
+    TRANSLATED_DEFINITIONS_CACHE_SIZE = 1000
+
     @property
     def is_used(self) -> bool:
         return RiskAssessment.objects.filter(risk_matrix=self).exists()
@@ -1109,7 +1243,47 @@ class RiskMatrix(ReferentialObjectMixin, I18nObjectMixin):
         return self.json_definition
 
     def parse_json_translated(self) -> dict:
-        return update_translations_in_object(self.json_definition)
+        """
+        Get the JSON definition translated in the current language. It is cached for the
+        process and shared by all callers, so it must not be modified: its probability,
+        impact, risk and grid arrays are tuples.
+        """
+        key = (self.id, get_language())
+        cached = RiskMatrix._translated_definitions.get(key)
+        if cached is not None and cached[0] == self.updated_at:
+            return cached[1]
+        translated = translate_object(self.json_definition)
+        for array in ("probability", "impact", "risk"):
+            if array in translated:
+                translated[array] = tuple(translated[array])
+        if "grid" in translated:
+            translated["grid"] = tuple(tuple(row) for row in translated["grid"])
+        if not self._state.adding:
+            # Matrices deleted by other processes are only forgotten when the cache is full
+            if (
+                key not in RiskMatrix._translated_definitions
+                and len(RiskMatrix._translated_definitions)
+                >= RiskMatrix.TRANSLATED_DEFINITIONS_CACHE_SIZE
+            ):
+                RiskMatrix._translated_definitions.clear()
+            RiskMatrix._translated_definitions[key] = (self.updated_at, translated)
+        return translated
+
+    @classmethod
+    def clear_translated_definitions(cls, matrix_id=None) -> None:
+        cls._translated_definitions = {
+            key: translated
+            for key, translated in cls._translated_definitions.items()
+            if matrix_id is not None and key[0] != matrix_id
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        RiskMatrix.clear_translated_definitions(self.id)
+
+    def delete(self, *args, **kwargs):
+        RiskMatrix.clear_translated_definitions(self.id)
+        return super().delete(*args, **kwargs)
 
     @property
     def grid(self) -> list:
@@ -2885,6 +3059,33 @@ class HistoricalMetric(models.Model):
             defaults={"data": data},
         )
 
+    @classmethod
+    def schedule_daily_metric(cls, instance):
+        """
+        Defer instance.upsert_daily_metrics() until the current transaction commits.
+        Repeated calls for the same object within a transaction are coalesced into
+        a single recomputation, so bulk edits only pay for it once.
+        """
+        key = (instance._meta.label, instance.pk)
+        connection = transaction.get_connection()
+        # Scheduled keys are tracked per connection. Only weak references to the
+        # callbacks are kept: Django drops the callbacks of rolled back transactions
+        # and savepoints, which releases their keys along with them.
+        pending = getattr(connection, "pending_daily_metrics", None)
+        if pending is None:
+            pending = connection.pending_daily_metrics = WeakValueDictionary()
+        if key in pending:
+            return
+
+        def upsert():
+            pending.pop(key, None)
+            obj = instance.__class__.objects.filter(pk=instance.pk).first()
+            if obj is not None:
+                obj.upsert_daily_metrics()
+
+        pending[key] = upsert
+        transaction.on_commit(upsert)
+
 
 ########################### Secondary objects #########################
 
@@ -2939,7 +3140,7 @@ class Assessment(NameDescriptionMixin, ETADueDateMixin, FolderMixin):
         abstract = True
 
     def save(self, *args, **kwargs) -> None:
-        if not self.folder or self.folder == Folder.get_root_folder():
+        if not self.folder_id or self.folder_id == Folder.get_root_folder_id():
             self.folder = self.perimeter.folder
         return super().save(*args, **kwargs)
 
@@ -2997,7 +3198,7 @@ class RiskAssessment(Assessment):
 
     def save(self, *args, **kwargs) -> None:
         super().save(*args, **kwargs)
-        self.upsert_daily_metrics()
+        HistoricalMetric.schedule_daily_metric(self)
 
     @property
     def path_display(self) -> str:
@@ -3483,12 +3684,10 @@ class RiskScenario(NameDescriptionMixin):
                 "value": -1,
             }
         risk_matrix = self.get_matrix()
-        current_risk = {
+        return {
             **risk_matrix["risk"][self.current_level],
             "value": self.current_level,
         }
-        update_translations_in_object(current_risk)
-        return current_risk
 
     def get_current_impact(self):
         if self.current_impact < 0:
@@ -3528,12 +3727,10 @@ class RiskScenario(NameDescriptionMixin):
                 "value": -1,
             }
         risk_matrix = self.get_matrix()
-        residual_risk = {
+        return {
             **risk_matrix["risk"][self.residual_level],
             "value": self.residual_level,
         }
-        update_translations_in_object(residual_risk)
-        return residual_risk
 
     def get_residual_impact(self):
         if self.residual_impact < 0:
@@ -3589,7 +3786,7 @@ class RiskScenario(NameDescriptionMixin):
         else:
             self.residual_level = -1
         super(RiskScenario, self).save(*args, **kwargs)
-        self.risk_assessment.upsert_daily_metrics()
+        HistoricalMetric.schedule_daily_metric(self.risk_assessment)
 
 
 class ComplianceAssessment(Assessment):
@@ -3628,6 +3825,10 @@ class ComplianceAssessment(Assessment):
 
     fields_to_check = ["name", "version"]
 
+    # Aggregates memoized by get_summary() and get_questions_summary()
+    _summary = None
+    _questions_summary = None
+
     class Meta:
         verbose_name = _("Compliance assessment")
         verbose_name_plural = _("Compliance assessments")
@@ -3640,7 +3841,7 @@ class ComplianceAssessment(Assessment):
 
         for item in self.get_requirements_result_count():
             per_result[item[1]] = item[0]
-        total = RequirementAssessment.objects.filter(compliance_assessment=self).count()
+        total = sum(per_status.values())
         data = {
             "reqs": {
                 "total": total,
@@ -3661,7 +3862,8 @@ class ComplianceAssessment(Assessment):
             self.max_score = self.framework.max_score
             self.scores_definition = self.framework.scores_definition
         super().save(*args, **kwargs)
-        self.upsert_daily_metrics()
+        self.invalidate_summary()
+        HistoricalMetric.schedule_daily_metric(self)
 
     def create_requirement_assessments(
         self, baseline: Self | None = None
@@ -3748,6 +3950,7 @@ class ComplianceAssessment(Assessment):
                 assessment.evidences.set(evidences)
                 assessment.applied_controls.set(controls)
 
+        self.invalidate_summary()
         return created_assessments
 
     def sync_to_applied_controls(self, dry_run=True):
@@ -3801,40 +4004,167 @@ class ComplianceAssessment(Assessment):
                     if not dry_run:
                         ra.result = new_result
                         ra.save(update_fields=["result"])
+        if not dry_run:
+            self.invalidate_summary()
 
         ic(changes)
 
         if dry_run:
             return changes
 
-    def get_global_score(self):
-        requirement_assessments_scored = (
-            RequirementAssessment.objects.filter(compliance_assessment=self)
-            .exclude(status=RequirementAssessment.Result.NOT_APPLICABLE)
-            .exclude(is_scored=False)
-            .exclude(requirement__assessable=False)
+    def get_implementation_groups_filter(self) -> Q:
+        """
+        Returns a Q object restricting requirement assessments to the selected implementation groups.
+        JSON containment is used where the database supports it, otherwise the matching
+        requirement nodes are resolved upfront.
+        """
+        if not self.selected_implementation_groups:
+            return Q()
+        if connection.features.supports_json_field_contains:
+            implementation_groups_filter = Q()
+            for group in self.selected_implementation_groups:
+                implementation_groups_filter |= Q(
+                    requirement__implementation_groups__contains=[group]
+                )
+            return implementation_groups_filter
+        selected_implementation_groups_set = set(self.selected_implementation_groups)
+        return Q(
+            requirement__in=[
+                node_id
+                for node_id, implementation_groups in RequirementNode.objects.filter(
+                    framework=self.framework_id
+                ).values_list("id", "implementation_groups")
+                if selected_implementation_groups_set & set(implementation_groups or [])
+            ]
         )
-        ig = (
-            set(self.selected_implementation_groups)
-            if self.selected_implementation_groups
-            else None
+
+    def get_summary(self) -> dict:
+        """
+        Returns the status and result counts, progress and global score of the assessment,
+        aggregated in a single query. The summary is kept on the instance until
+        invalidate_summary() is called, which happens whenever one of its requirement
+        assessments is saved, and after the bulk updates of its requirement assessments.
+        """
+        if self._summary is not None:
+            return self._summary
+
+        in_scope = (
+            Q(requirement__assessable=True) & self.get_implementation_groups_filter()
         )
-        score = 0
-        n = 0
-
-        for ras in requirement_assessments_scored:
-            if not (ig) or (ig & set(ras.requirement.implementation_groups or [])):
-                score += ras.score or 0
-                n += 1
-                if self.show_documentation_score:
-                    score += ras.documentation_score or 0
-                    n += 1
-        if n > 0:
-            global_score = score / n
-            # We use this instead of using the python round function so that the python backend outputs the same result as the javascript frontend.
-            return int(global_score * 10) / 10
-        else:
-            return -1
+        scored = (
+            in_scope
+            & Q(is_scored=True)
+            & ~Q(status=RequirementAssessment.Result.NOT_APPLICABLE)
+        )
+        aggregates = {
+            f"status_{st}": Count("id", filter=Q(status=st))
+            for st in RequirementAssessment.Status
+        }
+        aggregates |= {
+            f"result_{rs}": Count("id", filter=in_scope & Q(result=rs))
+            for rs in RequirementAssessment.Result
+        }
+        aggregates["scored_count"] = Count("id", filter=scored)
+        aggregates["score_sum"] = Sum("score", filter=scored, default=0)
+        aggregates["documentation_score_sum"] = Sum(
+            "documentation_score", filter=scored, default=0
+        )
+        counts = RequirementAssessment.objects.filter(
+            compliance_assessment=self
+        ).aggregate(**aggregates)
+
+        result_count = [
+            (counts[f"result_{rs}"], rs) for rs in RequirementAssessment.Result
+        ]
+        total = sum(count for count, _ in result_count)
+        assessed = total - counts[f"result_{RequirementAssessment.Result.NOT_ASSESSED}"]
+
+        score = counts["score_sum"]
+        n = counts["scored_count"]
+        if self.show_documentation_score:
+            score += counts["documentation_score_sum"]
+            n *= 2
+        # We use this instead of using the python round function so that the python backend outputs the same result as the javascript frontend.
+        global_score = int(score / n * 10) / 10 if n > 0 else -1
+
+        self._summary = {
+            "status_count": [
+                (counts[f"status_{st}"], st) for st in RequirementAssessment.Status
+            ],
+            "result_count": result_count,
+            "progress": int((assessed / total) * 100) if total > 0 else 0,
+            "global_score": global_score,
+        }
+        return self._summary
+
+    def invalidate_summary(self) -> None:
+        self._summary = None
+        self._questions_summary = None
+
+    def get_questions_summary(self) -> tuple[int, int]:
+        """
+        Returns the number of questions and answered questions of the in-scope requirement
+        assessments. Answers live in JSON objects, so they are counted from a single
+        narrow query rather than aggregated in SQL.
+        """
+        if self._questions_summary is not None:
+            return self._questions_summary
+
+        total_questions_count = 0
+        answered_questions_count = 0
+        for questions, answers in RequirementAssessment.objects.filter(
+            self.get_implementation_groups_filter(),
+            compliance_assessment=self,
+            requirement__assessable=True,
+            requirement__questions__isnull=False,
+        ).values_list("requirement__questions", "answers"):
+            # if it has question set it should count
+            if questions:
+                total_questions_count += len(questions)
+                if answers:
+                    answered_questions_count += sum(
+                        1 for answer in answers.values() if answer
+                    )
+
+        self._questions_summary = (total_questions_count, answered_questions_count)
+        return self._questions_summary
+
+    @staticmethod
+    def get_results_per_assessment(compliance_assessments) -> dict:
+        """
+        Returns the result counts of the assessable requirement assessments of several
+        compliance assessments, honoring their selected implementation groups, in a single
+        grouped query: {compliance_assessment_id: {result: count}}
+        """
+        results = defaultdict(
+            lambda: {rs.value: 0 for rs in RequirementAssessment.Result}
+        )
+        for row in (
+            RequirementAssessment.objects.filter(
+                compliance_assessment__in=compliance_assessments,
+                requirement__assessable=True,
+            )
+            .values(
+                "compliance_assessment",
+                "compliance_assessment__selected_implementation_groups",
+                "requirement__implementation_groups",
+                "result",
+            )
+            .annotate(total=Count("id"))
+            .order_by()
+        ):
+            selected_implementation_groups = row[
+                "compliance_assessment__selected_implementation_groups"
+            ]
+            if selected_implementation_groups and not set(
+                selected_implementation_groups
+            ) & set(row["requirement__implementation_groups"] or []):
+                continue
+            results[row["compliance_assessment"]][row["result"]] += row["total"]
+        return results
+
+    def get_global_score(self):
+        return self.get_summary()["global_score"]
 
     def get_selected_implementation_groups(self):
         framework = self.framework
@@ -3963,46 +4293,10 @@ class ComplianceAssessment(Assessment):
         }
 
     def get_requirements_status_count(self):
-        requirements_status_count = []
-        for st in RequirementAssessment.Status:
-            requirements_status_count.append(
-                (
-                    RequirementAssessment.objects.filter(status=st)
-                    .filter(compliance_assessment=self)
-                    .count(),
-                    st,
-                )
-            )
-        return requirements_status_count
+        return self.get_summary()["status_count"]
 
     def get_requirements_result_count(self):
-        requirements_result_count = []
-        selected_implementation_groups_set = (
-            set(self.selected_implementation_groups)
-            if self.selected_implementation_groups
-            else None
-        )
-
-        requirements = RequirementAssessment.objects.filter(
-            compliance_assessment=self, requirement__assessable=True
-        ).select_related("requirement")
-
-        if selected_implementation_groups_set is not None:
-            result_groups = {}
-            for req in requirements:
-                req_groups = set(req.requirement.implementation_groups or [])
-                if selected_implementation_groups_set & req_groups:
-                    result_groups.setdefault(req.result, []).append(req)
-
-            for rs in RequirementAssessment.Result:
-                count = len(result_groups.get(rs, []))
-                requirements_result_count.append((count, rs))
-        else:
-            for rs in RequirementAssessment.Result:
-                count = requirements.filter(result=rs).count()
-                requirements_result_count.append((count, rs))
-
-        return requirements_result_count
+        return self.get_summary()["result_count"]
 
     def get_measures_status_count(self):
         measures_status_count = []
@@ -4234,6 +4528,8 @@ class ComplianceAssessment(Assessment):
         self, mapping_set: RequirementMappingSet, source_assessment: Self
     ) -> list["RequirementAssessment"]:
         requirement_assessments: list[RequirementAssessment] = []
+        # (previous, current) states of the updated requirement assessments, for the audit log
+        changes = []
         result_order = (
             RequirementAssessment.Result.NOT_ASSESSED,
             RequirementAssessment.Result.NOT_APPLICABLE,
@@ -4252,26 +4548,43 @@ class ComplianceAssessment(Assessment):
                 if value is not None:
                     setattr(target, key, value)
 
-        for requirement_assessment in self.requirement_assessments.all():
-            mappings = mapping_set.mappings.filter(
-                target_requirement=requirement_assessment.requirement
+        # Preload the mapping set and the source assessment once, then infer in memory
+        mappings_per_target = defaultdict(list)
+        for mapping in mapping_set.mappings.all():
+            mappings_per_target[mapping.target_requirement_id].append(mapping)
+        source_requirement_assessments = {
+            ra.requirement_id: ra
+            for ra in source_assessment.requirement_assessments.select_related(
+                "requirement"
+            )
+        }
+
+        # The requirement is used to describe the assessment in the audit log
+        for requirement_assessment in self.requirement_assessments.select_related(
+            "requirement"
+        ):
+            mappings = mappings_per_target.get(
+                requirement_assessment.requirement_id, []
             )
             inferences = []
             refs = []
 
             # Filter for full coverage relationships if applicable
-            if mappings.filter(
-                relationship__in=RequirementMapping.FULL_COVERAGE_RELATIONSHIPS
-            ).exists():
-                mappings = mappings.filter(
-                    relationship__in=RequirementMapping.FULL_COVERAGE_RELATIONSHIPS
-                )
+            full_coverage_mappings = [
+                mapping
+                for mapping in mappings
+                if mapping.relationship
+                in RequirementMapping.FULL_COVERAGE_RELATIONSHIPS
+            ]
+            if full_coverage_mappings:
+                mappings = full_coverage_mappings
 
             for mapping in mappings:
-                source_requirement_assessment = RequirementAssessment.objects.get(
-                    compliance_assessment=source_assessment,
-                    requirement=mapping.source_requirement,
+                source_requirement_assessment = source_requirement_assessments.get(
+                    mapping.source_requirement_id
                 )
+                if source_requirement_assessment is None:
+                    continue
                 inferred_result = requirement_assessment.infer_result(
                     mapping=mapping,
                     source_requirement_assessment=source_requirement_assessment,
@@ -4298,6 +4611,7 @@ class ComplianceAssessment(Assessment):
                     )
                     ref = refs[inferences.index(selected_inference)]
 
+                previous = copy.copy(requirement_assessment)
                 assign_attributes(requirement_assessment, selected_inference)
                 requirement_assessment.mapping_inference = {
                     "result": requirement_assessment.result,
@@ -4310,41 +4624,36 @@ class ComplianceAssessment(Assessment):
                     },
                     # "mappings": [mapping.id for mapping in mappings],
                 }
-                requirement_assessment.save()
+                requirement_assessment.updated_at = now()
                 requirement_assessments.append(requirement_assessment)
+                changes.append((previous, requirement_assessment))
+
+        RequirementAssessment.objects.bulk_update(
+            requirement_assessments,
+            [
+                "result",
+                "status",
+                "score",
+                "is_scored",
+                "observation",
+                "mapping_inference",
+                "updated_at",
+            ],
+            batch_size=500,
+        )
+        # bulk_update() bypasses the auditlog signals
+        log_bulk_changes(changes)
+        self.invalidate_summary()
+        HistoricalMetric.schedule_daily_metric(self)
 
         return requirement_assessments
 
     def get_progress(self) -> int:
-        requirement_assessments = list(
-            self.get_requirement_assessments(include_non_assessable=False)
-        )
-        total_cnt = len(requirement_assessments)
-        assessed_cnt = len(
-            [
-                r
-                for r in requirement_assessments
-                if r.result != RequirementAssessment.Result.NOT_ASSESSED
-            ]
-        )
-        return int((assessed_cnt / total_cnt) * 100) if total_cnt > 0 else 0
+        return self.get_summary()["progress"]
 
     @property
     def answers_progress(self) -> int:
-        requirement_assessments = self.get_requirement_assessments(
-            include_non_assessable=False
-        )
-        total_questions_count = 0
-        answered_questions_count = 0
-        for ra in requirement_assessments:
-            # if it has question set it should count
-            if ra.requirement.questions:
-                total_questions_count += len(ra.requirement.questions)
-                answers = ra.answers
-                if answers:
-                    for answer in answers.values():
-                        answered_questions_count += 1 if answer else 0
-
+        total_questions_count, answered_questions_count = self.get_questions_summary()
         if total_questions_count > 0:
             return int((answered_questions_count / total_questions_count) * 100)
         else:
@@ -4352,13 +4661,8 @@ class ComplianceAssessment(Assessment):
 
     @property
     def has_questions(self) -> bool:
-        requirement_assessments = self.get_requirement_assessments(
-            include_non_assessable=False
-        )
-        for ra in requirement_assessments:
-            if ra.requirement.questions:
-                return True
-        return False
+        total_questions_count, _ = self.get_questions_summary()
+        return total_questions_count > 0
 
 
 class RequirementAssessment(AbstractBaseModel, FolderMixin, ETADueDateMixin):
@@ -4532,7 +4836,8 @@ class RequirementAssessment(AbstractBaseModel, FolderMixin, ETADueDateMixin):
 
     def save(self, *args, **kwargs) -> None:
         super().save(*args, **kwargs)
-        self.compliance_assessment.upsert_daily_metrics()
+        self.compliance_assessment.invalidate_summary()
+        HistoricalMetric.schedule_daily_metric(self.compliance_assessment)
 
 
 class FindingsAssessment(Assessment):
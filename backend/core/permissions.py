@@ -3,7 +3,7 @@ from rest_framework.request import Request
 from django.contrib.auth import get_user_model
 from .utils import RoleCodename
 
-from iam.models import RoleAssignment, Folder, Permission, Role
+from iam.models import RoleAssignment, Folder, PermissionRegistry, Role
 
 User = get_user_model()
 
@@ -33,6 +33,8 @@ class RBACPermissions(permissions.DjangoObjectPermissions):
         if not perms:
             return False
         _codename = perms[0].split(".")[1]
+        # permissions of the object model are looked up by model, overrides by codename
+        model = type(obj)
         if request.method in ["GET", "OPTIONS", "HEAD"] and getattr(
             obj, "is_published", False
         ):
@@ -43,9 +45,11 @@ class RBACPermissions(permissions.DjangoObjectPermissions):
 
         if current_action:
             permission_overrides = getattr(view, "permission_overrides", {})
-            _codename = permission_overrides.get(current_action, _codename)
+            if current_action in permission_overrides:
+                _codename = permission_overrides[current_action]
+                model = None
 
-        perm = Permission.objects.get(codename=_codename)
+        perm = PermissionRegistry.get(_codename, model)
 
         return RoleAssignment.is_access_allowed(
             user=request.user,
@@ -0,0 +1,179 @@
+"""
+Plan the select_related/prefetch_related calls needed to serialize a queryset.
+
+The relational fields of a serializer, the dotted sources of its fields, the
+sub-fields of its FieldsRelatedField and its related_lookups attribute are
+introspected once per serializer class, so that serializing a page of objects
+does not run queries per object and per relation.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+import structlog
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+
+from core.serializer_fields import FieldsRelatedField
+
+logger = structlog.get_logger(__name__)
+
+
+class QuerysetPlan(NamedTuple):
+    select_related: tuple[str, ...]
+    prefetch_related: tuple[str, ...]
+
+
+class _Relation(NamedTuple):
+    model: type[models.Model]
+    path: str
+    many: bool
+
+
+class _Planner:
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = set()
+
+    def follow(
+        self,
+        model: type[models.Model],
+        attrs: list[str],
+        path: str = "",
+        many: bool = False,
+        single_only: bool = False,
+    ) -> _Relation | None:
+        """
+        Add the lookups following the relations named by attrs from model, stopping at
+        the first attribute which is not a relation (a property, a method, a column...).
+        Relations reached through a multi-valued relation are prefetched, the others
+        are selected. Return the last relation followed.
+        """
+        relation = None
+        for attr in attrs:
+            try:
+                field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation:
+                break
+            field_many = field.many_to_many or field.one_to_many
+            if single_only and field_many:
+                break
+            path = f"{path}__{attr}" if path else attr
+            if isinstance(field, GenericForeignKey):
+                # Generic relations can only be prefetched, and have no model to follow
+                self.prefetch_related.add(path)
+                break
+            many = many or field_many
+            (self.prefetch_related if many else self.select_related).add(path)
+            model = field.related_model
+            relation = _Relation(model, path, many)
+        return relation
+
+    def add_serializer(
+        self,
+        model: type[models.Model],
+        serializer: serializers.BaseSerializer,
+        path: str = "",
+        many: bool = False,
+    ):
+        for field in serializer.fields.values():
+            if not field.write_only:
+                self.add_field(model, field, path, many)
+        # Relations read by model methods and properties cannot be introspected, so
+        # serializers using them can list them in a related_lookups attribute
+        for lookup in getattr(serializer, "related_lookups", ()):
+            self.follow(model, lookup.split("__"), path, many)
+
+    def add_field(
+        self,
+        model: type[models.Model],
+        field: serializers.Field,
+        path: str,
+        many: bool,
+    ):
+        source_attrs = field.source_attrs
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+        if isinstance(field, serializers.BaseSerializer):
+            if relation := self.follow(model, source_attrs, path, many):
+                self.add_serializer(relation.model, field, relation.path, relation.many)
+            return
+        related_field = (
+            field.child_relation
+            if isinstance(field, serializers.ManyRelatedField)
+            else field
+        )
+        if (
+            related_field is field
+            and isinstance(field, serializers.RelatedField)
+            and field.use_pk_only_optimization()
+        ):
+            # The primary key is read from the foreign key column of the parent object
+            source_attrs = source_attrs[:-1]
+        relation = self.follow(model, source_attrs, path, many)
+        if relation and isinstance(related_field, FieldsRelatedField):
+            self.add_related_fields(relation, related_field.fields)
+
+    def add_related_fields(self, relation: _Relation, fields: list):
+        """Add the related objects represented by the sub-fields of a FieldsRelatedField."""
+        for field in fields:
+            if isinstance(field, dict):
+                field_name, sub_fields = next(iter(field.items()))
+            elif isinstance(field, str):
+                field_name, sub_fields = field, None
+            else:
+                continue
+            sub_relation = self.follow(
+                relation.model,
+                [field_name],
+                relation.path,
+                relation.many,
+                single_only=True,
+            )
+            if sub_relation and sub_fields:
+                self.add_related_fields(sub_relation, sub_fields)
+
+
+@lru_cache(maxsize=None)
+def get_queryset_plan(
+    model: type[models.Model], serializer_class: type[serializers.BaseSerializer]
+) -> QuerysetPlan:
+    """Get the lookups needed to serialize objects of model with serializer_class."""
+    planner = _Planner()
+    try:
+        planner.add_serializer(model, serializer_class())
+    except Exception as e:
+        # Serializers which cannot be introspected are simply not optimized
+        logger.warning(
+            "Could not plan queryset", serializer_class=serializer_class, error=e
+        )
+        return QuerysetPlan((), ())
+    return QuerysetPlan(
+        tuple(sorted(planner.select_related)), tuple(sorted(planner.prefetch_related))
+    )
+
+
+def optimize_queryset(
+    queryset: models.QuerySet, serializer_class: type[serializers.BaseSerializer]
+) -> models.QuerySet:
+    """
+    Add to a queryset the select_related and prefetch_related calls needed by the
+    fields of serializer_class, so that serializing it does not run one query per
+    relation and per object.
+    """
+    if (
+        not isinstance(queryset, models.QuerySet)
+        or queryset._fields is not None  # values() querysets
+        or queryset.query.combinator  # union(), intersection()...
+    ):
+        return queryset
+    plan = get_queryset_plan(queryset.model, serializer_class)
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    if plan.prefetch_related:
+        queryset = queryset.prefetch_related(*plan.prefetch_related)
+    return queryset
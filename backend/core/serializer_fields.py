@@ -1,3 +1,4 @@
+from functools import lru_cache
 from hashlib import sha256
 from typing import Any
 
@@ -7,18 +8,30 @@ from rest_framework import serializers
 from iam.models import Folder
 
 
+@lru_cache(maxsize=8192)
+def hash_value(value) -> str:
+    """
+    Hash a value (typically a primary key) into the short identifier used in exports.
+    The same objects are referenced many times in an export, so hashes are cached.
+    """
+    return sha256(str(value).encode()).hexdigest()[:12]
+
+
 class HashSlugRelatedField(serializers.SlugRelatedField):
     """
     A custom SlugRelatedField that hashes the slug value during serialization.
     """
 
+    def use_pk_only_optimization(self):
+        # The primary key is read from the foreign key column, without fetching the object
+        return self.slug_field == "pk"
+
     def to_representation(self, obj):
         # Get the original slug value
         value = super().to_representation(obj)
         if value is None:
             return None
-        # Hash the value
-        return sha256(str(value).encode()).hexdigest()[:12]
+        return hash_value(value)
 
 
 class FieldsRelatedField(serializers.RelatedField):
@@ -42,7 +55,7 @@ class FieldsRelatedField(serializers.RelatedField):
     ) -> dict[str, Any]:
         res = {"str": str(value)}
 
-        if value == Folder.get_root_folder():
+        if isinstance(value, Folder) and value.id == Folder.get_root_folder_id():
             res.update({"id": value.id})
             return res
 
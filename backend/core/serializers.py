@@ -2,6 +2,7 @@ import importlib
 from typing import Any
 
 import structlog
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -25,11 +26,51 @@ class SerializerFactory:
 
     Attributes:
     modules (list): List of module names to search for the serializer.
+    registry (dict): Serializer classes by name, later modules taking precedence.
     """
 
+    _registries: dict[tuple[str, ...], dict[str, type]] = {}
+
     def __init__(self, *modules: str):
         # Reverse to prioritize later modules
         self.modules = list(reversed(modules))
+        self.registry = self.get_registry(tuple(modules))
+
+    @classmethod
+    def for_module(cls, serializers_module: str) -> "SerializerFactory":
+        """
+        Get the factory of a viewset serializers module, followed by the serializers
+        modules of settings.MODULE_PATHS (enterprise overrides).
+        """
+        module_paths = settings.MODULE_PATHS.get("serializers", [])
+        if isinstance(module_paths, str):
+            module_paths = [module_paths]
+        return cls(serializers_module, *module_paths)
+
+    @classmethod
+    def get_registry(cls, modules: tuple[str, ...]) -> dict[str, type]:
+        """
+        Get the serializer classes defined in modules, keyed by name. Modules are
+        imported once per process, later modules override earlier ones.
+        """
+        registry = cls._registries.get(modules)
+        if registry is None:
+            registry = {}
+            for module_name in modules:
+                try:
+                    serializer_module = importlib.import_module(module_name)
+                except ModuleNotFoundError:
+                    continue
+                registry.update(
+                    {
+                        name: value
+                        for name, value in vars(serializer_module).items()
+                        if isinstance(value, type)
+                        and issubclass(value, serializers.BaseSerializer)
+                    }
+                )
+            cls._registries[modules] = registry
+        return registry
 
     def get_serializer(self, base_name: str, action: str):
         if action in ["list", "retrieve"]:
@@ -42,17 +83,12 @@ class SerializerFactory:
         return self._get_serializer_class(serializer_name)
 
     def _get_serializer_class(self, serializer_name: str):
-        for module_name in self.modules:
-            try:
-                serializer_module = importlib.import_module(module_name)
-                serializer_class = getattr(serializer_module, serializer_name)
-                return serializer_class
-            except (ModuleNotFoundError, AttributeError):
-                continue
-
-        raise ValueError(
-            f"Serializer {serializer_name} not found in any provided modules"
-        )
+        try:
+            return self.registry[serializer_name]
+        except KeyError:
+            raise ValueError(
+                f"Serializer {serializer_name} not found in any provided modules"
+            )
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
@@ -72,8 +108,8 @@ class BaseModelSerializer(serializers.ModelSerializer):
         folder = folder if folder else Folder.get_root_folder()
         can_create_in_folder = RoleAssignment.is_access_allowed(
             user=self.context["request"].user,
-            perm=Permission.objects.get(
-                codename=f"add_{self.Meta.model._meta.model_name}"
+            perm=PermissionRegistry.get(
+                f"add_{self.Meta.model._meta.model_name}", self.Meta.model
             ),
             folder=folder,
         )
@@ -573,6 +609,9 @@ class AppliedControlWriteSerializer(BaseModelSerializer):
 
 
 class AppliedControlReadSerializer(AppliedControlWriteSerializer):
+    # Read by get_ranking_score
+    related_lookups = ["risk_scenarios"]
+
     folder = FieldsRelatedField()
     reference_control = FieldsRelatedField()
     priority = serializers.CharField(source="get_priority_display")
@@ -755,7 +794,7 @@ class UserWriteSerializer(BaseModelSerializer):
         send_mail = EMAIL_HOST or EMAIL_HOST_RESCUE
         if not RoleAssignment.is_access_allowed(
             user=self.context["request"].user,
-            perm=Permission.objects.get(codename="add_user"),
+            perm=PermissionRegistry.get("add_user"),
             folder=Folder.get_root_folder(),
         ):
             raise PermissionDenied(
@@ -1082,6 +1121,9 @@ class ComplianceAssessmentImportExportSerializer(BaseModelSerializer):
 
 class RequirementAssessmentReadSerializer(BaseModelSerializer):
     class FilteredNodeSerializer(RequirementNodeReadSerializer):
+        # Read by associated_reference_controls and associated_threats
+        related_lookups = ["reference_controls", "threats"]
+
         class Meta:
             model = RequirementNode
             fields = [
@@ -4,6 +4,7 @@ from huey.contrib.djhuey import periodic_task, task, db_periodic_task, db_task
 from core.models import AppliedControl
 from django.core.mail import send_mail
 from django.conf import settings
+from django.core.cache import caches
 import logging
 from global_settings.models import GlobalSettings
 
@@ -158,3 +159,18 @@ def auditlog_prune():
         logger.info("Successfully pruned audit logs")
     except Exception as e:
         logger.error(f"Failed to prune the audit logs: {str(e)}")
+
+
+@db_task()
+def refresh_metrics_snapshot_task(name, user_id, folder_id, refreshing_key):
+    from core.helpers import refresh_metrics_snapshot
+    from iam.models import User
+
+    try:
+        refresh_metrics_snapshot(name, User.objects.get(id=user_id), folder_id)
+    except Exception as e:
+        logger.error(f"Failed to refresh the {name} snapshot: {str(e)}")
+    finally:
+        # Release the flag set when the refresh was queued, so that the next
+        # stale read can queue another one even if this refresh failed
+        caches["metrics"].delete(refreshing_key)
@@ -0,0 +1,214 @@
+import io
+import json
+import zipfile
+
+import pytest
+from auditlog.models import LogEntry
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import (
+    AppliedControl,
+    Asset,
+    Evidence,
+    Perimeter,
+    RiskAssessment,
+    RiskMatrix,
+    RiskScenario,
+    Threat,
+    Vulnerability,
+)
+from iam.models import Folder, User, UserGroup
+from serdes.utils import get_domain_export_objects
+
+from .fixtures import *
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create_superuser("admin@tests.com")
+    UserGroup.objects.get(name="BI-UG-ADM").user_set.add(admin)
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+@pytest.fixture
+def domain(risk_matrix_fixture):
+    folder = Folder.objects.create(
+        name="Exported", content_type=Folder.ContentType.DOMAIN
+    )
+    perimeter = Perimeter.objects.create(name="Perimeter", folder=folder)
+    risk_assessment = RiskAssessment.objects.create(
+        name="Risk assessment",
+        perimeter=perimeter,
+        folder=folder,
+        risk_matrix=RiskMatrix.objects.first(),
+    )
+    evidence = Evidence.objects.create(name="Evidence", folder=folder)
+    controls = [
+        AppliedControl.objects.create(name=f"Control {i}", folder=folder)
+        for i in range(3)
+    ]
+    controls[0].evidences.add(evidence)
+    parent_asset = Asset.objects.create(name="Parent asset", folder=folder)
+    asset = Asset.objects.create(name="Asset", folder=folder)
+    asset.parent_assets.add(parent_asset)
+    scenario = RiskScenario.objects.create(
+        name="Scenario", risk_assessment=risk_assessment
+    )
+    scenario.threats.add(Threat.objects.create(name="Threat", folder=folder))
+    scenario.vulnerabilities.add(
+        Vulnerability.objects.create(name="Vulnerability", folder=folder)
+    )
+    scenario.assets.add(asset)
+    scenario.applied_controls.add(controls[0], controls[1])
+    scenario.existing_applied_controls.add(controls[2])
+    return folder
+
+
+def export_domain(client, domain) -> bytes:
+    response = client.get(reverse("folders-export", kwargs={"pk": domain.id}))
+    assert response.status_code == 200
+    return b"".join(response.streaming_content)
+
+
+def import_domain(client, dump: bytes, name: str):
+    return client.post(
+        reverse("folders-import-domain"),
+        data=dump,
+        content_type="application/zip",
+        HTTP_CONTENT_DISPOSITION="attachment; filename=domain.zip",
+        HTTP_X_CISOASSISTANTDOMAINNAME=name,
+    )
+
+
+def edit_dump(dump: bytes, edit) -> bytes:
+    """Return a copy of the dump whose data.json is modified in place by edit"""
+    output = io.BytesIO()
+    with (
+        zipfile.ZipFile(io.BytesIO(dump)) as source,
+        zipfile.ZipFile(output, "w") as target,
+    ):
+        for info in source.infolist():
+            content = source.read(info)
+            if info.filename == "data.json":
+                data = json.loads(content)
+                edit(data)
+                content = json.dumps(data)
+            target.writestr(info, content)
+    return output.getvalue()
+
+
+def names(queryset) -> set[str]:
+    return set(queryset.values_list("name", flat=True))
+
+
+@pytest.mark.django_db
+class TestDomainImport:
+    def test_export_import_roundtrip(self, admin_client, domain):
+        response = import_domain(
+            admin_client, export_domain(admin_client, domain), "Imported"
+        )
+        assert response.status_code == 200, response.data
+
+        imported = Folder.objects.get(name="Imported")
+        assert {
+            model: queryset.count()
+            for model, queryset in get_domain_export_objects(imported).items()
+        } == {
+            model: queryset.count()
+            for model, queryset in get_domain_export_objects(domain).items()
+        }
+
+        # Foreign keys and many-to-many relations point to the imported objects
+        scenario = RiskScenario.objects.get(risk_assessment__folder=imported)
+        assert scenario.risk_assessment.perimeter.folder == imported
+        assert names(scenario.threats.filter(folder=imported)) == {"Threat"}
+        assert names(scenario.vulnerabilities.filter(folder=imported)) == {
+            "Vulnerability"
+        }
+        assert names(scenario.assets.filter(folder=imported)) == {"Asset"}
+        assert names(scenario.applied_controls.filter(folder=imported)) == {
+            "Control 0",
+            "Control 1",
+        }
+        assert names(scenario.existing_applied_controls.filter(folder=imported)) == {
+            "Control 2"
+        }
+        asset = Asset.objects.get(name="Asset", folder=imported)
+        assert names(asset.parent_assets.filter(folder=imported)) == {"Parent asset"}
+        control = AppliedControl.objects.get(name="Control 0", folder=imported)
+        assert names(control.evidences.filter(folder=imported)) == {"Evidence"}
+
+        # Objects and relations created in bulk are audited as well
+        scenario_entries = LogEntry.objects.filter(object_pk=str(scenario.id))
+        assert scenario_entries.filter(action=LogEntry.Action.CREATE).exists()
+        assert any(
+            entry.changes.get("applied_controls", {}).get("operation") == "add"
+            for entry in scenario_entries.filter(action=LogEntry.Action.UPDATE)
+        )
+        for model in (Threat, Vulnerability, Asset, AppliedControl, Evidence):
+            for obj in model.objects.filter(folder=imported):
+                assert LogEntry.objects.filter(
+                    object_pk=str(obj.id), action=LogEntry.Action.CREATE
+                ).exists(), obj
+
+    def test_duplicated_names_are_made_unique(self, admin_client, domain):
+        def rename_controls(data):
+            for obj in data["objects"]:
+                if obj["model"] == "core.appliedcontrol":
+                    obj["fields"]["name"] = "Control"
+
+        dump = edit_dump(export_domain(admin_client, domain), rename_controls)
+        response = import_domain(admin_client, dump, "Imported")
+        assert response.status_code == 200, response.data
+
+        imported = Folder.objects.get(name="Imported")
+        control_names = names(AppliedControl.objects.filter(folder=imported))
+        assert len(control_names) == 3
+        assert "Control" in control_names
+        assert all(name.startswith("Control") for name in control_names)
+
+    def test_attachments_roundtrip(self, admin_client, domain, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        contents = {
+            "report.pdf": b"%PDF report",
+            # Larger than a copy block, with bytes that are not valid text
+            "capture.bin": bytes(range(256)) * 1024,
+        }
+        for name, content in contents.items():
+            evidence = Evidence.objects.create(name=name, folder=domain)
+            evidence.attachment.save(name, ContentFile(content))
+        dump = export_domain(admin_client, domain)
+
+        with zipfile.ZipFile(io.BytesIO(dump)) as zipf:
+            assert {
+                info.filename
+                for info in zipf.infolist()
+                if info.filename.startswith("attachments/")
+            } == {"attachments/report.pdf", "attachments/capture.bin"}
+
+        # report.pdf is still in the storage and the imported copy is renamed,
+        # capture.bin is not and keeps its name
+        default_storage.delete("capture.bin")
+        response = import_domain(admin_client, dump, "Imported")
+        assert response.status_code == 200, response.data
+
+        imported = {
+            evidence.name: evidence
+            for evidence in Evidence.objects.filter(
+                folder__name="Imported", name__in=contents
+            )
+        }
+        assert set(imported) == set(contents)
+        assert imported["capture.bin"].attachment.name == "capture.bin"
+        renamed = imported["report.pdf"].attachment.name
+        assert renamed != "report.pdf" and renamed.startswith("report")
+        for name, content in contents.items():
+            with default_storage.open(imported[name].attachment.name) as file:
+                assert file.read() == content
+        with default_storage.open("report.pdf") as file:
+            assert file.read() == contents["report.pdf"]
@@ -1,22 +1,44 @@
 from django.contrib.auth.models import Permission
+import copy
+
 import pytest
+from auditlog.context import set_actor
+from auditlog.models import LogEntry
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import ValidationError
 
-from core.helpers import get_rating_options, get_rating_options_abbr
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core import helpers
+from core.helpers import (
+    build_audits_stats,
+    build_audits_tree_metrics,
+    get_rating_options,
+    get_rating_options_abbr,
+)
 from core.models import (
+    ComplianceAssessment,
+    Framework,
     Perimeter,
+    RequirementAssessment,
+    RequirementNode,
     RiskAssessment,
     RiskMatrix,
     RiskScenario,
     StoredLibrary,
+    Threat,
 )
 from core.utils import (
     VersionFormatError,
     compare_versions,
+    log_bulk_changes,
     parse_version,
     compare_schema_versions,
 )
+from core.tasks import refresh_metrics_snapshot_task
 from iam.models import Folder, Role, RoleAssignment, User
 
 
@@ -159,6 +181,179 @@ def test_get_rating_options_abbr_perm_to_view_matrix():
     ]
 
 
+@pytest.fixture
+def metrics_cache(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "metrics": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+    yield caches["metrics"]
+    caches["metrics"].clear()
+
+
+@pytest.mark.django_db
+def test_metrics_snapshot_is_shared_and_revalidated(
+    metrics_cache, settings, monkeypatch, django_assert_max_num_queries
+):
+    refreshes = []
+    monkeypatch.setattr(
+        helpers,
+        "refresh_metrics_snapshot_task",
+        lambda *args: refreshes.append(args),
+    )
+    folder = Folder.objects.create(
+        name="test", content_type=Folder.ContentType.DOMAIN, builtin=False
+    )
+    Perimeter.objects.create(name="test", folder=folder)
+    role = Role.objects.create(name="test")
+    role.permissions.set(
+        Permission.objects.filter(codename__in=["view_folder", "view_perimeter"])
+    )
+    users = []
+    for email in ["first@test.com", "second@test.com"]:
+        user = User.objects.create(email=email, password="test")
+        role_assignment = RoleAssignment.objects.create(
+            user=user, role=role, folder=folder, is_recursive=True
+        )
+        role_assignment.perimeter_folders.add(folder)
+        users.append(user)
+
+    counters = helpers.get_metrics_snapshot("counters", users[0])
+    assert counters["perimeters"] == 1
+
+    # Same permissions: served from the snapshot, only the fingerprint is computed
+    Perimeter.objects.create(name="test 2", folder=folder)
+    with django_assert_max_num_queries(3):
+        assert helpers.get_metrics_snapshot("counters", users[1]) == counters
+    assert refreshes == []
+
+    # Stale snapshots are served while a single refresh is queued
+    settings.METRICS_SNAPSHOT_TTL = -1
+    assert helpers.get_metrics_snapshot("counters", users[1]) == counters
+    assert helpers.get_metrics_snapshot("counters", users[0]) == counters
+    refreshing_key = (
+        f"{helpers.get_metrics_snapshot_key('counters', users[1])}:refreshing"
+    )
+    assert refreshes == [("counters", users[1].id, None, refreshing_key)]
+
+    refresh_metrics_snapshot_task.call_local(*refreshes[0])
+    assert metrics_cache.get(refreshing_key) is None
+    assert helpers.get_metrics_snapshot("counters", users[0])["perimeters"] == 2
+
+    # The refresh flag is released even if the refresh fails
+    metrics_cache.add(refreshing_key, True)
+    refresh_metrics_snapshot_task.call_local("counters", 0, None, refreshing_key)
+    assert metrics_cache.get(refreshing_key) is None
+
+    # Different permissions do not share snapshots
+    user = User.objects.create(email="third@test.com", password="test")
+    assert helpers.get_metrics_snapshot("counters", user)["perimeters"] == 0
+
+
+@pytest.mark.django_db
+def test_audits_metrics_query_count_does_not_depend_on_audit_count():
+    user = User.objects.create(email="test@test.com", password="test")
+    role = Role.objects.create(name="test")
+    role.permissions.set(
+        Permission.objects.filter(
+            codename__in=[
+                "view_folder",
+                "view_perimeter",
+                "view_complianceassessment",
+                "view_requirementassessment",
+            ]
+        )
+    )
+    role_assignment = RoleAssignment.objects.create(
+        user=user, role=role, folder=Folder.get_root_folder(), is_recursive=True
+    )
+    role_assignment.perimeter_folders.add(Folder.get_root_folder())
+    framework = Framework.objects.create(
+        name="Framework", folder=Folder.get_root_folder()
+    )
+    requirements = [
+        RequirementNode.objects.create(
+            name=f"Requirement {i}",
+            folder=Folder.get_root_folder(),
+            framework=framework,
+            assessable=True,
+            implementation_groups=[f"IG{i}"],
+        )
+        for i in range(2)
+    ]
+    folder = Folder.objects.create(
+        name="domain", content_type=Folder.ContentType.DOMAIN
+    )
+    perimeter = Perimeter.objects.create(name="perimeter", folder=folder)
+
+    def add_audit(name, **kwargs):
+        audit = ComplianceAssessment.objects.create(
+            name=name, perimeter=perimeter, framework=framework, **kwargs
+        )
+        for requirement, result in zip(requirements, ["compliant", "non_compliant"]):
+            RequirementAssessment.objects.create(
+                requirement=requirement,
+                compliance_assessment=audit,
+                folder=folder,
+                result=result,
+            )
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            tree = build_audits_tree_metrics(user)
+            stats = build_audits_stats(user)
+        return len(context.captured_queries), tree, stats
+
+    add_audit("audit 0", selected_implementation_groups=["IG0"])
+    queries, tree, stats = count_queries()
+    domain = next(block for block in tree if block["name"] == "domain")
+    assert [
+        child["value"] for child in domain["children"][0]["children"][0]["children"]
+    ] == [1, 0, 0, 0, 0]
+    assert stats["data"] == [[0, 0, 0, 1, 0]]
+
+    for i in range(1, 10):
+        add_audit(f"audit {i}")
+    more_queries, tree, stats = count_queries()
+    assert more_queries == queries
+    assert len(stats["data"]) == 10
+    assert stats["data"][1] == [0, 0, 1, 1, 0]
+
+
+@pytest.mark.django_db
+def test_sorted_requirement_nodes_are_translated():
+    framework = Framework.objects.create(name="Framework")
+    parent = RequirementNode.objects.create(
+        framework=framework,
+        urn="urn:test:req_node:1",
+        name="Governance",
+        translations={"fr": {"name": "Gouvernance"}},
+        order_id=0,
+        assessable=False,
+    )
+    RequirementNode.objects.create(
+        framework=framework,
+        urn="urn:test:req_node:1.1",
+        parent_urn=parent.urn,
+        name="Policies",
+        description="Define policies",
+        translations={"fr": {"name": "Politiques"}},
+        order_id=1,
+        assessable=True,
+    )
+    requirement_nodes = list(RequirementNode.objects.filter(framework=framework))
+
+    with translation.override("fr"):
+        tree = helpers.get_sorted_requirement_nodes(requirement_nodes)
+
+    parent_data = tree[str(parent.id)]
+    assert parent_data["name"] == "Gouvernance"
+    (child_data,) = parent_data["children"].values()
+    assert child_data["name"] == "Politiques"
+    assert child_data["description"] == "Define policies"
+    assert RequirementNode.objects.get(id=parent.id).name == "Governance"
+
+
 # --- Tests for parse_version ---
 
 
@@ -333,3 +528,29 @@ def test_invalid_semver_format():
     version_b = "1.2.3"
     with pytest.raises(VersionFormatError):
         compare_schema_versions(schema_ver_a, version_a, version_b, schema_ver_b=1)
+
+
+@pytest.mark.django_db
+def test_log_bulk_changes():
+    user = User.objects.create(email="test@test.com", password="test")
+    created = Threat(name="Created", folder=Folder.get_root_folder())
+    updated = Threat.objects.create(name="Updated", folder=Folder.get_root_folder())
+    previous = copy.copy(updated)
+    updated.name = "Renamed"
+    unchanged = Threat.objects.create(name="Unchanged", folder=Folder.get_root_folder())
+    Threat.objects.bulk_create([created])
+    LogEntry.objects.all().delete()
+
+    with set_actor(user):
+        log_bulk_changes(
+            [(None, created), (previous, updated), (copy.copy(unchanged), unchanged)]
+        )
+
+    create_entry, update_entry = LogEntry.objects.order_by("action")
+    assert create_entry.action == LogEntry.Action.CREATE
+    assert create_entry.object_pk == str(created.id)
+    assert create_entry.changes["name"] == ["None", "Created"]
+    assert update_entry.action == LogEntry.Action.UPDATE
+    assert update_entry.changes == {"name": ["Updated", "Renamed"]}
+    # The actor is set as for entries written by save()
+    assert update_entry.actor == user
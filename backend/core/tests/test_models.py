@@ -2,8 +2,11 @@ from uuid import UUID
 from django.core.exceptions import ValidationError
 
 import pytest
-from ciso_assistant.settings import BASE_DIR
+from auditlog.models import LogEntry
+from ciso_assistant.settings import BASE_DIR, LIBRARIES_PATH
 from core.models import (
+    LibraryUpdater,
+    StoredLibrary,
     Policy,
     Perimeter,
     RequirementMapping,
@@ -22,10 +25,15 @@ from core.models import (
     RiskMatrix,
     LoadedLibrary,
     Framework,
+    HistoricalMetric,
 )
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.utils import translation
+from django.utils.timezone import now
 from iam.models import Folder
+from library.helpers import get_translated_fields, load_library_yaml
 
 from .fixtures import *
 
@@ -607,12 +615,169 @@ class TestRiskScenario:
         assert scenario2.ref_id == "R.2"
         assert scenario3.ref_id == "R.3"
 
+    @pytest.mark.usefixtures("risk_matrix_fixture")
+    def test_risk_scenario_daily_metrics_are_coalesced(
+        self, django_capture_on_commit_callbacks
+    ):
+        folder = Folder.objects.create(
+            name="test folder", description="test folder description"
+        )
+        perimeter = Perimeter.objects.create(name="test perimeter", folder=folder)
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            risk_assessment = RiskAssessment.objects.create(
+                name="test risk_assessment",
+                perimeter=perimeter,
+                risk_matrix=RiskMatrix.objects.all()[0],
+            )
+            for i in range(5):
+                RiskScenario.objects.create(
+                    name=f"test scenario {i}", risk_assessment=risk_assessment
+                )
+            with pytest.raises(RuntimeError), transaction.atomic():
+                RiskScenario.objects.create(
+                    name="rolled back scenario", risk_assessment=risk_assessment
+                )
+                raise RuntimeError
+
+        assert len(callbacks) == 1
+        metric = HistoricalMetric.objects.get(
+            model="RiskAssessment", object_id=risk_assessment.id
+        )
+        assert metric.data["scenarios"]["total"] == 5
+
+    @pytest.mark.usefixtures("risk_matrix_fixture")
+    def test_rolled_back_daily_metrics_are_rescheduled(
+        self, django_capture_on_commit_callbacks
+    ):
+        folder = Folder.objects.create(name="test folder")
+        perimeter = Perimeter.objects.create(name="test perimeter", folder=folder)
+        with django_capture_on_commit_callbacks(execute=True):
+            risk_assessment = RiskAssessment.objects.create(
+                name="test risk_assessment",
+                perimeter=perimeter,
+                risk_matrix=RiskMatrix.objects.all()[0],
+            )
+        with django_capture_on_commit_callbacks() as callbacks:
+            with pytest.raises(RuntimeError), transaction.atomic():
+                HistoricalMetric.schedule_daily_metric(risk_assessment)
+                raise RuntimeError
+            HistoricalMetric.schedule_daily_metric(risk_assessment)
+            HistoricalMetric.schedule_daily_metric(risk_assessment)
+
+        assert len(callbacks) == 1
+        callbacks[0]()
+        with django_capture_on_commit_callbacks() as callbacks:
+            HistoricalMetric.schedule_daily_metric(risk_assessment)
+        assert len(callbacks) == 1
+
 
 @pytest.mark.django_db
 class TestRiskMatrix:
     pytestmark = pytest.mark.django_db
 
-    ...
+    @pytest.mark.usefixtures("risk_matrix_fixture")
+    def test_translated_definition_is_cached_per_language(self):
+        risk_matrix = RiskMatrix.objects.get(
+            urn="urn:intuitem:risk:matrix:critical_risk_matrix_5x5"
+        )
+        with translation.override("fr"):
+            translated = risk_matrix.parse_json_translated()
+            assert translated["probability"][0]["name"] == "Très faible"
+            assert (
+                RiskMatrix.objects.get(id=risk_matrix.id).parse_json_translated()
+                is translated
+            )
+        with translation.override("en"):
+            assert risk_matrix.parse_json_translated()["probability"][0]["name"] == (
+                "Very Low"
+            )
+        # The stored definition is not modified by translations
+        assert risk_matrix.json_definition["probability"][0]["name"] == "Very Low"
+        assert isinstance(translated["grid"][0], tuple)
+
+    @pytest.mark.usefixtures("risk_matrix_fixture")
+    def test_translated_definition_is_refreshed_on_update(self):
+        risk_matrix = RiskMatrix.objects.get(
+            urn="urn:intuitem:risk:matrix:critical_risk_matrix_5x5"
+        )
+        with translation.override("en"):
+            risk_matrix.parse_json_translated()
+            risk_matrix.json_definition["probability"][0]["name"] = "Rare"
+            risk_matrix.json_definition["probability"][0]["translations"] = {}
+            risk_matrix.save()
+            assert (
+                RiskMatrix.objects.get(id=risk_matrix.id).parse_json_translated()[
+                    "probability"
+                ][0]["name"]
+                == "Rare"
+            )
+
+    @pytest.mark.usefixtures("risk_matrix_fixture")
+    def test_stale_translated_definitions_are_evicted(self):
+        risk_matrix = RiskMatrix.objects.get(
+            urn="urn:intuitem:risk:matrix:critical_risk_matrix_5x5"
+        )
+        with translation.override("en"):
+            risk_matrix.parse_json_translated()
+            # Updated by another process, without clearing the cache of this one
+            RiskMatrix.objects.filter(id=risk_matrix.id).update(
+                json_definition={**risk_matrix.json_definition, "name": "Updated"},
+                updated_at=now(),
+            )
+            updated_matrix = RiskMatrix.objects.get(id=risk_matrix.id)
+            assert updated_matrix.parse_json_translated()["name"] == "Updated"
+        # The previous version was replaced
+        assert [
+            cached[0]
+            for (matrix_id, _), cached in RiskMatrix._translated_definitions.items()
+            if matrix_id == risk_matrix.id
+        ] == [updated_matrix.updated_at]
+
+    def test_translated_definitions_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(RiskMatrix, "TRANSLATED_DEFINITIONS_CACHE_SIZE", 2)
+        RiskMatrix.clear_translated_definitions()
+        risk_matrices = [
+            RiskMatrix.objects.create(
+                name=f"Matrix {i}",
+                folder=Folder.get_root_folder(),
+                json_definition={"name": f"Matrix {i}"},
+            )
+            for i in range(3)
+        ]
+        for risk_matrix in risk_matrices:
+            risk_matrix.parse_json_translated()
+            assert len(RiskMatrix._translated_definitions) <= 2
+
+    @pytest.mark.usefixtures("risk_matrix_fixture")
+    def test_risk_scenario_ratings_use_translated_definition(self):
+        risk_matrix = RiskMatrix.objects.get(
+            urn="urn:intuitem:risk:matrix:critical_risk_matrix_5x5"
+        )
+        perimeter = Perimeter.objects.create(name="test perimeter")
+        risk_assessment = RiskAssessment.objects.create(
+            name="test risk_assessment", perimeter=perimeter, risk_matrix=risk_matrix
+        )
+        scenario = RiskScenario.objects.create(
+            name="test scenario",
+            risk_assessment=risk_assessment,
+            current_proba=0,
+            current_impact=1,
+        )
+        with translation.override("fr"):
+            current_risk = scenario.get_current_risk()
+            assert scenario.get_current_proba() == {
+                **risk_matrix.parse_json_translated()["probability"][0],
+                "value": 0,
+            }
+        assert current_risk["value"] == scenario.current_level
+        assert (
+            current_risk["name"]
+            == (
+                risk_matrix.json_definition["risk"][scenario.current_level][
+                    "translations"
+                ]["fr"]["name"]
+            )
+        )
 
 
 @pytest.mark.django_db
@@ -920,6 +1085,127 @@ class TestAsset:
             )
 
 
+@pytest.mark.django_db
+class TestComplianceAssessment:
+    pytestmark = pytest.mark.django_db
+
+    @pytest.mark.usefixtures("domain_perimeter_fixture")
+    def test_compliance_assessment_summary(self, django_assert_num_queries):
+        framework = Framework.objects.create(
+            name="Framework", folder=Folder.get_root_folder()
+        )
+        compliance_assessment = ComplianceAssessment.objects.create(
+            name="ComplianceAssessment",
+            perimeter=Perimeter.objects.last(),
+            framework=framework,
+            selected_implementation_groups=["IG1"],
+        )
+        nodes = [
+            (["IG1"], True, None, "compliant", "done", 80, None),
+            (["IG2"], True, None, "non_compliant", "done", 10, None),
+            (["IG1"], False, None, "compliant", "to_do", 10, None),
+            (
+                ["IG1", "IG2"],
+                True,
+                {"q1": {}, "q2": {}},
+                "not_assessed",
+                "to_do",
+                40,
+                {"q1": "yes", "q2": ""},
+            ),
+        ]
+        requirement_assessments = []
+        for i, (
+            groups,
+            assessable,
+            questions,
+            result,
+            status,
+            score,
+            answers,
+        ) in enumerate(nodes):
+            node = RequirementNode.objects.create(
+                name=f"RequirementNode {i}",
+                folder=Folder.get_root_folder(),
+                framework=framework,
+                assessable=assessable,
+                implementation_groups=groups,
+                questions=questions,
+            )
+            requirement_assessments.append(
+                RequirementAssessment.objects.create(
+                    requirement=node,
+                    compliance_assessment=compliance_assessment,
+                    folder=Folder.get_root_folder(),
+                    result=result,
+                    status=status,
+                    is_scored=True,
+                    score=score,
+                    answers=answers,
+                )
+            )
+        compliance_assessment.refresh_from_db()
+
+        with django_assert_num_queries(
+            1 if connection.features.supports_json_field_contains else 2
+        ):
+            assert compliance_assessment.get_progress() == 50
+            assert compliance_assessment.get_global_score() == 60
+            assert dict(
+                (str(rs), count)
+                for count, rs in compliance_assessment.get_requirements_result_count()
+            ) == {
+                "not_assessed": 1,
+                "partially_compliant": 0,
+                "non_compliant": 0,
+                "compliant": 1,
+                "not_applicable": 0,
+            }
+            assert dict(
+                (str(st), count)
+                for count, st in compliance_assessment.get_requirements_status_count()
+            ) == {"to_do": 2, "in_progress": 0, "in_review": 0, "done": 2}
+        assert compliance_assessment.has_questions
+        assert compliance_assessment.answers_progress == 50
+
+        requirement_assessment = requirement_assessments[3]
+        requirement_assessment.compliance_assessment = compliance_assessment
+        requirement_assessment.result = "compliant"
+        requirement_assessment.save()
+        assert compliance_assessment.get_progress() == 100
+
+    @pytest.mark.usefixtures("domain_perimeter_fixture")
+    def test_summary_is_invalidated_by_baseline_creation(self):
+        framework = Framework.objects.create(
+            name="Framework", folder=Folder.get_root_folder()
+        )
+        RequirementNode.objects.create(
+            name="RequirementNode",
+            folder=Folder.get_root_folder(),
+            framework=framework,
+            assessable=True,
+        )
+        baseline, compliance_assessment = (
+            ComplianceAssessment.objects.create(
+                name=name, perimeter=Perimeter.objects.last(), framework=framework
+            )
+            for name in ("Baseline", "ComplianceAssessment")
+        )
+        baseline.create_requirement_assessments()
+        baseline.requirement_assessments.update(result="compliant", status="done")
+        assert compliance_assessment.get_progress() == 0
+
+        compliance_assessment.create_requirement_assessments(baseline)
+        assert compliance_assessment.get_progress() == 100
+        assert (
+            dict(
+                (str(st), count)
+                for count, st in compliance_assessment.get_requirements_status_count()
+            )["done"]
+            == 1
+        )
+
+
 @pytest.mark.django_db
 class TestLibrary:
     pytestmark = pytest.mark.django_db
@@ -1242,6 +1528,145 @@ class TestLibrary:
             None
         assert LoadedLibrary.objects.count() == 0
 
+    def test_stored_library_mapping_source_framework_urns(self):
+        mapping_library = StoredLibrary.objects.get(
+            urn="urn:intuitem:risk:library:mapping-iso27001-2013-to-iso27001-2022"
+        )
+        assert mapping_library.mapping_source_framework_urns == [
+            "urn:intuitem:risk:framework:iso27001-2013"
+        ]
+
+        framework_library = StoredLibrary.objects.get(
+            urn="urn:intuitem:risk:library:iso27001-2022", locale="en"
+        )
+        assert framework_library.mapping_source_framework_urns == []
+
+    @pytest.mark.usefixtures("domain_perimeter_fixture")
+    def test_library_update_diffs_requirement_nodes(self):
+        stored_library = StoredLibrary.objects.get(
+            urn="urn:intuitem:risk:library:google-saif", locale="en"
+        )
+        assert stored_library.load() is None
+        library = LoadedLibrary.objects.get(urn=stored_library.urn)
+        framework = library.frameworks.get()
+        compliance_assessments = [
+            ComplianceAssessment.objects.create(
+                name=f"ComplianceAssessment {i}",
+                perimeter=Perimeter.objects.last(),
+                framework=framework,
+            )
+            for i in range(3)
+        ]
+        for compliance_assessment in compliance_assessments:
+            compliance_assessment.create_requirement_assessments()
+
+        library_data = load_library_yaml(
+            (LIBRARIES_PATH / "google-saif.yaml").read_bytes()
+        )
+        library_data["version"] += 1
+        requirement_nodes = library_data["objects"]["framework"]["requirement_nodes"]
+        deleted_node = requirement_nodes.pop()
+        requirement_nodes[0]["name"] = "Updated name"
+        # The translated fields of the node are cached before the update
+        assert (
+            get_translated_fields(
+                RequirementNode.objects.get(urn=requirement_nodes[0]["urn"].lower()),
+                "en",
+            )["name"]
+            != "Updated name"
+        )
+        requirement_nodes.append(
+            {
+                "urn": "urn:intuitem:risk:req_node:google-saif:new",
+                "assessable": True,
+                "ref_id": "NEW",
+                "threats": [library_data["objects"]["threats"][0]["urn"]],
+                "questions": {
+                    "urn:intuitem:risk:req_node:google-saif:new:question:1": {
+                        "type": "text",
+                        "text": "Question",
+                    }
+                },
+            }
+        )
+        new_library = StoredLibrary.store_library_data(library_data, "new hash")
+
+        counts = LibraryUpdater(library, new_library).update_frameworks()
+
+        assert counts == {
+            "deleted_requirement_nodes": 1,
+            "created_requirement_nodes": 1,
+            "updated_requirement_nodes": len(requirement_nodes) - 1,
+            "created_requirement_assessments": len(compliance_assessments),
+            "updated_requirement_assessments": 0,
+        }
+        nodes = RequirementNode.objects.filter(framework=framework)
+        assert not nodes.filter(urn=deleted_node["urn"].lower()).exists()
+        assert list(nodes.order_by("order_id").values_list("urn", flat=True)) == [
+            node["urn"].lower() for node in requirement_nodes
+        ]
+        updated_node = nodes.get(urn=requirement_nodes[0]["urn"].lower())
+        assert updated_node.name == "Updated name"
+        assert get_translated_fields(updated_node, "en")["name"] == "Updated name"
+        new_node = nodes.get(urn="urn:intuitem:risk:req_node:google-saif:new")
+        assert list(new_node.threats.values_list("urn", flat=True)) == [
+            library_data["objects"]["threats"][0]["urn"].lower()
+        ]
+        for compliance_assessment in compliance_assessments:
+            requirement_assessments = RequirementAssessment.objects.filter(
+                compliance_assessment=compliance_assessment
+            )
+            assert requirement_assessments.count() == len(requirement_nodes)
+            assert requirement_assessments.get(requirement=new_node).answers == {
+                "urn:intuitem:risk:req_node:google-saif:new:question:1": None
+            }
+
+    def test_library_update_prefers_objects_of_involved_libraries(self):
+        stored_library = StoredLibrary.objects.get(
+            urn="urn:intuitem:risk:library:google-saif", locale="en"
+        )
+        assert stored_library.load() is None
+        library = LoadedLibrary.objects.get(urn=stored_library.urn)
+        library_data = load_library_yaml(
+            (LIBRARIES_PATH / "google-saif.yaml").read_bytes()
+        )
+        threat_urn = library_data["objects"]["threats"][0]["urn"].lower()
+        # URNs are matched case insensitively, so another library may use the
+        # same URN as the updated one
+        library_threat = Threat.objects.get(urn=threat_urn)
+        library_threat.urn = threat_urn.upper()
+        library_threat.save()
+        other_library = LoadedLibrary.objects.create(
+            name="Other library",
+            urn="urn:test:library:other",
+            folder=Folder.get_root_folder(),
+            locale="en",
+            version=1,
+            objects_meta={},
+        )
+        Threat.objects.create(
+            name="Duplicated threat",
+            urn=threat_urn,
+            library=other_library,
+            folder=Folder.get_root_folder(),
+        )
+
+        library_data["version"] += 1
+        library_data["objects"]["framework"]["requirement_nodes"].append(
+            {
+                "urn": "urn:intuitem:risk:req_node:google-saif:new",
+                "assessable": True,
+                "threats": [threat_urn],
+            }
+        )
+        new_library = StoredLibrary.store_library_data(library_data, "new hash")
+        LibraryUpdater(library, new_library).update_frameworks()
+
+        new_node = RequirementNode.objects.get(
+            urn="urn:intuitem:risk:req_node:google-saif:new"
+        )
+        assert new_node.threats.get() == library_threat
+
 
 @pytest.mark.django_db
 class TestRequirementMapping:
@@ -1317,3 +1742,88 @@ class TestRequirementMappingSet:
                 source_framework=csf1_1,
                 target_framework=csf1_1,
             )
+
+    @pytest.mark.usefixtures("domain_perimeter_fixture")
+    def test_compute_requirement_assessments_results(
+        self, django_assert_max_num_queries
+    ):
+        root_folder = Folder.get_root_folder()
+        source_framework, target_framework = (
+            Framework.objects.create(name=name, folder=root_folder)
+            for name in ("Source", "Target")
+        )
+        nodes = {
+            framework: [
+                RequirementNode.objects.create(
+                    name=f"{framework.name} {i}",
+                    ref_id=str(i),
+                    folder=root_folder,
+                    framework=framework,
+                    assessable=True,
+                )
+                for i in range(20)
+            ]
+            for framework in (source_framework, target_framework)
+        }
+        mapping_set = RequirementMappingSet.objects.create(
+            name="Requirement Mapping Set",
+            source_framework=source_framework,
+            target_framework=target_framework,
+        )
+        for source, target in zip(nodes[source_framework], nodes[target_framework]):
+            RequirementMapping.objects.create(
+                mapping_set=mapping_set,
+                source_requirement=source,
+                target_requirement=target,
+                relationship=RequirementMapping.Relationship.EQUAL,
+            )
+        # Ignored, as a full coverage mapping exists for the same target
+        RequirementMapping.objects.create(
+            mapping_set=mapping_set,
+            source_requirement=nodes[source_framework][1],
+            target_requirement=nodes[target_framework][0],
+            relationship=RequirementMapping.Relationship.INTERSECT,
+        )
+        source_assessment, target_assessment = (
+            ComplianceAssessment.objects.create(
+                name=framework.name,
+                perimeter=Perimeter.objects.last(),
+                framework=framework,
+            )
+            for framework in (source_framework, target_framework)
+        )
+        for i, requirement_assessment in enumerate(
+            source_assessment.create_requirement_assessments()
+        ):
+            requirement_assessment.result = (
+                RequirementAssessment.Result.COMPLIANT
+                if i % 2 == 0
+                else RequirementAssessment.Result.NON_COMPLIANT
+            )
+            requirement_assessment.save()
+        target_assessment.create_requirement_assessments()
+
+        with django_assert_max_num_queries(5):
+            computed = target_assessment.compute_requirement_assessments_results(
+                mapping_set, source_assessment
+            )
+
+        assert len(computed) == 20
+        results = dict(
+            RequirementAssessment.objects.filter(
+                compliance_assessment=target_assessment
+            ).values_list("requirement__ref_id", "result")
+        )
+        assert results == {
+            str(i): "compliant" if i % 2 == 0 else "non_compliant" for i in range(20)
+        }
+        assert target_assessment.get_progress() == 100
+        # The inferred results are written to the audit log
+        log_entries = LogEntry.objects.filter(
+            action=LogEntry.Action.UPDATE,
+            object_pk__in=[str(ra.id) for ra in computed],
+        )
+        assert log_entries.count() == 20
+        assert log_entries.filter(object_pk=str(computed[0].id)).get().changes[
+            "result"
+        ] == ["not_assessed", str(computed[0].result)]
@@ -0,0 +1,172 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    AppliedControl,
+    Asset,
+    ComplianceAssessment,
+    Evidence,
+    Framework,
+    RequirementAssessment,
+    RequirementNode,
+    RiskAssessment,
+    RiskMatrix,
+    RiskScenario,
+    Threat,
+)
+from core.query_optimizer import get_queryset_plan, optimize_queryset
+from core.serializers import (
+    AppliedControlReadSerializer,
+    RequirementAssessmentReadSerializer,
+    RiskScenarioReadSerializer,
+)
+from iam.models import Folder, RBACContext
+
+from .fixtures import *
+
+
+def count_queries(serializer_class, queryset):
+    # Serializers run in a request, where the root folder is cached by the RBAC context
+    token = RBACContext.activate()
+    try:
+        with CaptureQueriesContext(connection) as context:
+            serializer_class(queryset, many=True).data
+    finally:
+        RBACContext.deactivate(token)
+    return len(context.captured_queries)
+
+
+@pytest.fixture
+def create_objects(domain_perimeter_fixture, risk_matrix_fixture):
+    folder = domain_perimeter_fixture.folder
+    root_folder = Folder.get_root_folder()
+    risk_assessment = RiskAssessment.objects.create(
+        name="Risk assessment",
+        perimeter=domain_perimeter_fixture,
+        folder=folder,
+        risk_matrix=RiskMatrix.objects.first(),
+    )
+    framework = Framework.objects.create(name="Framework", folder=root_folder)
+    compliance_assessment = ComplianceAssessment.objects.create(
+        name="Compliance assessment",
+        perimeter=domain_perimeter_fixture,
+        framework=framework,
+        folder=folder,
+    )
+    created = []
+
+    def create(count):
+        """Create count risk scenarios, applied controls and requirement assessments."""
+        for i in range(len(created), len(created) + count):
+            created.append(i)
+            applied_control = AppliedControl.objects.create(
+                name=f"Control {i}", folder=folder
+            )
+            applied_control.evidences.add(
+                Evidence.objects.create(name=f"Evidence {i}", folder=folder)
+            )
+            scenario = RiskScenario.objects.create(
+                name=f"Scenario {i}", risk_assessment=risk_assessment
+            )
+            scenario.threats.add(
+                Threat.objects.create(name=f"Threat {i}", folder=folder)
+            )
+            scenario.assets.add(Asset.objects.create(name=f"Asset {i}", folder=folder))
+            scenario.applied_controls.add(applied_control)
+            requirement = RequirementNode.objects.create(
+                name=f"Requirement {i}",
+                urn=f"urn:test:req_node:{i}",
+                framework=framework,
+                folder=root_folder,
+                assessable=True,
+            )
+            requirement_assessment = RequirementAssessment.objects.create(
+                requirement=requirement,
+                compliance_assessment=compliance_assessment,
+                folder=folder,
+            )
+            requirement_assessment.applied_controls.add(applied_control)
+
+    return create
+
+
+@pytest.mark.django_db
+class TestQueryOptimizer:
+    def test_plan_follows_serializer_fields(self):
+        plan = get_queryset_plan(RiskScenario, RiskScenarioReadSerializer)
+
+        # Nested FieldsRelatedField sub-fields are selected
+        assert "risk_assessment__perimeter__folder" in plan.select_related
+        assert "risk_assessment__risk_matrix" in plan.select_related
+        assert {"threats", "assets", "applied_controls", "owner"} <= set(
+            plan.prefetch_related
+        )
+
+    def test_plan_follows_related_lookups(self):
+        plan = get_queryset_plan(
+            RequirementAssessment, RequirementAssessmentReadSerializer
+        )
+
+        assert {"requirement", "compliance_assessment", "folder"} <= set(
+            plan.select_related
+        )
+        assert {
+            "requirement__reference_controls",
+            "requirement__threats",
+            "evidences",
+        } <= set(plan.prefetch_related)
+
+        plan = get_queryset_plan(AppliedControl, AppliedControlReadSerializer)
+        assert "risk_scenarios" in plan.prefetch_related
+
+    @pytest.mark.parametrize(
+        "serializer_class, queries_per_object",
+        [
+            (RiskScenarioReadSerializer, 0),
+            (AppliedControlReadSerializer, 0),
+            # The parent requirement is looked up by urn
+            (RequirementAssessmentReadSerializer, 1),
+        ],
+    )
+    def test_queries_do_not_depend_on_object_count(
+        self, create_objects, serializer_class, queries_per_object
+    ):
+        model = serializer_class.Meta.model
+        create_objects(2)
+        queries = count_queries(
+            serializer_class, optimize_queryset(model.objects.all(), serializer_class)
+        )
+        create_objects(5)
+        assert count_queries(
+            serializer_class, optimize_queryset(model.objects.all(), serializer_class)
+        ) == (queries + 5 * queries_per_object)
+
+    @pytest.mark.parametrize(
+        "serializer_class",
+        [
+            RiskScenarioReadSerializer,
+            AppliedControlReadSerializer,
+            RequirementAssessmentReadSerializer,
+        ],
+    )
+    def test_optimized_queryset_serializes_identically(
+        self, create_objects, serializer_class
+    ):
+        model = serializer_class.Meta.model
+        create_objects(5)
+        queryset = model.objects.order_by("id")
+
+        optimized_queryset = optimize_queryset(queryset, serializer_class)
+
+        assert (
+            serializer_class(optimized_queryset, many=True).data
+            == serializer_class(queryset, many=True).data
+        )
+        assert count_queries(serializer_class, optimized_queryset) * 3 < count_queries(
+            serializer_class, queryset
+        )
+
+    def test_values_queryset_is_not_optimized(self):
+        queryset = RiskScenario.objects.values("id")
+        assert optimize_queryset(queryset, RiskScenarioReadSerializer) is queryset
@@ -0,0 +1,50 @@
+import pytest
+from rest_framework import serializers
+
+from core.models import Asset
+from core.serializers import (
+    AssetReadSerializer,
+    AssetWriteSerializer,
+    SerializerFactory,
+)
+from iam.models import Folder
+
+
+class FolderWriteSerializer(serializers.ModelSerializer):
+    """Override of the core serializer, as defined by enterprise serializers modules"""
+
+    class Meta:
+        model = Folder
+        fields = ["name"]
+
+
+class TestSerializerFactory:
+    def test_get_serializer(self):
+        factory = SerializerFactory.for_module("core.serializers")
+
+        assert factory.get_serializer("Asset", "list") is AssetReadSerializer
+        assert factory.get_serializer("Asset", "retrieve") is AssetReadSerializer
+        assert factory.get_serializer("Asset", "partial_update") is (
+            AssetWriteSerializer
+        )
+        assert factory.get_serializer("Asset", "destroy") is None
+        with pytest.raises(ValueError):
+            factory.get_serializer("Nothing", "list")
+
+    def test_registry_is_built_once(self):
+        registry = SerializerFactory.for_module("core.serializers").registry
+
+        assert SerializerFactory.for_module("core.serializers").registry is registry
+        assert registry["AssetReadSerializer"].Meta.model is Asset
+
+    def test_later_modules_take_precedence(self, settings):
+        settings.MODULE_PATHS = {"serializers": __name__}
+        factory = SerializerFactory.for_module("core.serializers")
+
+        assert factory.get_serializer("Folder", "create") is FolderWriteSerializer
+        assert factory.get_serializer("Asset", "create") is AssetWriteSerializer
+
+    def test_missing_modules_are_ignored(self):
+        factory = SerializerFactory("core.serializers", "core.missing_serializers")
+
+        assert factory.get_serializer("Asset", "list") is AssetReadSerializer
@@ -1,7 +1,7 @@
 import hashlib
 from enum import Enum
 from re import sub
-from typing import Literal
+from typing import Any, Iterable, Literal
 from datetime import datetime, timedelta, date
 
 from django.utils.translation import gettext_lazy as _
@@ -30,6 +30,62 @@ def sha256(string: bytes) -> str:
     return h.hexdigest()
 
 
+def log_bulk_changes(changed_objects: Iterable[tuple[Any, Any]]) -> None:
+    """
+    Write the audit log entries of objects created or updated in bulk.
+    bulk_create() and bulk_update() do not send the signals auditlog relies on, so the
+    callers give (previous, current) pairs of instances, previous being None for created objects.
+    """
+    # auditlog models can't be imported while the apps are loading
+    from auditlog.cid import get_cid
+    from auditlog.context import auditlog_disabled
+    from auditlog.diff import model_instance_diff
+    from auditlog.models import LogEntry
+    from auditlog.registry import auditlog
+    from django.contrib.contenttypes.models import ContentType
+    from django.db.models.signals import post_save, pre_save
+
+    if auditlog_disabled.get():
+        return
+    entries = []
+    for previous, current in changed_objects:
+        if not auditlog.contains(current.__class__):
+            continue
+        changes = model_instance_diff(previous, current)
+        if not changes:
+            continue
+        # Our models are registered without serialize_data, so it is left empty
+        entries.append(
+            LogEntry(
+                content_type=ContentType.objects.get_for_model(current),
+                object_pk=str(current.pk),
+                object_id=current.pk if isinstance(current.pk, int) else None,
+                object_repr=str(current),
+                action=LogEntry.Action.CREATE
+                if previous is None
+                else LogEntry.Action.UPDATE,
+                changes=changes,
+                cid=get_cid(),
+            )
+        )
+    # The LogEntry signals are sent as save() would, as they set the actor of the entries
+    using = LogEntry.objects.db
+    for entry in entries:
+        pre_save.send(
+            sender=LogEntry, instance=entry, raw=False, using=using, update_fields=None
+        )
+    LogEntry.objects.bulk_create(entries)
+    for entry in entries:
+        post_save.send(
+            sender=LogEntry,
+            instance=entry,
+            created=True,
+            raw=False,
+            using=using,
+            update_fields=None,
+        )
+
+
 class RoleCodename(Enum):
     ADMINISTRATOR = "BI-RL-ADM"
     DOMAIN_MANAGER = "BI-RL-DMA"
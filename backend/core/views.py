@@ -30,6 +30,7 @@ from ciso_assistant.settings import (
 )
 
 import shutil
+import tempfile
 from pathlib import Path
 import humanize
 
@@ -53,11 +54,11 @@ from django.core.cache import cache
 
 
 from django.apps import apps
-from django.contrib.auth.models import Permission
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.db import models, transaction
+from django.db.models.signals import m2m_changed
 from django.forms import ValidationError
 from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.middleware import csrf
@@ -65,7 +66,13 @@ from django.template.loader import render_to_string
 from django.utils.functional import Promise
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from iam.models import Folder, RoleAssignment, UserGroup
+from iam.models import (
+    Folder,
+    PermissionRegistry,
+    PublishInRootFolderMixin,
+    RoleAssignment,
+    UserGroup,
+)
 from rest_framework import filters, generics, permissions, status, viewsets
 from django.utils.translation import gettext_lazy as _
 from rest_framework.decorators import (
@@ -87,6 +94,7 @@ from rest_framework.exceptions import PermissionDenied
 
 from weasyprint import HTML
 
+from core.base_models import AbstractBaseModel
 from core.helpers import *
 from core.models import (
     AppliedControl,
@@ -95,6 +103,7 @@ from core.models import (
     RiskAssessment,
     AssetClass,
 )
+from core.query_optimizer import optimize_queryset
 from core.serializers import ComplianceAssessmentReadSerializer
 from core.utils import (
     RoleCodename,
@@ -102,15 +111,14 @@ from core.utils import (
     compare_schema_versions,
     _generate_occurrences,
     _create_task_dict,
+    log_bulk_changes,
 )
 from dateutil import relativedelta as rd
 
 from ebios_rm.models import (
     EbiosRMStudy,
-    FearedEvent,
     RoTo,
     StrategicScenario,
-    Stakeholder,
     AttackPath,
 )
 
@@ -130,6 +138,7 @@ from serdes.utils import (
     sort_objects_by_self_reference,
 )
 from serdes.serializers import ExportSerializer
+from library.helpers import update_translations_in_object
 
 import structlog
 
@@ -141,9 +150,6 @@ SHORT_CACHE_TTL = 2  # mn
 MED_CACHE_TTL = 5  # mn
 LONG_CACHE_TTL = 60  # mn
 
-SETTINGS_MODULE = __import__(os.environ.get("DJANGO_SETTINGS_MODULE"))
-MODULE_PATHS = SETTINGS_MODULE.settings.MODULE_PATHS
-
 
 class GenericFilterSet(df.FilterSet):
     class Meta:
@@ -201,35 +207,30 @@ class BaseModelViewSet(viewsets.ModelViewSet):
                 id = UUID(q.group(1))
                 if RoleAssignment.is_object_readable(self.request.user, self.model, id):
                     object_ids_view = [id]
-        if not object_ids_view:
-            scope_folder_id = self.request.query_params.get("scope_folder_id")
-            scope_folder = (
-                get_object_or_404(Folder, id=scope_folder_id)
-                if scope_folder_id
-                else Folder.get_root_folder()
-            )
-            object_ids_view = RoleAssignment.get_accessible_object_ids(
-                scope_folder, self.request.user, self.model
-            )[0]
-        queryset = self.model.objects.filter(id__in=object_ids_view)
+        if object_ids_view:
+            return self.model.objects.filter(id__in=object_ids_view)
+        scope_folder_id = self.request.query_params.get("scope_folder_id")
+        scope_folder = (
+            get_object_or_404(Folder, id=scope_folder_id)
+            if scope_folder_id
+            else Folder.get_root_folder()
+        )
+        return RoleAssignment.get_accessible_queryset(
+            scope_folder, self.request.user, self.model
+        )
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in ("list", "retrieve"):
+            # Fetch the related objects needed by the read serializer along with the objects
+            queryset = optimize_queryset(queryset, self.get_serializer_class())
         return queryset
 
     def get_serializer_class(self, **kwargs):
-        serializer_factory = SerializerFactory(
-            self.serializers_module, MODULE_PATHS.get("serializers", [])
-        )
-        serializer_class = serializer_factory.get_serializer(
+        serializer_factory = SerializerFactory.for_module(self.serializers_module)
+        return serializer_factory.get_serializer(
             self.model.__name__, kwargs.get("action", self.action)
         )
-        logger.debug(
-            "Serializer class",
-            serializer_class=serializer_class,
-            action=kwargs.get("action", self.action),
-            viewset=self,
-            module_paths=MODULE_PATHS,
-        )
-
-        return serializer_class
 
     COMMA_SEPARATED_UUIDS_REGEX = r"^[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}(,[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12})*$"
 
@@ -2231,7 +2232,7 @@ class RiskAcceptanceViewSet(BaseModelViewSet):
             for scenario in risk_acceptance.get("risk_scenarios"):
                 if not RoleAssignment.is_access_allowed(
                     risk_acceptance.get("approver"),
-                    Permission.objects.get(codename="approve_riskacceptance"),
+                    PermissionRegistry.get("approve_riskacceptance"),
                     scenario.risk_assessment.perimeter.folder,
                 ):
                     raise ValidationError(
@@ -2406,6 +2407,7 @@ class FolderViewSet(BaseModelViewSet):
     filterset_class = FolderFilter
     search_fields = ["name"]
     batch_size = 100  # Configurable batch size for processing domain import
+    export_spool_size = 10 * 1024 * 1024  # Larger domain exports are written to disk
 
     def perform_create(self, serializer):
         """
@@ -2553,7 +2555,7 @@ class FolderViewSet(BaseModelViewSet):
         for model in objects.keys():
             if not RoleAssignment.is_access_allowed(
                 user=request.user,
-                perm=Permission.objects.get(codename=f"view_{model}"),
+                perm=PermissionRegistry.get(f"view_{model}"),
                 folder=instance,
             ):
                 logger.error(
@@ -2574,10 +2576,10 @@ class FolderViewSet(BaseModelViewSet):
             },
         )
 
-        # Create in-memory zip file
-        zip_buffer = io.BytesIO()
+        # The zip file is written to a temporary file, kept in memory while small
+        zip_file = tempfile.SpooledTemporaryFile(max_size=self.export_spool_size)
 
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+        with zipfile.ZipFile(zip_file, "w", zipfile.ZIP_DEFLATED) as zipf:
             if include_attachments:
                 evidences = objects.get("evidence", Evidence.objects.none()).filter(
                     attachment__isnull=False
@@ -2592,39 +2594,46 @@ class FolderViewSet(BaseModelViewSet):
                     if evidence.attachment and default_storage.exists(
                         evidence.attachment.name
                     ):
-                        # Read file directly into memory
-                        with default_storage.open(evidence.attachment.name) as file:
-                            file_content = file.read()
-                            # Write the file content directly to the zip
-                            zipf.writestr(
+                        # Copy the file by blocks, without loading it in memory
+                        with (
+                            default_storage.open(evidence.attachment.name) as file,
+                            zipf.open(
                                 os.path.join(
                                     "attachments",
                                     os.path.basename(evidence.attachment.name),
                                 ),
-                                file_content,
-                            )
+                                "w",
+                                force_zip64=True,
+                            ) as zipped_file,
+                        ):
+                            shutil.copyfileobj(file, zipped_file)
 
             # Add the JSON dump to the zip file
             dumpfile_name = (
                 f"ciso-assistant-{slugify(instance.name)}-domain-{timezone.now()}"
             )
-            dump_data = ExportSerializer.dump_data(scope=[*objects.values()])
+            with zipf.open("data.json", "w", force_zip64=True) as zipped_file:
+                with io.TextIOWrapper(zipped_file, encoding="utf-8") as json_file:
+                    ExportSerializer.write_data(
+                        scope=[*objects.values()], stream=json_file
+                    )
 
             logger.debug(
-                "Adding JSON dump to zip",
-                json_size=len(json.dumps(dump_data).encode("utf-8")),
+                "Added JSON dump to zip",
+                json_size=zipf.getinfo("data.json").file_size,
                 filename=f"{dumpfile_name}.json",
             )
 
-            zipf.writestr("data.json", json.dumps(dump_data).encode("utf-8"))
+        final_size = zip_file.tell()
+        zip_file.seek(0)
 
-        # Reset buffer position to the start
-        zip_buffer.seek(0)
-        final_size = len(zip_buffer.getvalue())
-
-        # Create the response with the in-memory zip file
-        response = HttpResponse(zip_buffer.getvalue(), content_type="application/zip")
-        response["Content-Disposition"] = f'attachment; filename="{dumpfile_name}.zip"'
+        # Stream the zip file, which is closed once sent
+        response = FileResponse(
+            zip_file,
+            as_attachment=True,
+            filename=f"{dumpfile_name}.zip",
+            content_type="application/zip",
+        )
 
         logger.info(
             "Domain export completed successfully",
@@ -2651,7 +2660,7 @@ class FolderViewSet(BaseModelViewSet):
         try:
             if not RoleAssignment.is_access_allowed(
                 user=request.user,
-                perm=Permission.objects.get(codename="add_folder"),
+                perm=PermissionRegistry.get("add_folder"),
                 folder=Folder.get_root_folder(),
             ):
                 raise PermissionDenied()
@@ -2772,24 +2781,28 @@ class FolderViewSet(BaseModelViewSet):
                     "Attachments found in uploaded file",
                     attachments_count=len(attachments),
                 )
+                renamed_attachments = {}
                 for attachment in attachments:
                     try:
-                        content = zipf.read(attachment)
                         current_name = Path(attachment.filename).name
-                        new_name = default_storage.save(
-                            current_name, io.BytesIO(content)
-                        )
+                        # Copy the file to the storage by blocks, without loading it in memory
+                        with zipf.open(attachment) as content:
+                            new_name = default_storage.save(current_name, content)
                         if new_name != current_name:
-                            for x in json_dump["objects"]:
-                                if (
-                                    x["model"] == "core.evidence"
-                                    and x["fields"]["attachment"] == current_name
-                                ):
-                                    x["fields"]["attachment"] = new_name
+                            renamed_attachments[current_name] = new_name
 
                     except Exception:
                         logger.error("Error extracting attachment", exc_info=True)
 
+                for x in json_dump["objects"]:
+                    if (
+                        x["model"] == "core.evidence"
+                        and x["fields"]["attachment"] in renamed_attachments
+                    ):
+                        x["fields"]["attachment"] = renamed_attachments[
+                            x["fields"]["attachment"]
+                        ]
+
         return json_dump
 
     def _get_models_map(self, objects):
@@ -2843,9 +2856,7 @@ class FolderViewSet(BaseModelViewSet):
             ):
                 if not RoleAssignment.is_access_allowed(
                     user=user,
-                    perm=Permission.objects.get(
-                        codename=f"add_{model._meta.model_name}"
-                    ),
+                    perm=PermissionRegistry.get(f"add_{model._meta.model_name}", model),
                     folder=Folder.get_root_folder(),
                 ):
                     error_dict[model._meta.model_name] = "permission_denied"
@@ -2920,13 +2931,21 @@ class FolderViewSet(BaseModelViewSet):
                 )
 
                 # Create all objects within the transaction
+                created_objects = {}
                 for model in creation_order:
-                    self._create_model_objects(
+                    created_objects[model] = self._create_model_objects(
                         model=model,
                         objects=objects,
                         link_dump_database_ids=link_dump_database_ids,
                     )
 
+                # Requirement assessments are created in bulk, without save(): the
+                # metrics of their audits are computed once, when the import is committed
+                for compliance_assessment in created_objects.get(
+                    ComplianceAssessment, []
+                ):
+                    HistoricalMetric.schedule_daily_metric(compliance_assessment)
+
             return {"message": "Import successful"}
 
         except ValidationError as e:
@@ -3004,6 +3023,99 @@ class FolderViewSet(BaseModelViewSet):
                     }
                 )
 
+    # Foreign keys of imported objects, per model: field -> (related model, lookup).
+    # Objects created by the import are looked up by their new id (through
+    # link_dump_database_ids), library objects by URN.
+    import_foreign_keys = {
+        "riskassessment": {
+            "perimeter": (Perimeter, "id"),
+            "risk_matrix": (RiskMatrix, "urn"),
+            "ebios_rm_study": (EbiosRMStudy, "id"),
+        },
+        "complianceassessment": {
+            "perimeter": (Perimeter, "id"),
+            "framework": (Framework, "urn"),
+        },
+        "appliedcontrol": {"reference_control": (ReferenceControl, "urn")},
+        "requirementassessment": {
+            "requirement": (RequirementNode, "urn"),
+            "compliance_assessment": (ComplianceAssessment, "id"),
+        },
+        "riskscenario": {"risk_assessment": (RiskAssessment, "id")},
+        "ebiosrmstudy": {
+            "risk_matrix": (RiskMatrix, "urn"),
+            "reference_entity": (Entity, "id"),
+        },
+        "fearedevent": {"ebios_rm_study": (EbiosRMStudy, "id")},
+        "roto": {"ebios_rm_study": (EbiosRMStudy, "id")},
+        "stakeholder": {
+            "ebios_rm_study": (EbiosRMStudy, "id"),
+            "entity": (Entity, "id"),
+        },
+        "strategicscenario": {
+            "ebios_rm_study": (EbiosRMStudy, "id"),
+            "ro_to_couple": (RoTo, "id"),
+        },
+        "attackpath": {
+            "ebios_rm_study": (EbiosRMStudy, "id"),
+            "strategic_scenario": (StrategicScenario, "id"),
+        },
+        "operationalscenario": {
+            "ebios_rm_study": (EbiosRMStudy, "id"),
+            "attack_path": (AttackPath, "id"),
+        },
+    }
+    # Optional foreign keys, left empty when the referenced object is not found
+    import_optional_foreign_keys = {
+        ("riskassessment", "ebios_rm_study"),
+        ("appliedcontrol", "reference_control"),
+    }
+
+    # Keys of many_to_many_map_ids, per model, with the field they are set on
+    import_many_to_many_fields = {
+        "asset": {"parent_ids": "parent_assets"},
+        "appliedcontrol": {"evidence_ids": "evidences"},
+        "requirementassessment": {
+            "applied_controls": "applied_controls",
+            "evidence_ids": "evidences",
+        },
+        "vulnerability": {"applied_controls": "applied_controls"},
+        "riskscenario": {
+            "threats": "threats",
+            "vulnerabilities": "vulnerabilities",
+            "assets": "assets",
+            "applied_controls": "applied_controls",
+            "existing_applied_controls": "existing_applied_controls",
+        },
+        "ebiosrmstudy": {
+            "asset_ids": "assets",
+            "compliance_assessment_ids": "compliance_assessments",
+        },
+        "fearedevent": {"qualifications_urn": "qualifications", "asset_ids": "assets"},
+        "roto": {"feared_event_ids": "feared_events"},
+        "stakeholder": {"applied_controls": "applied_controls"},
+        "attackpath": {"stakeholder_ids": "stakeholders"},
+        "operationalscenario": {"threat_ids": "threats"},
+    }
+
+    # save() overrides which do nothing on imported objects besides validating them
+    # and refreshing metrics, both handled by the import itself
+    bulk_import_save_classes = (
+        models.Model,
+        AbstractBaseModel,
+        PublishInRootFolderMixin,
+        RequirementAssessment,
+    )
+
+    # Fields defining the scope of uniqueness checks, as in AbstractBaseModel.get_scope
+    import_scope_fields = (
+        "risk_scenario",
+        "risk_assessment",
+        "perimeter",
+        "folder",
+        "parent_folder",
+    )
+
     def _create_model_objects(self, model, objects, link_dump_database_ids):
         """Create all objects for a model after validation."""
         logger.debug("Creating objects for model", model=model)
@@ -3014,7 +3126,7 @@ class FolderViewSet(BaseModelViewSet):
         logger.debug("Model objects", model=model, count=len(model_objects))
 
         if not model_objects:
-            return
+            return []
 
         # Handle self-referencing dependencies
         self_ref_field = get_self_referencing_field(model)
@@ -3029,17 +3141,44 @@ class FolderViewSet(BaseModelViewSet):
                     {"error": f"Cyclic dependency detected in {model_name}"}
                 )
 
+        # Values of the fields to keep unique, per scope, for objects created in bulk
+        unique_values = {}
+        created_objects = []
         # Process creation in batches
         for i in range(0, len(model_objects), self.batch_size):
             batch = model_objects[i : i + self.batch_size]
-            self._create_batch(
+            created_objects += self._create_batch(
                 model=model,
                 batch=batch,
                 link_dump_database_ids=link_dump_database_ids,
+                unique_values=unique_values,
             )
+        return created_objects
+
+    def _can_bulk_create(self, model) -> bool:
+        """Whether objects of the model can be created without calling save()."""
+        return all(
+            cls in self.bulk_import_save_classes
+            for cls in model.__mro__
+            if "save" in vars(cls)
+        )
+
+    def _create_batch(self, model, batch, link_dump_database_ids, unique_values):
+        """
+        Create a batch of objects with proper relationship handling.
 
-    def _create_batch(self, model, batch, link_dump_database_ids):
-        """Create a batch of objects with proper relationship handling."""
+        Foreign keys are resolved for the whole batch beforehand. Objects whose save()
+        has no side effect besides metrics are created with a single bulk insert, the
+        others one by one; many-to-many relations are then inserted in bulk.
+        As bulk inserts do not send the model signals, the audit log entries of the
+        objects and relations created in bulk are written explicitly.
+        """
+        bulk_create = self._can_bulk_create(model)
+        related_objects = self._resolve_foreign_keys(
+            model, batch, link_dump_database_ids
+        )
+        created_objects = []
+        many_to_many = []
         # Create all objects in the batch within a single transaction
         with transaction.atomic():
             for obj in batch:
@@ -3064,27 +3203,25 @@ class FolderViewSet(BaseModelViewSet):
                         fields=fields,
                         link_dump_database_ids=link_dump_database_ids,
                         many_to_many_map_ids=many_to_many_map_ids,
+                        related_objects=related_objects,
                     )
 
-                    try:
-                        # Run clean to validate unique constraints
-                        model(**fields).clean()
-                    except ValidationError as e:
-                        for field, error in e.error_dict.items():
-                            fields[field] = f"{fields[field]} {uuid.uuid4()}"
+                    obj_created = model(**fields)
+                    if bulk_create:
+                        self._ensure_unique_in_scope(obj_created, unique_values)
+                    else:
+                        try:
+                            # Run clean to validate unique constraints
+                            obj_created.clean()
+                        except ValidationError as e:
+                            self._make_unique(obj_created, e.error_dict)
 
-                    logger.debug("Creating object", fields=fields)
+                        logger.debug("Creating object", fields=fields)
+                        obj_created.save(force_insert=True)
 
-                    # Create the object
-                    obj_created = model.objects.create(**fields)
                     link_dump_database_ids[obj_id] = obj_created.id
-
-                    # Handle many-to-many relationships
-                    self._set_many_to_many_relations(
-                        model=model,
-                        obj=obj_created,
-                        many_to_many_map_ids=many_to_many_map_ids,
-                    )
+                    created_objects.append(obj_created)
+                    many_to_many.append((obj_created, many_to_many_map_ids))
 
                 except Exception as e:
                     logger.error("Error creating object", obj=obj, exc_info=True)
@@ -3093,12 +3230,110 @@ class FolderViewSet(BaseModelViewSet):
                         f"Error creating {model._meta.model_name}: {str(e)}"
                     )
 
+            try:
+                if bulk_create:
+                    # Ids are generated on instantiation, so that they can be linked
+                    # before the objects are inserted
+                    model.objects.bulk_create(created_objects)
+                    log_bulk_changes((None, obj) for obj in created_objects)
+                # Handle many-to-many relationships
+                self._set_many_to_many_relations(model=model, objects=many_to_many)
+            except Exception as e:
+                logger.error(
+                    "Error creating objects",
+                    model=model._meta.model_name,
+                    exc_info=True,
+                )
+                raise ValidationError(
+                    f"Error creating {model._meta.model_name}: {str(e)}"
+                )
+        return created_objects
+
+    def _make_unique(self, obj, error_dict):
+        """Suffix the fields failing the uniqueness check of obj with a random UUID."""
+        for field in error_dict:
+            setattr(obj, field, f"{getattr(obj, field)} {uuid.uuid4()}")
+
+    def _ensure_unique_in_scope(self, obj, unique_values):
+        """
+        In-memory counterpart of AbstractBaseModel.clean for objects created in bulk.
+
+        The scope of imported objects is made of objects of the same import, so
+        uniqueness is checked against the values of the objects already imported,
+        kept in unique_values. Objects without a scope are checked in database.
+        """
+        fields_to_check = getattr(obj, "fields_to_check", [])
+        if not fields_to_check:
+            return
+        scope = next(
+            (
+                (field, getattr(obj, f"{field}_id"))
+                for field in self.import_scope_fields
+                if getattr(obj, f"{field}_id", None) is not None
+            ),
+            None,
+        )
+        if scope is None:
+            try:
+                obj.clean()
+            except ValidationError as e:
+                self._make_unique(obj, e.error_dict)
+
+        def values():
+            result = {}
+            for field in fields_to_check:
+                model_field = obj._meta.get_field(field)
+                value = getattr(obj, model_field.attname)
+                # iexact lookups are used for fields other than foreign keys
+                if isinstance(value, str) and not model_field.is_relation:
+                    value = value.lower()
+                result[field] = value
+            return result
+
+        scope_values = unique_values.setdefault(scope, defaultdict(set))
+        current = values()
+        if tuple(current.values()) in scope_values[None]:
+            self._make_unique(
+                obj,
+                [
+                    field
+                    for field, value in current.items()
+                    if value in scope_values[field]
+                ],
+            )
+            current = values()
+        scope_values[None].add(tuple(current.values()))
+        for field, value in current.items():
+            scope_values[field].add(value)
+
+    def _resolve_foreign_keys(self, model, batch, link_dump_database_ids):
+        """
+        Fetch the objects referenced by the foreign keys of a batch, with one query
+        per field. Returns {field: {lookup value: object}}.
+        """
+        related_objects = {}
+        for field, (related_model, lookup) in self.import_foreign_keys.get(
+            model._meta.model_name, {}
+        ).items():
+            values = {obj.get("fields", {}).get(field) for obj in batch} - {None, ""}
+            if lookup == "id" or field == "reference_control":
+                values = {link_dump_database_ids.get(value) for value in values}
+            values.discard(None)
+            related_objects[field] = {
+                getattr(related_object, lookup): related_object
+                for related_object in related_model.objects.filter(
+                    **{f"{lookup}__in": values}
+                )
+            }
+        return related_objects
+
     def _process_model_relationships(
         self,
         model,
         fields,
         link_dump_database_ids,
         many_to_many_map_ids,
+        related_objects,
     ):
         """Process model-specific relationships."""
 
@@ -3116,56 +3351,38 @@ class FolderViewSet(BaseModelViewSet):
             "Processing model relationships", model=model_name, _fields=_fields
         )
 
+        for field, (related_model, lookup) in self.import_foreign_keys.get(
+            model_name, {}
+        ).items():
+            value = _fields.get(field)
+            if lookup == "id" or field == "reference_control":
+                value = link_dump_database_ids.get(value)
+            related_object = related_objects[field].get(value)
+            if (
+                related_object is None
+                and (model_name, field) not in self.import_optional_foreign_keys
+            ):
+                raise related_model.DoesNotExist(
+                    f"{related_model._meta.object_name} matching {lookup}={value} does not exist."
+                )
+            _fields[field] = related_object
+
         match model_name:
             case "asset":
                 many_to_many_map_ids["parent_ids"] = get_mapped_ids(
                     _fields.pop("parent_assets", []), link_dump_database_ids
                 )
 
-            case "riskassessment":
-                _fields["perimeter"] = Perimeter.objects.get(
-                    id=link_dump_database_ids.get(_fields["perimeter"])
-                )
-                _fields["risk_matrix"] = RiskMatrix.objects.get(
-                    urn=_fields.get("risk_matrix")
-                )
-                _fields["ebios_rm_study"] = (
-                    EbiosRMStudy.objects.get(
-                        id=link_dump_database_ids.get(_fields["ebios_rm_study"])
-                    )
-                    if _fields.get("ebios_rm_study")
-                    else None
-                )
-
-            case "complianceassessment":
-                _fields["perimeter"] = Perimeter.objects.get(
-                    id=link_dump_database_ids.get(_fields["perimeter"])
-                )
-                _fields["framework"] = Framework.objects.get(urn=_fields["framework"])
-
             case "appliedcontrol":
                 many_to_many_map_ids["evidence_ids"] = get_mapped_ids(
                     _fields.pop("evidences", []), link_dump_database_ids
                 )
-                ref_control_id = link_dump_database_ids.get(
-                    _fields["reference_control"]
-                )
-                _fields["reference_control"] = ReferenceControl.objects.filter(
-                    urn=ref_control_id
-                ).first()
 
             case "evidence":
                 _fields.pop("size", None)
                 _fields.pop("attachment_hash", None)
 
             case "requirementassessment":
-                logger.debug("Looking for requirement", urn=_fields.get("requirement"))
-                _fields["requirement"] = RequirementNode.objects.get(
-                    urn=_fields.get("requirement")
-                )
-                _fields["compliance_assessment"] = ComplianceAssessment.objects.get(
-                    id=link_dump_database_ids.get(_fields["compliance_assessment"])
-                )
                 many_to_many_map_ids.update(
                     {
                         "applied_controls": get_mapped_ids(
@@ -3183,24 +3400,9 @@ class FolderViewSet(BaseModelViewSet):
                 )
 
             case "riskscenario":
-                _fields["risk_assessment"] = RiskAssessment.objects.get(
-                    id=link_dump_database_ids.get(_fields["risk_assessment"])
-                )
                 # Process all related _fields at once
-                related__fields = [
-                    "threats",
-                    "vulnerabilities",
-                    "assets",
-                    "applied_controls",
-                    "existing_applied_controls",
-                ]
-                for field in related__fields:
-                    map_key = (
-                        f"{field.rstrip('s')}_ids"
-                        if not field.endswith("controls")
-                        else f"{field}_ids"
-                    )
-                    many_to_many_map_ids[map_key] = get_mapped_ids(
+                for field in self.import_many_to_many_fields["riskscenario"]:
+                    many_to_many_map_ids[field] = get_mapped_ids(
                         _fields.pop(field, []), link_dump_database_ids
                     )
 
@@ -3208,16 +3410,6 @@ class FolderViewSet(BaseModelViewSet):
                 _fields.pop("owned_folders", None)
 
             case "ebiosrmstudy":
-                _fields.update(
-                    {
-                        "risk_matrix": RiskMatrix.objects.get(
-                            urn=_fields.get("risk_matrix")
-                        ),
-                        "reference_entity": Entity.objects.get(
-                            id=link_dump_database_ids.get(_fields["reference_entity"])
-                        ),
-                    }
-                )
                 many_to_many_map_ids.update(
                     {
                         "asset_ids": get_mapped_ids(
@@ -3231,9 +3423,6 @@ class FolderViewSet(BaseModelViewSet):
                 )
 
             case "fearedevent":
-                _fields["ebios_rm_study"] = EbiosRMStudy.objects.get(
-                    id=link_dump_database_ids.get(_fields["ebios_rm_study"])
-                )
                 many_to_many_map_ids.update(
                     {
                         "qualifications_urn": get_mapped_ids(
@@ -3246,167 +3435,84 @@ class FolderViewSet(BaseModelViewSet):
                 )
 
             case "roto":
-                _fields["ebios_rm_study"] = EbiosRMStudy.objects.get(
-                    id=link_dump_database_ids.get(_fields["ebios_rm_study"])
-                )
                 many_to_many_map_ids["feared_event_ids"] = get_mapped_ids(
                     _fields.pop("feared_events", []), link_dump_database_ids
                 )
 
             case "stakeholder":
-                _fields.update(
-                    {
-                        "ebios_rm_study": EbiosRMStudy.objects.get(
-                            id=link_dump_database_ids.get(_fields["ebios_rm_study"])
-                        ),
-                        "entity": Entity.objects.get(
-                            id=link_dump_database_ids.get(_fields["entity"])
-                        ),
-                    }
-                )
                 many_to_many_map_ids["applied_controls"] = get_mapped_ids(
                     _fields.pop("applied_controls", []), link_dump_database_ids
                 )
 
-            case "strategicscenario":
-                _fields.update(
-                    {
-                        "ebios_rm_study": EbiosRMStudy.objects.get(
-                            id=link_dump_database_ids.get(_fields["ebios_rm_study"])
-                        ),
-                        "ro_to_couple": RoTo.objects.get(
-                            id=link_dump_database_ids.get(_fields["ro_to_couple"])
-                        ),
-                    }
-                )
-
             case "attackpath":
-                _fields.update(
-                    {
-                        "ebios_rm_study": EbiosRMStudy.objects.get(
-                            id=link_dump_database_ids.get(_fields["ebios_rm_study"])
-                        ),
-                        "strategic_scenario": StrategicScenario.objects.get(
-                            id=link_dump_database_ids.get(_fields["strategic_scenario"])
-                        ),
-                    }
-                )
                 many_to_many_map_ids["stakeholder_ids"] = get_mapped_ids(
                     _fields.pop("stakeholders", []), link_dump_database_ids
                 )
 
             case "operationalscenario":
-                _fields.update(
-                    {
-                        "ebios_rm_study": EbiosRMStudy.objects.get(
-                            id=link_dump_database_ids.get(_fields["ebios_rm_study"])
-                        ),
-                        "attack_path": AttackPath.objects.get(
-                            id=link_dump_database_ids.get(_fields["attack_path"])
-                        ),
-                    }
-                )
                 many_to_many_map_ids["threat_ids"] = get_mapped_ids(
                     _fields.pop("threats", []), link_dump_database_ids
                 )
 
         return _fields
 
-    def _set_many_to_many_relations(self, model, obj, many_to_many_map_ids):
-        """Set many-to-many relationships after object creation."""
-        model_name = model._meta.model_name
-
-        match model_name:
-            case "asset":
-                if parent_ids := many_to_many_map_ids.get("parent_ids"):
-                    logger.debug(
-                        "Setting parent assets", asset=obj, parent_ids=parent_ids
-                    )
-                    obj.parent_assets.set(Asset.objects.filter(id__in=parent_ids))
-
-            case "appliedcontrol":
-                if evidence_ids := many_to_many_map_ids.get("evidence_ids"):
-                    obj.evidences.set(Evidence.objects.filter(id__in=evidence_ids))
-
-            case "requirementassessment":
-                if applied_control_ids := many_to_many_map_ids.get("applied_controls"):
-                    obj.applied_controls.set(
-                        AppliedControl.objects.filter(id__in=applied_control_ids)
-                    )
-                if evidence_ids := many_to_many_map_ids.get("evidence_ids"):
-                    obj.evidences.set(Evidence.objects.filter(id__in=evidence_ids))
-
-            case "vulnerability":
-                if applied_control_ids := many_to_many_map_ids.get("applied_controls"):
-                    obj.applied_controls.set(
-                        AppliedControl.objects.filter(id__in=applied_control_ids)
-                    )
-
-            case "riskscenario":
-                if threat_ids := many_to_many_map_ids.get("threat_ids"):
-                    uuids, urns = self._split_uuids_urns(threat_ids)
-                    obj.threats.set(
-                        Threat.objects.filter(Q(id__in=uuids) | Q(urn__in=urns))
-                    )
-
-                for field, model_class in {
-                    "vulnerability_ids": (Vulnerability, "vulnerabilities"),
-                    "asset_ids": (Asset, "assets"),
-                    "applied_control_ids": (AppliedControl, "applied_controls"),
-                    "existing_applied_control_ids": (
-                        AppliedControl,
-                        "existing_applied_controls",
+    def _set_many_to_many_relations(self, model, objects):
+        """
+        Set many-to-many relationships after objects creation, with one query and one
+        bulk insert per field. objects is a list of (object, many_to_many_map_ids).
+        """
+        for map_key, field_name in self.import_many_to_many_fields.get(
+            model._meta.model_name, {}
+        ).items():
+            ids = {id for _, map_ids in objects for id in map_ids.get(map_key, [])}
+            if not ids:
+                continue
+            field = model._meta.get_field(field_name)
+            related_model = field.related_model
+            # Library objects are referenced by URN, imported ones by id
+            uuids, urns = self._split_uuids_urns(list(ids))
+            query = Q(id__in=uuids)
+            lookups = ["id"]
+            if urns and any(f.name == "urn" for f in related_model._meta.fields):
+                query |= Q(urn__in=urns)
+                lookups.append("urn")
+            related_ids = {}
+            for values in related_model.objects.filter(query).values_list(*lookups):
+                for value in values:
+                    related_ids[str(value)] = values[0]
+
+            through = field.remote_field.through
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            links = [
+                (
+                    obj,
+                    dict.fromkeys(
+                        related_ids[str(id)]
+                        for id in map_ids.get(map_key, [])
+                        if str(id) in related_ids
                     ),
-                }.items():
-                    if ids := many_to_many_map_ids.get(field):
-                        getattr(obj, model_class[1]).set(
-                            model_class[0].objects.filter(id__in=ids)
-                        )
-
-            case "ebiosrmstudy":
-                if asset_ids := many_to_many_map_ids.get("asset_ids"):
-                    obj.assets.set(Asset.objects.filter(id__in=asset_ids))
-                if compliance_assessment_ids := many_to_many_map_ids.get(
-                    "compliance_assessment_ids"
-                ):
-                    obj.compliance_assessments.set(
-                        ComplianceAssessment.objects.filter(
-                            id__in=compliance_assessment_ids
+                )
+                for obj, map_ids in objects
+            ]
+            through.objects.bulk_create(
+                through(**{source: obj.id, target: related_id})
+                for obj, obj_related_ids in links
+                for related_id in obj_related_ids
+            )
+            # Send the signal add() would, which auditlog relies on for audited fields
+            if m2m_changed.has_listeners(through):
+                for obj, obj_related_ids in links:
+                    if obj_related_ids:
+                        m2m_changed.send(
+                            sender=through,
+                            instance=obj,
+                            action="post_add",
+                            reverse=False,
+                            model=related_model,
+                            pk_set=set(obj_related_ids),
+                            using=through.objects.db,
                         )
-                    )
-
-            case "fearedevent":
-                if qualifications_urn := many_to_many_map_ids.get("qualifications_urn"):
-                    obj.qualifications.set(
-                        Qualification.objects.filter(urn__in=qualifications_urn)
-                    )
-                if asset_ids := many_to_many_map_ids.get("asset_ids"):
-                    obj.assets.set(Asset.objects.filter(id__in=asset_ids))
-
-            case "roto":
-                if feared_event_ids := many_to_many_map_ids.get("feared_event_ids"):
-                    obj.feared_events.set(
-                        FearedEvent.objects.filter(id__in=feared_event_ids)
-                    )
-
-            case "stakeholder":
-                if applied_control_ids := many_to_many_map_ids.get("applied_controls"):
-                    obj.applied_controls.set(
-                        AppliedControl.objects.filter(id__in=applied_control_ids)
-                    )
-
-            case "attackpath":
-                if stakeholder_ids := many_to_many_map_ids.get("stakeholder_ids"):
-                    obj.stakeholders.set(
-                        Stakeholder.objects.filter(id__in=stakeholder_ids)
-                    )
-
-            case "operationalscenario":
-                if threat_ids := many_to_many_map_ids.get("threat_ids"):
-                    uuids, urns = self._split_uuids_urns(threat_ids)
-                    obj.threats.set(
-                        Threat.objects.filter(Q(id__in=uuids) | Q(urn__in=urns))
-                    )
 
     def _split_uuids_urns(self, ids: List[str]) -> Tuple[List[str], List[str]]:
         """Split a list of strings into UUIDs and URNs."""
@@ -3485,7 +3591,7 @@ def get_counters_view(request):
     """
     API endpoint that returns the counters
     """
-    return Response({"results": get_counters(request.user)})
+    return Response({"results": get_metrics_snapshot("counters", request.user)})
 
 
 @api_view(["GET"])
@@ -3495,7 +3601,9 @@ def get_metrics_view(request):
     API endpoint that returns the counters
     """
     folder_id = request.query_params.get("folder", None)
-    return Response({"results": get_metrics(request.user, folder_id)})
+    return Response(
+        {"results": get_metrics_snapshot("metrics", request.user, folder_id)}
+    )
 
 
 # TODO: Add all the proper docstrings for the following list of functions
@@ -4521,6 +4629,7 @@ class ComplianceAssessmentViewSet(BaseModelViewSet):
             ra_null_documentation_score.update(
                 documentation_score=compliance_assessment.min_score
             )
+            compliance_assessment.invalidate_summary()
 
     @action(detail=False, name="Compliance assessments per status")
     def per_status(self, request):
@@ -4654,7 +4763,7 @@ class ComplianceAssessmentViewSet(BaseModelViewSet):
         compliance_assessment = ComplianceAssessment.objects.get(id=pk)
         if not RoleAssignment.is_access_allowed(
             user=request.user,
-            perm=Permission.objects.get(codename="add_appliedcontrol"),
+            perm=PermissionRegistry.get("add_appliedcontrol"),
             folder=compliance_assessment.folder,
         ):
             return Response(status=status.HTTP_403_FORBIDDEN)
@@ -4682,7 +4791,7 @@ class ComplianceAssessmentViewSet(BaseModelViewSet):
 
         if not RoleAssignment.is_access_allowed(
             user=request.user,
-            perm=Permission.objects.get(codename="change_requirementassessment"),
+            perm=PermissionRegistry.get("change_requirementassessment"),
             folder=compliance_assessment.folder,
         ):
             return Response(status=status.HTTP_403_FORBIDDEN)
@@ -4861,7 +4970,7 @@ class RequirementAssessmentViewSet(BaseModelViewSet):
         requirement_assessment = RequirementAssessment.objects.get(id=pk)
         if not RoleAssignment.is_access_allowed(
             user=request.user,
-            perm=Permission.objects.get(codename="add_appliedcontrol"),
+            perm=PermissionRegistry.get("add_appliedcontrol"),
             folder=requirement_assessment.folder,
         ):
             return Response(status=status.HTTP_403_FORBIDDEN)
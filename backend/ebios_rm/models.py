@@ -277,11 +277,11 @@ class FearedEvent(NameDescriptionMixin, FolderMixin):
                 "value": -1,
                 "hexcolor": "#f9fafb",
             }
-        risk_matrix = parsed_matrix
-        if not risk_matrix["impact"][gravity].get("hexcolor"):
-            risk_matrix["impact"][gravity]["hexcolor"] = "#f9fafb"
+        # The parsed matrix is shared, the default color is only set on the copy
+        definition = parsed_matrix["impact"][gravity]
         return {
-            **risk_matrix["impact"][gravity],
+            **definition,
+            "hexcolor": definition.get("hexcolor") or "#f9fafb",
             "value": gravity,
         }
 
@@ -712,11 +712,11 @@ class OperationalScenario(AbstractBaseModel, FolderMixin):
                 "value": -1,
                 "hexcolor": "#f9fafb",
             }
-        risk_matrix = parsed_matrix
-        if not risk_matrix["probability"][likelihood].get("hexcolor"):
-            risk_matrix["probability"][likelihood]["hexcolor"] = "#f9fafb"
+        # The parsed matrix is shared, the default color is only set on the copy
+        definition = parsed_matrix["probability"][likelihood]
         return {
-            **risk_matrix["probability"][likelihood],
+            **definition,
+            "hexcolor": definition.get("hexcolor") or "#f9fafb",
             "value": likelihood,
         }
 
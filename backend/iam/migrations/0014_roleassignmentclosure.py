@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_closure(apps, schema_editor):
+    Folder = apps.get_model("iam", "Folder")
+    RoleAssignment = apps.get_model("iam", "RoleAssignment")
+    RoleAssignmentClosure = apps.get_model("iam", "RoleAssignmentClosure")
+
+    children_map = defaultdict(list)
+    for folder_id, parent_id in Folder.objects.values_list("id", "parent_folder_id"):
+        children_map[parent_id].append(folder_id)
+
+    closure = []
+    for ra in RoleAssignment.objects.prefetch_related("perimeter_folders"):
+        folder_ids = set()
+        stack = [f.id for f in ra.perimeter_folders.all()]
+        while stack:
+            folder_id = stack.pop()
+            if folder_id in folder_ids:
+                continue
+            folder_ids.add(folder_id)
+            if ra.is_recursive:
+                stack.extend(children_map.get(folder_id, []))
+        closure.extend(
+            RoleAssignmentClosure(role_assignment_id=ra.id, folder_id=folder_id)
+            for folder_id in folder_ids
+        )
+    RoleAssignmentClosure.objects.bulk_create(closure)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("iam", "0013_personalaccesstoken"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoleAssignmentClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "folder",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="iam.folder",
+                    ),
+                ),
+                (
+                    "role_assignment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="closure",
+                        to="iam.roleassignment",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("role_assignment", "folder")},
+            },
+        ),
+        migrations.RunPython(populate_closure, migrations.RunPython.noop),
+    ]
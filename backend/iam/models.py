@@ -2,11 +2,18 @@
 Inspired from Azure IAM model"""
 
 from collections import defaultdict
+import copy
+import hashlib
+from contextvars import ContextVar, Token
 from typing import Any, List, Self, Tuple, Generator
 import uuid
 from allauth.account.models import EmailAddress
 from django.utils import timezone
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AnonymousUser, Permission
@@ -46,15 +53,28 @@ logger = structlog.get_logger(__name__)
 from auditlog.registry import auditlog
 
 
-def _get_root_folder():
-    """helper function outside of class to facilitate serialization
-    to be used only in Folder class"""
+def _query_root_folder():
     try:
         return Folder.objects.get(content_type=Folder.ContentType.ROOT)
     except:
         return None
 
 
+def _get_cached_root_folder():
+    # The root folder is cached by the RBAC context of the request rather than for
+    # the process, as a backup restore replaces it without sending signals
+    context = RBACContext.get_current()
+    return context.get_root_folder() if context else _query_root_folder()
+
+
+def _get_root_folder():
+    """helper function outside of class to facilitate serialization
+    to be used only in Folder class"""
+    root_folder = _get_cached_root_folder()
+    # Callers get their own copy, so that they cannot modify the cached instance
+    return copy.copy(root_folder) if root_folder else None
+
+
 class Folder(NameDescriptionMixin):
     """A folder is a container for other folders or any object
     Folders are organized in a tree structure, with a single root folder
@@ -67,12 +87,14 @@ class Folder(NameDescriptionMixin):
         return _get_root_folder()
 
     @staticmethod
-    def get_root_folder_id() -> uuid.UUID:
+    def get_root_folder_id() -> uuid.UUID | None:
         """class function for general use"""
-        try:
-            return _get_root_folder().id
-        except:
-            return _get_root_folder()
+        root_folder = _get_cached_root_folder()
+        return root_folder.id if root_folder else None
+
+    @staticmethod
+    def clear_root_folder_cache(**kwargs) -> None:
+        RBACContext.clear_current()
 
     class ContentType(models.TextChoices):
         """content type for a folder"""
@@ -105,22 +127,96 @@ class Folder(NameDescriptionMixin):
     def __str__(self) -> str:
         return self.name.__str__()
 
-    def get_sub_folders(self) -> Generator[Self, None, None]:
-        """Return the list of subfolders"""
+    @staticmethod
+    def get_children_map() -> dict[uuid.UUID, list[uuid.UUID]]:
+        """Return the whole folder tree as a mapping parent_folder_id -> children ids, in one query"""
+        children = defaultdict(list)
+        for folder_id, parent_id in Folder.objects.values_list(
+            "id", "parent_folder_id"
+        ):
+            children[parent_id].append(folder_id)
+        return children
+
+    @staticmethod
+    def _tree_subquery(folders, descendants: bool) -> RawSQL:
+        """
+        Build a recursive CTE walking the folder tree from the given folders (ids or queryset)
+        Descendants include the given folders, ancestors do not
+        """
+        if not isinstance(folders, models.QuerySet):
+            folders = Folder.objects.filter(id__in=list(folders))
+        base_sql, params = folders.values("id").query.sql_with_params()
+        qn = connection.ops.quote_name
+        table = qn(Folder._meta.db_table)
+        parent = qn(Folder._meta.get_field("parent_folder").column)
+        if descendants:
+            sql = (
+                f"WITH RECURSIVE tree(id) AS ("
+                f"SELECT id FROM {table} WHERE id IN ({base_sql}) "
+                f"UNION SELECT f.id FROM {table} f JOIN tree t ON f.{parent} = t.id"
+                f") SELECT id FROM tree"
+            )
+        else:
+            sql = (
+                f"WITH RECURSIVE tree(id) AS ("
+                f"SELECT {parent} FROM {table} WHERE id IN ({base_sql}) "
+                f"UNION SELECT f.{parent} FROM {table} f JOIN tree t ON f.id = t.id"
+                f") SELECT id FROM tree WHERE id IS NOT NULL"
+            )
+        return RawSQL(sql, params)
 
-        def sub_folders_in(folder):
-            for sub_folder in folder.folder_set.all():
-                yield sub_folder
-                yield from sub_folders_in(sub_folder)
+    @staticmethod
+    def sub_folders_subquery(folders) -> RawSQL:
+        """Lazy subquery of the ids of the given folders and of all their sub folders"""
+        return Folder._tree_subquery(folders, descendants=True)
 
-        yield from sub_folders_in(self)
+    @staticmethod
+    def parent_folders_subquery(folders) -> RawSQL:
+        """Lazy subquery of the ids of all the parent folders of the given folders"""
+        return Folder._tree_subquery(folders, descendants=False)
+
+    @staticmethod
+    def get_sub_folder_ids(
+        folder_ids, children_map: dict | None = None
+    ) -> set[uuid.UUID]:
+        """Return the ids of the given folders and of all their sub folders
+        A children map can be given to avoid querying the database when called repeatedly
+        """
+        if children_map is None:
+            return set(
+                Folder.objects.filter(
+                    id__in=Folder.sub_folders_subquery(folder_ids)
+                ).values_list("id", flat=True)
+            )
+        result = set()
+        stack = list(folder_ids)
+        while stack:
+            folder_id = stack.pop()
+            if folder_id in result:
+                continue
+            result.add(folder_id)
+            stack.extend(children_map.get(folder_id, []))
+        return result
+
+    def get_sub_folders(self) -> Generator[Self, None, None]:
+        """Return the list of subfolders, in one query"""
+        yield from Folder.objects.filter(
+            id__in=Folder.sub_folders_subquery([self.id])
+        ).exclude(id=self.id)
 
     # Should we update data-model.md now that this method is a generator ?
     def get_parent_folders(self) -> Generator[Self, None, None]:
-        """Return the list of parent folders"""
-        current_folder = self
-        while (current_folder := current_folder.parent_folder) is not None:
+        """Return the list of parent folders, from the closest one to the root folder, in one query"""
+        parent_folders = {
+            folder.id: folder
+            for folder in Folder.objects.filter(
+                id__in=Folder.parent_folders_subquery([self.id])
+            )
+        }
+        current_folder_id = self.parent_folder_id
+        while (current_folder := parent_folders.get(current_folder_id)) is not None:
             yield current_folder
+            current_folder_id = current_folder.parent_folder_id
 
     @staticmethod
     def _navigate_structure(start, path):
@@ -255,7 +351,8 @@ class PublishInRootFolderMixin(models.Model):
 
     def save(self, *args, **kwargs):
         if (
-            getattr(self, "folder") == Folder.get_root_folder()
+            getattr(self, "folder_id") is not None
+            and getattr(self, "folder_id") == Folder.get_root_folder_id()
             and hasattr(self, "is_published")
             and not self.is_published
         ):
@@ -569,7 +666,7 @@ class User(AbstractBaseUser, AbstractBaseModel, FolderMixin):
     def has_backup_permission(self) -> bool:
         return RoleAssignment.is_access_allowed(
             user=self,
-            perm=Permission.objects.get(codename="backup"),
+            perm=PermissionRegistry.get("backup"),
             folder=Folder.get_root_folder(),
         )
 
@@ -686,22 +783,9 @@ class RoleAssignment(NameDescriptionMixin, FolderMixin):
     ) -> bool:
         """
         Determines if a user has specified permission on a specified folder
+        Uses the RBAC context of the current request if any
         """
-        add_tag_permission = Permission.objects.get(codename="add_filteringlabel")
-        for ra in RoleAssignment.get_role_assignments(user):
-            if (
-                (perm == add_tag_permission) and perm in ra.role.permissions.all()
-            ):  # Allow any user to add tags if he has the permission
-                return True
-            f = folder
-            while f is not None:
-                if (
-                    f in ra.perimeter_folders.all()
-                    and perm in ra.role.permissions.all()
-                ):
-                    return True
-                f = f.parent_folder
-        return False
+        return RBACContext.get_current_or_new().is_access_allowed(user, perm, folder)
 
     @staticmethod
     def is_object_readable(
@@ -714,7 +798,7 @@ class RoleAssignment(NameDescriptionMixin, FolderMixin):
         if not obj:
             return False
         class_name = object_type.__name__.lower()
-        permission = Permission.objects.get(codename="view_" + class_name)
+        permission = PermissionRegistry.get("view_" + class_name)
         return RoleAssignment.is_access_allowed(
             user, permission, Folder.get_folder(obj)
         )
@@ -731,34 +815,99 @@ class RoleAssignment(NameDescriptionMixin, FolderMixin):
         Returns the list of the ids of the matching folders
         If permission is specified, returns accessible folders which can be altered with this specific permission
         """
-        folders_set = set()
-        ref_permission = Permission.objects.get(codename=codename)
-        # first get all accessible folders, independently of contentType
-        for ra in [
-            x
-            for x in RoleAssignment.get_role_assignments(user)
-            if (
-                (
-                    Permission.objects.get(codename="view_folder")
-                    in x.role.permissions.all()
+        role_assignments = (
+            RoleAssignment.get_role_assignments_queryset(user)
+            .filter(role__permissions__codename="view_folder")
+            .filter(role__permissions__codename=codename)
+        )
+        # accessible folders are the perimeter folders of the role assignments along
+        # with their sub folders, within the given folder
+        folders = Folder.objects.filter(
+            id__in=Folder.sub_folders_subquery(
+                Folder.objects.filter(perimeter_folders__in=role_assignments)
+            )
+        ).filter(id__in=Folder.sub_folders_subquery([folder.id]))
+        if content_type:
+            folders = folders.filter(content_type=content_type)
+        return list(folders.values_list("id", flat=True))
+
+    @staticmethod
+    def get_folder_lookup(object_type: Any) -> str:
+        """Return the lookup path from an object type to the folder used for RBAC"""
+        if hasattr(object_type, "folder"):
+            return "folder"
+        elif hasattr(object_type, "risk_assessment"):
+            return "risk_assessment__folder"
+        elif hasattr(object_type, "entity"):
+            return "entity__folder"
+        elif hasattr(object_type, "provider_entity"):
+            return "provider_entity__folder"
+        elif hasattr(object_type, "parent_folder"):
+            return "id"
+        raise NotImplementedError("type not supported")
+
+    @staticmethod
+    def get_accessible_folders_queryset(
+        folder: Folder,
+        user: AbstractBaseUser | AnonymousUser,
+        codename: str,
+    ) -> models.QuerySet:
+        """Gets a lazy queryset of the ids of the folders on which a user has a permission, within a given folder
+        Only role assignments granting view_folder are considered
+        """
+        # the closure gives the folders reached by each role assignment,
+        # permissions are resolved by joining the role of the assignment
+        accessible_folders = RoleAssignmentClosure.objects.filter(
+            role_assignment__in=RoleAssignment.get_role_assignments_queryset(
+                user
+            ).filter(role__permissions__codename="view_folder"),
+            role_assignment__role__permissions__codename=codename,
+        )
+        if folder.content_type != Folder.ContentType.ROOT:
+            accessible_folders = accessible_folders.filter(
+                folder_id__in=Folder.sub_folders_subquery([folder.id])
+            )
+        return accessible_folders.values("folder_id")
+
+    @staticmethod
+    def get_accessible_queryset(
+        folder: Folder,
+        user: AbstractBaseUser | AnonymousUser,
+        object_type: Any,
+        codename: str | None = None,
+    ) -> models.QuerySet:
+        """Gets a lazy queryset of the objects of a specified type on which a user has a permission in a given folder
+        The permission defaults to the view permission of the object type
+        Assumes that object type follows Django conventions for permissions
+        Also retrieve published objects in view
+        """
+        codename_view = "view_" + object_type.__name__.lower()
+        codename = codename or codename_view
+        accessible_folders = RoleAssignment.get_accessible_folders_queryset(
+            folder, user, codename
+        )
+        filters = Q(
+            **{
+                f"{RoleAssignment.get_folder_lookup(object_type)}__in": Subquery(
+                    accessible_folders
                 )
-                and (ref_permission in x.role.permissions.all())
+            }
+        )
+        if (
+            codename == codename_view
+            and hasattr(object_type, "is_published")
+            and hasattr(object_type, "folder")
+        ):
+            # we assume only objects with a folder attribute are worth publishing
+            filters |= Q(
+                folder__in=Folder.parent_folders_subquery(
+                    Folder.objects.filter(id__in=Subquery(accessible_folders)).exclude(
+                        content_type=Folder.ContentType.ENCLAVE
+                    )
+                ),
+                is_published=True,
             )
-        ]:
-            for f in ra.perimeter_folders.all():
-                folders_set.add(f)
-                folders_set.update(f.get_sub_folders())
-        # calculate perimeter
-        perimeter = set()
-        perimeter.add(folder)
-        perimeter.update(folder.get_sub_folders())
-        # return filtered result
-        return [
-            x.id
-            for x in folders_set
-            if (x.content_type == content_type if content_type else True)
-            and x in perimeter
-        ]
+        return object_type.objects.filter(filters)
 
     @staticmethod
     def get_accessible_object_ids(
@@ -769,81 +918,17 @@ class RoleAssignment(NameDescriptionMixin, FolderMixin):
         Returns a triplet: (view_objects_list, change_object_list, delete_object_list)
         Assumes that object type follows Django conventions for permissions
         Also retrieve published objects in view
+        Prefer get_accessible_queryset, which does not materialize the ids
         """
         class_name = object_type.__name__.lower()
-        permission_view = Permission.objects.get(codename="view_" + class_name)
-        permission_change = Permission.objects.get(codename="change_" + class_name)
-        permission_delete = Permission.objects.get(codename="delete_" + class_name)
-        permissions = set([permission_view, permission_change, permission_delete])
-        result_view = set()
-        result_change = set()
-        result_delete = set()
-
-        ref_permission = Permission.objects.get(codename="view_folder")
-        perimeter = {folder} | set(folder.get_sub_folders())
-        # Process role assignments
-        role_assignments = [
-            ra
-            for ra in RoleAssignment.get_role_assignments(user)
-            if ref_permission in ra.role.permissions.all()
-        ]
-        result_folders = defaultdict(set)
-        for ra in role_assignments:
-            ra_permissions = set(ra.role.permissions.all())
-            ra_perimeter = set(ra.perimeter_folders.all())
-            if ra.is_recursive:
-                ra_perimeter.update(
-                    *[folder.get_sub_folders() for folder in ra_perimeter]
-                )
-            target_folders = perimeter & ra_perimeter
-            for p in permissions & ra_permissions:
-                for f in target_folders:
-                    result_folders[f].add(p)
-        for f in result_folders:
-            if hasattr(object_type, "folder"):
-                objects_ids = object_type.objects.filter(folder=f).values_list(
-                    "id", flat=True
-                )
-            elif hasattr(object_type, "risk_assessment"):
-                objects_ids = object_type.objects.filter(
-                    risk_assessment__folder=f
+        return tuple(
+            list(
+                RoleAssignment.get_accessible_queryset(
+                    folder, user, object_type, action + class_name
                 ).values_list("id", flat=True)
-            elif hasattr(object_type, "entity"):
-                objects_ids = object_type.objects.filter(entity__folder=f).values_list(
-                    "id", flat=True
-                )
-            elif hasattr(object_type, "provider_entity"):
-                objects_ids = object_type.objects.filter(
-                    provider_entity__folder=f
-                ).values_list("id", flat=True)
-            elif hasattr(object_type, "parent_folder"):
-                objects_ids = [f.id]
-            else:
-                raise NotImplementedError("type not supported")
-            if permission_view in result_folders[f]:
-                result_view.update(objects_ids)
-            if permission_change in result_folders[f]:
-                result_change.update(objects_ids)
-            if permission_delete in result_folders[f]:
-                result_delete.update(objects_ids)
-
-        if hasattr(object_type, "is_published") and hasattr(object_type, "folder"):
-            # we assume only objects with a folder attribute are worth publishing
-            folders_with_local_view = [
-                f for f in result_folders if permission_view in result_folders[f]
-            ]
-            for my_folder in folders_with_local_view:
-                if my_folder.content_type != Folder.ContentType.ENCLAVE:
-                    my_folder2 = my_folder.parent_folder
-                    while my_folder2:
-                        result_view.update(
-                            object_type.objects.filter(
-                                folder=my_folder2, is_published=True
-                            ).values_list("id", flat=True)
-                        )
-                        my_folder2 = my_folder2.parent_folder
-
-        return (list(result_view), list(result_change), list(result_delete))
+            )
+            for action in ("view_", "change_", "delete_")
+        )
 
     def is_user_assigned(self, user) -> bool:
         """Determines if a user is assigned to the role assignment"""
@@ -861,6 +946,79 @@ class RoleAssignment(NameDescriptionMixin, FolderMixin):
         assignments += list(principal.roleassignment_set.all())
         return assignments
 
+    @staticmethod
+    def get_role_assignments_queryset(
+        principal: AbstractBaseUser | AnonymousUser | UserGroup,
+    ) -> models.QuerySet:
+        """get a queryset of all role assignments attached to a user directly or indirectly"""
+        if isinstance(principal, UserGroup):
+            return RoleAssignment.objects.filter(user_group=principal)
+        if not principal.is_authenticated:
+            return RoleAssignment.objects.none()
+        return RoleAssignment.objects.filter(
+            Q(user=principal) | Q(user_group__in=principal.user_groups.all())
+        )
+
+    @staticmethod
+    def get_permissions_fingerprint(
+        principal: AbstractBaseUser | AnonymousUser | UserGroup,
+    ) -> str:
+        """
+        Returns a digest of the (permission, folder) pairs granted to a principal.
+        Principals sharing a fingerprint see the same objects, so it can key shared caches.
+        """
+        role_folders = sorted(
+            {
+                (str(role_id), str(folder_id))
+                for role_id, folder_id in RoleAssignmentClosure.objects.filter(
+                    role_assignment__in=RoleAssignment.get_role_assignments_queryset(
+                        principal
+                    )
+                ).values_list("role_assignment__role_id", "folder_id")
+            }
+        )
+        role_permissions = sorted(
+            Role.permissions.through.objects.filter(
+                role_id__in={role_id for role_id, _ in role_folders}
+            ).values_list("role_id", "permission_id")
+        )
+        return hashlib.sha256(
+            repr((role_folders, [(str(r), p) for r, p in role_permissions])).encode()
+        ).hexdigest()
+
+    def refresh_closure(self) -> None:
+        """Rebuild the materialized closure of this role assignment"""
+        RoleAssignment.refresh_closures(RoleAssignment.objects.filter(id=self.id))
+
+    @staticmethod
+    def refresh_closures(role_assignments: models.QuerySet | None = None) -> None:
+        """
+        Rebuild the materialized closure of the given role assignments (all of them by default).
+        The closure contains the perimeter folders of each role assignment,
+        along with their sub folders if the role assignment is recursive.
+        """
+        if role_assignments is None:
+            role_assignments = RoleAssignment.objects.all()
+        recursive = dict(role_assignments.values_list("id", "is_recursive"))
+        ra_ids = list(recursive.keys())
+        perimeters = defaultdict(set)
+        for ra_id, folder_id in RoleAssignment.perimeter_folders.through.objects.filter(
+            roleassignment_id__in=ra_ids
+        ).values_list("roleassignment_id", "folder_id"):
+            perimeters[ra_id].add(folder_id)
+        children_map = Folder.get_children_map() if any(recursive.values()) else {}
+        with transaction.atomic():
+            RoleAssignmentClosure.objects.filter(role_assignment_id__in=ra_ids).delete()
+            RoleAssignmentClosure.objects.bulk_create(
+                RoleAssignmentClosure(role_assignment_id=ra_id, folder_id=folder_id)
+                for ra_id, folder_ids in perimeters.items()
+                for folder_id in (
+                    Folder.get_sub_folder_ids(folder_ids, children_map)
+                    if recursive[ra_id]
+                    else folder_ids
+                )
+            )
+
     @staticmethod
     def get_permissions(principal: AbstractBaseUser | AnonymousUser | UserGroup):
         """get all permissions attached to a user directly or indirectly"""
@@ -891,19 +1049,298 @@ class RoleAssignment(NameDescriptionMixin, FolderMixin):
         If recursive is set to True, permissions from recursive role assignments are transmitted
         to the children of its perimeter folders.
         """
+        ra_permissions = defaultdict(set)
+        for ra_id, codename in cls.get_role_assignments_queryset(principal).values_list(
+            "id", "role__permissions__codename"
+        ):
+            ra_permissions[ra_id].update([codename] if codename else [])
+        ra_folders = RoleAssignment.perimeter_folders.through.objects.filter(
+            roleassignment_id__in=list(ra_permissions)
+        ).values_list("roleassignment_id", "folder_id")
+        if recursive:
+            # the closure holds the perimeter folders of the role assignments,
+            # along with their sub folders for recursive ones
+            ra_folders = RoleAssignmentClosure.objects.filter(
+                role_assignment_id__in=list(ra_permissions)
+            ).values_list("role_assignment_id", "folder_id")
         permissions = defaultdict(set)
-        for ra in cls.get_role_assignments(principal):
-            ra_permissions = set(
-                ra.role.permissions.all().values_list("codename", flat=True)
-            )
-            for folder in ra.perimeter_folders.all():
-                permissions[str(folder.id)] |= ra_permissions
-                if recursive and ra.is_recursive:
-                    for f in folder.get_sub_folders():
-                        permissions[str(f.id)] |= ra_permissions
+        for ra_id, folder_id in ra_folders:
+            permissions[str(folder_id)] |= ra_permissions[ra_id]
         return permissions
 
 
+class PermissionRegistry:
+    """
+    In-process registry of permissions, keyed by codename and by (app_label, model).
+    Permissions only change on migrate, so the registry is loaded once and reset after migrations.
+    """
+
+    _loaded = False
+    _by_codename: dict[str, Permission] = {}
+    _by_model: dict[tuple[str, str], dict[str, Permission]] = {}
+
+    @classmethod
+    def load(cls) -> None:
+        by_codename = {}
+        by_model = defaultdict(dict)
+        for permission in Permission.objects.select_related("content_type").order_by(
+            "content_type__app_label", "content_type__model", "codename"
+        ):
+            app_label = permission.content_type.app_label
+            model_name = permission.content_type.model
+            by_model[(app_label, model_name)][permission.codename] = permission
+            # a codename can exist on several models (e.g. proxy or third party models),
+            # the permission of the model named in the codename takes precedence
+            if permission.codename not in by_codename or permission.codename.endswith(
+                f"_{model_name}"
+            ):
+                by_codename[permission.codename] = permission
+        cls._by_codename = by_codename
+        cls._by_model = dict(by_model)
+        cls._loaded = True
+
+    @classmethod
+    def clear(cls, **kwargs) -> None:
+        cls._loaded = False
+        cls._by_codename = {}
+        cls._by_model = {}
+
+    @classmethod
+    def get(cls, codename: str, model: type[models.Model] | None = None) -> Permission:
+        """
+        Returns the permission with the given codename, belonging to the given model if any
+        Raises Permission.DoesNotExist if it does not exist
+        """
+        if model is None:
+            if not cls._loaded:
+                cls.load()
+            permissions = cls._by_codename
+        else:
+            permissions = cls.get_for_model(
+                model._meta.app_label, model._meta.model_name
+            )
+        try:
+            return permissions[codename]
+        except KeyError:
+            raise Permission.DoesNotExist(f"permission {codename} does not exist")
+
+    @classmethod
+    def get_for_model(cls, app_label: str, model_name: str) -> dict[str, Permission]:
+        """Returns the permissions of a model, keyed by codename"""
+        if not cls._loaded:
+            cls.load()
+        return cls._by_model.get((app_label, model_name), {})
+
+
+_current_rbac_context: ContextVar["RBACContext | None"] = ContextVar(
+    "rbac_context", default=None
+)
+
+
+class RBACContext:
+    """
+    Snapshot of the role assignments of users, along with their permissions and
+    perimeter folders, and of the root folder, loaded once and then queried from memory.
+    It is activated for the duration of a request by RBACContextMiddleware,
+    and cleared whenever role assignments, roles or folders change.
+    Outside of a request, only the parent folders of the checked folders are loaded.
+    """
+
+    def __init__(self, load_all_folders: bool = False):
+        self._load_all_folders = load_all_folders
+        self._role_assignments = {}
+        self._parent_folders = {}
+        self._all_folders_loaded = False
+        self._root_folder = None
+
+    @staticmethod
+    def get_current() -> "RBACContext | None":
+        return _current_rbac_context.get()
+
+    @staticmethod
+    def get_current_or_new() -> "RBACContext":
+        return _current_rbac_context.get() or RBACContext()
+
+    @staticmethod
+    def activate() -> Token:
+        return _current_rbac_context.set(RBACContext(load_all_folders=True))
+
+    @staticmethod
+    def deactivate(token: Token) -> None:
+        _current_rbac_context.reset(token)
+
+    @staticmethod
+    def clear_current() -> None:
+        if (context := _current_rbac_context.get()) is not None:
+            context.clear()
+
+    def clear(self) -> None:
+        self._role_assignments.clear()
+        self._parent_folders = {}
+        self._all_folders_loaded = False
+        self._root_folder = None
+
+    def get_root_folder(self) -> Folder | None:
+        if self._root_folder is None:
+            self._root_folder = _query_root_folder()
+        return self._root_folder
+
+    def get_role_assignments(
+        self, user: AbstractBaseUser | AnonymousUser
+    ) -> list[tuple[set[int], set[uuid.UUID]]]:
+        """Returns the (permission ids, perimeter folder ids) of each role assignment of a user"""
+        if user.pk not in self._role_assignments:
+            role_assignments = dict(
+                RoleAssignment.get_role_assignments_queryset(user).values_list(
+                    "id", "role_id"
+                )
+            )
+            permissions = defaultdict(set)
+            for role_id, permission_id in Role.permissions.through.objects.filter(
+                role_id__in=set(role_assignments.values())
+            ).values_list("role_id", "permission_id"):
+                permissions[role_id].add(permission_id)
+            perimeters = defaultdict(set)
+            for (
+                ra_id,
+                folder_id,
+            ) in RoleAssignment.perimeter_folders.through.objects.filter(
+                roleassignment_id__in=list(role_assignments)
+            ).values_list("roleassignment_id", "folder_id"):
+                perimeters[ra_id].add(folder_id)
+            self._role_assignments[user.pk] = [
+                (permissions[role_id], perimeters[ra_id])
+                for ra_id, role_id in role_assignments.items()
+            ]
+        return self._role_assignments[user.pk]
+
+    def get_folder_chain(self, folder: Folder) -> list[uuid.UUID]:
+        """Returns the ids of a folder and of all its parent folders"""
+        if self._load_all_folders and not self._all_folders_loaded:
+            self._parent_folders = dict(
+                Folder.objects.values_list("id", "parent_folder_id")
+            )
+            self._all_folders_loaded = True
+        elif (
+            not self._all_folders_loaded
+            and folder.parent_folder_id is not None
+            and folder.parent_folder_id not in self._parent_folders
+        ):
+            self._parent_folders.update(
+                Folder.objects.filter(
+                    id__in=Folder.parent_folders_subquery([folder.id])
+                ).values_list("id", "parent_folder_id")
+            )
+        chain = [folder.id]
+        folder_id = folder.parent_folder_id
+        while folder_id is not None and folder_id not in chain:
+            chain.append(folder_id)
+            folder_id = self._parent_folders.get(folder_id)
+        return chain
+
+    def is_access_allowed(
+        self, user: AbstractBaseUser | AnonymousUser, perm: Permission, folder: Folder
+    ) -> bool:
+        """
+        Determines if a user has specified permission on a specified folder
+        """
+        role_assignments = self.get_role_assignments(user)
+        if perm.codename == "add_filteringlabel" and any(
+            perm.id in permissions for permissions, _ in role_assignments
+        ):  # Allow any user to add tags if he has the permission
+            return True
+        if folder is None:
+            return False
+        chain = self.get_folder_chain(folder)
+        return any(
+            perm.id in permissions and not perimeter.isdisjoint(chain)
+            for permissions, perimeter in role_assignments
+        )
+
+
+class RoleAssignmentClosure(models.Model):
+    """
+    Materialized closure of the folders reached by a role assignment.
+    It is derived data, maintained by signals on Folder and RoleAssignment,
+    and allows resolving accessible folders in one indexed query.
+    """
+
+    role_assignment = models.ForeignKey(
+        RoleAssignment, on_delete=models.CASCADE, related_name="closure"
+    )
+    folder = models.ForeignKey(Folder, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        unique_together = ("role_assignment", "folder")
+
+
+@receiver(post_save, sender=RoleAssignment)
+def refresh_role_assignment_closure(sender, instance, raw=False, **kwargs):
+    RBACContext.clear_current()
+    if raw:
+        return
+    instance.refresh_closure()
+
+
+@receiver(m2m_changed, sender=RoleAssignment.perimeter_folders.through)
+def refresh_perimeter_folders_closure(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    RBACContext.clear_current()
+    if not reverse:
+        instance.refresh_closure()
+        return
+    RoleAssignment.refresh_closures(
+        RoleAssignment.objects.filter(
+            Q(id__in=pk_set or []) | Q(closure__folder=instance)
+        ).distinct()
+    )
+
+
+@receiver(post_save, sender=Folder)
+def refresh_folder_closure(sender, instance, raw=False, **kwargs):
+    """Refresh recursive role assignments which gained or lost this folder"""
+    RBACContext.clear_current()
+    if raw:
+        return
+
+    def in_closure(folder_id):
+        return Exists(
+            RoleAssignmentClosure.objects.filter(
+                role_assignment=OuterRef("pk"), folder_id=folder_id
+            )
+        )
+
+    stale = (
+        RoleAssignment.objects.filter(is_recursive=True)
+        .annotate(
+            has_parent=in_closure(instance.parent_folder_id),
+            has_self=in_closure(instance.id),
+            is_direct=Exists(
+                RoleAssignment.perimeter_folders.through.objects.filter(
+                    roleassignment_id=OuterRef("pk"), folder_id=instance.id
+                )
+            ),
+        )
+        .filter(
+            Q(has_parent=True, has_self=False)
+            | Q(has_parent=False, has_self=True, is_direct=False)
+        )
+    )
+    if stale.exists():
+        RoleAssignment.refresh_closures(stale)
+
+
+@receiver(post_delete, sender=Folder)
+@receiver(post_delete, sender=RoleAssignment)
+@receiver(m2m_changed, sender=Role.permissions.through)
+@receiver(m2m_changed, sender=User.user_groups.through)
+def clear_rbac_context(sender, **kwargs):
+    RBACContext.clear_current()
+
+
 class PersonalAccessToken(models.Model):
     """
     Personal Access Token model.
@@ -1,3 +1,4 @@
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from core.models import *
 from core.models import *
@@ -38,3 +39,310 @@ class TestFolder:
         assert folder2.content_type == Folder.ContentType.DOMAIN
         assert folder1.parent_folder == root_folder
         assert folder2.parent_folder == parent_folder
+
+    @pytest.mark.parametrize("size", [1_000, 10_000])
+    def test_folder_tree_traversal_query_count(self, size, django_assert_num_queries):
+        root_folder = Folder.get_root_folder()
+        top_folder = Folder.objects.create(name="Top", parent_folder=root_folder)
+        folders = [top_folder]
+        for i in range(1, size):
+            folders.append(
+                Folder(name=f"Folder {i}", parent_folder=folders[(i - 1) // 10])
+            )
+        Folder.objects.bulk_create(folders[1:])
+
+        with django_assert_num_queries(1):
+            sub_folders = list(top_folder.get_sub_folders())
+        assert len(sub_folders) == size - 1
+
+        deepest_folder = folders[-1]
+        with django_assert_num_queries(1):
+            parent_folders = list(deepest_folder.get_parent_folders())
+        assert parent_folders[0].id == deepest_folder.parent_folder_id
+        assert parent_folders[-2] == top_folder
+        assert parent_folders[-1] == root_folder
+
+    def test_root_folder_is_cached(self, django_assert_num_queries):
+        root_folder = Folder.objects.get(content_type=Folder.ContentType.ROOT)
+
+        token = RBACContext.activate()
+        try:
+            assert Folder.get_root_folder() == root_folder
+            with django_assert_num_queries(0):
+                assert Folder.get_root_folder_id() == root_folder.id
+                cached_root_folder = Folder.get_root_folder()
+            # The cached instance cannot be modified through the returned copies
+            cached_root_folder.name = "Modified"
+            assert Folder.get_root_folder().name == root_folder.name
+
+            root_folder.name = "Renamed"
+            root_folder.save()
+            assert Folder.get_root_folder().name == "Renamed"
+        finally:
+            RBACContext.deactivate(token)
+
+    def test_root_folder_cache_follows_root_folder_changes(self):
+        token = RBACContext.activate()
+        try:
+            root_folder = Folder.get_root_folder()
+            root_folder.content_type = Folder.ContentType.DOMAIN
+            root_folder.save()
+            assert Folder.get_root_folder() is None
+
+            new_root_folder = Folder.objects.create(
+                name="New global",
+                content_type=Folder.ContentType.ROOT,
+                parent_folder=None,
+            )
+            assert Folder.get_root_folder_id() == new_root_folder.id
+            new_root_folder.delete()
+            assert Folder.get_root_folder() is None
+        finally:
+            RBACContext.deactivate(token)
+
+    def test_root_folder_is_not_cached_across_requests(self):
+        """A backup restore replaces the root folder without sending signals"""
+        root_folder = Folder.get_root_folder()
+        token = RBACContext.activate()
+        try:
+            assert Folder.get_root_folder_id() == root_folder.id
+        finally:
+            RBACContext.deactivate(token)
+
+        Folder.objects.filter(id=root_folder.id).update(
+            content_type=Folder.ContentType.DOMAIN
+        )
+        (new_root_folder,) = Folder.objects.bulk_create(
+            [Folder(name="Restored global", content_type=Folder.ContentType.ROOT)]
+        )
+        token = RBACContext.activate()
+        try:
+            assert Folder.get_root_folder_id() == new_root_folder.id
+        finally:
+            RBACContext.deactivate(token)
+
+
+@pytest.mark.django_db
+class TestRoleAssignmentClosure:
+    pytestmark = pytest.mark.django_db
+
+    def _create_role_assignment(self, user, folder, is_recursive=True):
+        role = Role.objects.create(name="test reader")
+        role.permissions.set(
+            Permission.objects.filter(codename__in=["view_folder", "view_perimeter"])
+        )
+        role_assignment = RoleAssignment.objects.create(
+            user=user, role=role, folder=folder, is_recursive=is_recursive
+        )
+        role_assignment.perimeter_folders.add(folder)
+        return role_assignment
+
+    def _closure(self, role_assignment):
+        return set(role_assignment.closure.values_list("folder_id", flat=True))
+
+    def test_closure_follows_folder_tree(self):
+        root_folder = Folder.get_root_folder()
+        domain = Folder.objects.create(name="Domain", parent_folder=root_folder)
+        user = User.objects.create_user(email="closure@example.com")
+        role_assignment = self._create_role_assignment(user, domain)
+        assert self._closure(role_assignment) == {domain.id}
+
+        sub_folder = Folder.objects.create(name="Sub", parent_folder=domain)
+        assert self._closure(role_assignment) == {domain.id, sub_folder.id}
+
+        sub_folder.parent_folder = root_folder
+        sub_folder.save()
+        assert self._closure(role_assignment) == {domain.id}
+
+    def test_closure_of_non_recursive_role_assignment(self):
+        domain = Folder.objects.create(
+            name="Domain", parent_folder=Folder.get_root_folder()
+        )
+        Folder.objects.create(name="Sub", parent_folder=domain)
+        user = User.objects.create_user(email="closure@example.com")
+        role_assignment = self._create_role_assignment(user, domain, is_recursive=False)
+        assert self._closure(role_assignment) == {domain.id}
+
+    def test_accessible_object_ids_use_closure(self):
+        root_folder = Folder.get_root_folder()
+        domain = Folder.objects.create(name="Domain", parent_folder=root_folder)
+        other_domain = Folder.objects.create(name="Other", parent_folder=root_folder)
+        perimeter = Perimeter.objects.create(name="Perimeter", folder=domain)
+        Perimeter.objects.create(name="Other perimeter", folder=other_domain)
+        user = User.objects.create_user(email="closure@example.com")
+        self._create_role_assignment(user, domain)
+
+        view, change, delete = RoleAssignment.get_accessible_object_ids(
+            root_folder, user, Perimeter
+        )
+        assert view == [perimeter.id]
+        assert change == [] and delete == []
+        assert RoleAssignment.get_accessible_object_ids(root_folder, user, Folder)[
+            0
+        ] == [domain.id]
+
+    def test_permissions_per_folder_use_closure(self):
+        root_folder = Folder.get_root_folder()
+        domain = Folder.objects.create(name="Domain", parent_folder=root_folder)
+        sub_folder = Folder.objects.create(name="Sub", parent_folder=domain)
+        user = User.objects.create_user(email="closure@example.com")
+        self._create_role_assignment(user, domain)
+
+        permissions = RoleAssignment.get_permissions_per_folder(user, recursive=True)
+        assert set(permissions) == {str(domain.id), str(sub_folder.id)}
+        assert permissions[str(sub_folder.id)] == {"view_folder", "view_perimeter"}
+        assert set(RoleAssignment.get_permissions_per_folder(user)) == {str(domain.id)}
+        assert set(
+            RoleAssignment.get_accessible_folders(
+                root_folder, user, Folder.ContentType.DOMAIN
+            )
+        ) == {domain.id, sub_folder.id}
+        assert RoleAssignment.get_accessible_folders(sub_folder, user, None) == [
+            sub_folder.id
+        ]
+        assert (
+            RoleAssignment.get_accessible_folders(
+                root_folder, user, None, "change_folder"
+            )
+            == []
+        )
+
+    def test_accessible_queryset_includes_published_parent_objects(self):
+        root_folder = Folder.get_root_folder()
+        domain = Folder.objects.create(name="Domain", parent_folder=root_folder)
+        published = Threat.objects.create(
+            name="Published", folder=root_folder, is_published=True
+        )
+        local = Threat.objects.create(name="Local", folder=domain)
+        Threat.objects.filter(id=published.id).update(is_published=True)
+        unpublished = Threat.objects.create(name="Unpublished", folder=root_folder)
+        Threat.objects.filter(id=unpublished.id).update(is_published=False)
+        user = User.objects.create_user(email="closure@example.com")
+        role = Role.objects.create(name="test reader")
+        role.permissions.set(
+            Permission.objects.filter(codename__in=["view_folder", "view_threat"])
+        )
+        role_assignment = RoleAssignment.objects.create(
+            user=user, role=role, folder=domain, is_recursive=True
+        )
+        role_assignment.perimeter_folders.add(domain)
+
+        created = [published.id, local.id, unpublished.id]
+        queryset = RoleAssignment.get_accessible_queryset(root_folder, user, Threat)
+        assert set(queryset.filter(id__in=created).values_list("id", flat=True)) == {
+            local.id,
+            published.id,
+        }
+        assert not RoleAssignment.get_accessible_queryset(
+            root_folder, user, Threat, "change_threat"
+        ).exists()
+        assert set(
+            RoleAssignment.get_accessible_object_ids(root_folder, user, Threat)[0]
+        ) & set(created) == {local.id, published.id}
+
+
+@pytest.mark.django_db
+class TestRBACContext:
+    pytestmark = pytest.mark.django_db
+
+    def test_access_checks_are_answered_from_memory(self, django_assert_num_queries):
+        root_folder = Folder.get_root_folder()
+        domain = Folder.objects.create(name="Domain", parent_folder=root_folder)
+        sub_folder = Folder.objects.create(name="Sub", parent_folder=domain)
+        other_domain = Folder.objects.create(name="Other", parent_folder=root_folder)
+        user = User.objects.create_user(email="context@example.com")
+        role = Role.objects.create(name="test reader")
+        role.permissions.set(Permission.objects.filter(codename="view_folder"))
+        role_assignment = RoleAssignment.objects.create(
+            user=user, role=role, folder=domain, is_recursive=True
+        )
+        role_assignment.perimeter_folders.add(domain)
+        view_folder = Permission.objects.get(codename="view_folder")
+        change_folder = Permission.objects.get(codename="change_folder")
+
+        token = RBACContext.activate()
+        try:
+            assert RoleAssignment.is_access_allowed(user, view_folder, sub_folder)
+            with django_assert_num_queries(0):
+                assert RoleAssignment.is_access_allowed(user, view_folder, domain)
+                assert not RoleAssignment.is_access_allowed(
+                    user, view_folder, other_domain
+                )
+                assert not RoleAssignment.is_access_allowed(
+                    user, change_folder, sub_folder
+                )
+
+            role_assignment.perimeter_folders.add(other_domain)
+            assert RoleAssignment.is_access_allowed(user, view_folder, other_domain)
+        finally:
+            RBACContext.deactivate(token)
+        assert RBACContext.get_current() is None
+        assert RoleAssignment.is_access_allowed(user, view_folder, other_domain)
+
+    def test_only_parent_folders_are_loaded_outside_requests(self):
+        root_folder = Folder.get_root_folder()
+        domain = Folder.objects.create(name="Domain", parent_folder=root_folder)
+        sub_folder = Folder.objects.create(name="Sub", parent_folder=domain)
+        other_domain = Folder.objects.create(name="Other", parent_folder=root_folder)
+
+        context = RBACContext()
+        assert context.get_folder_chain(sub_folder) == [
+            sub_folder.id,
+            domain.id,
+            root_folder.id,
+        ]
+        assert other_domain.id not in context._parent_folders
+
+        context = RBACContext(load_all_folders=True)
+        assert context.get_folder_chain(sub_folder) == [
+            sub_folder.id,
+            domain.id,
+            root_folder.id,
+        ]
+        assert other_domain.id in context._parent_folders
+
+
+@pytest.mark.django_db
+class TestPermissionRegistry:
+    pytestmark = pytest.mark.django_db
+
+    def test_permissions_are_served_from_memory(self, django_assert_num_queries):
+        PermissionRegistry.clear()
+        assert PermissionRegistry.get("view_folder") == Permission.objects.get(
+            codename="view_folder"
+        )
+        with django_assert_num_queries(0):
+            assert PermissionRegistry.get("add_filteringlabel").codename == (
+                "add_filteringlabel"
+            )
+            assert set(PermissionRegistry.get_for_model("iam", "folder")) >= {
+                "add_folder",
+                "view_folder",
+                "change_folder",
+                "delete_folder",
+            }
+
+    def test_unknown_permission(self, django_assert_num_queries):
+        PermissionRegistry.load()
+        with django_assert_num_queries(0):
+            with pytest.raises(Permission.DoesNotExist):
+                PermissionRegistry.get("view_nothing")
+            with pytest.raises(Permission.DoesNotExist):
+                PermissionRegistry.get("view_folder", Perimeter)
+
+    def test_codename_shared_by_several_models(self):
+        folder_permission = Permission.objects.get(codename="view_folder")
+        perimeter_permission = Permission.objects.create(
+            codename="view_folder",
+            name="Can view the folder of a perimeter",
+            content_type=ContentType.objects.get_for_model(Perimeter),
+        )
+        try:
+            PermissionRegistry.clear()
+            assert PermissionRegistry.get("view_folder") == folder_permission
+            assert PermissionRegistry.get("view_folder", Folder) == folder_permission
+            assert (
+                PermissionRegistry.get("view_folder", Perimeter) == perimeter_permission
+            )
+        finally:
+            PermissionRegistry.clear()
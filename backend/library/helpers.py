@@ -1,10 +1,143 @@
+import contextlib
+import hashlib
 import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
 
 # from core.models import RequirementNode
 from django.utils.translation import get_language
 
 from typing import Union
 
+import structlog
+import yaml
+
+logger = structlog.get_logger(__name__)
+
+# The libyaml based loader is several times faster, when PyYAML has been built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_library_yaml(library_content: bytes | str) -> dict:
+    """
+    Parse the YAML content of a library, which must be a mapping.
+    """
+    library_data = yaml.load(library_content, Loader=YamlLoader)
+    if not isinstance(library_data, dict):
+        raise yaml.YAMLError(
+            f"The YAML content must be a dictionary but it's been interpreted as a {type(library_data).__name__} !"
+        )
+    return library_data
+
+
+def read_library_cache(cache_file: Path) -> dict | None:
+    """
+    Return the parsed library content cached in cache_file, or None if it is missing or invalid.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            library_data = pickle.load(f)
+        if isinstance(library_data, dict):
+            return library_data
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Invalid library cache file", path=cache_file, error=e)
+    return None
+
+
+def load_library_yaml(
+    library_content: bytes | str,
+    cache_dir: Path | str | None = None,
+    hash_checksum: str | None = None,
+) -> dict:
+    """
+    Parse the YAML content of a library, which must be a mapping.
+    When cache_dir is given, the parsed content is cached there as a pickle keyed by
+    the SHA256 checksum of the YAML content, so that the same content is only parsed once.
+    The cache is best effort: unreadable or unwritable cache files are ignored.
+    """
+    if cache_dir is None:
+        return parse_library_yaml(library_content)
+    if hash_checksum is None:
+        if isinstance(library_content, str):
+            library_content = library_content.encode("utf-8")
+        hash_checksum = hashlib.sha256(library_content).hexdigest()
+    cache_file = Path(cache_dir) / f"{hash_checksum}.pickle"
+    library_data = read_library_cache(cache_file)
+    if library_data is not None:
+        return library_data
+    library_data = parse_library_yaml(library_content)
+    tmp_name = None
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that concurrent readers never see a partial file
+        with tempfile.NamedTemporaryFile(
+            dir=cache_file.parent, suffix=".tmp", delete=False
+        ) as f:
+            tmp_name = f.name
+            pickle.dump(library_data, f, protocol=5)
+        os.replace(tmp_name, cache_file)
+    except OSError as e:
+        logger.warning("Could not write library cache file", path=cache_file, error=e)
+    finally:
+        # The temporary file is left behind if it could not be moved
+        if tmp_name is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_name)
+    return library_data
+
+
+def prune_library_cache(cache_dir: Path | str, hash_checksums: set[str]) -> int:
+    """
+    Delete the cached library contents whose checksum is not in hash_checksums, along with
+    the temporary files of interrupted writes. Returns the number of deleted files.
+    """
+    try:
+        cache_files = list(Path(cache_dir).iterdir())
+    except FileNotFoundError:
+        return 0
+    deleted = 0
+    for cache_file in cache_files:
+        if cache_file.suffix not in (".pickle", ".tmp") or (
+            cache_file.suffix == ".pickle" and cache_file.stem in hash_checksums
+        ):
+            continue
+        try:
+            cache_file.unlink()
+            deleted += 1
+        except OSError as e:
+            logger.warning(
+                "Could not delete library cache file", path=cache_file, error=e
+            )
+    return deleted
+
+
+def parse_library_file(
+    path: Path | str,
+    cache_dir: Path | str | None = None,
+    hash_checksum: str | None = None,
+) -> tuple[str, dict]:
+    """
+    Read and parse a library file, returning its SHA256 checksum and its content.
+    The checksum can be given when the caller already computed it, in which case the file
+    is not hashed again, nor read when its parsed content is cached.
+    This function does not depend on the database, so that it can run in worker processes.
+    """
+    if hash_checksum is not None and cache_dir is not None:
+        library_data = read_library_cache(Path(cache_dir) / f"{hash_checksum}.pickle")
+        if library_data is not None:
+            return hash_checksum, library_data
+    with open(path, "rb") as f:
+        library_content = f.read()
+    if hash_checksum is None:
+        hash_checksum = hashlib.sha256(library_content).hexdigest()
+    return hash_checksum, load_library_yaml(
+        library_content, cache_dir=cache_dir, hash_checksum=hash_checksum
+    )
+
 
 def get_referential_translation(object, parameter: str, locale=None) -> str | list:
     # NOTE: put get_language() as default value for locale doesn't work, default locale "en" is always returned.
@@ -46,6 +179,75 @@ def get_referential_translation(object, parameter: str, locale=None) -> str | li
     return locale_translations.get(parameter, fallback)
 
 
+TRANSLATED_FIELDS = ("name", "description", "abbreviation", "annotation")
+
+# Translated fields of referential objects, keyed by (id, updated_at, locale)
+_translated_fields_cache: dict[tuple, dict] = {}
+TRANSLATED_FIELDS_CACHE_SIZE = 100_000
+
+
+def get_translated_fields(object, locale=None) -> dict:
+    """
+    Get the translated name, description, abbreviation and annotation of a referential
+    object (a model instance or a dict), falling back to its own values.
+
+    The fields of saved model instances are cached by id, updated_at and locale.
+
+    Args:
+        object: The referential object to get the translated fields for
+        locale (str): The locale to get the translation for, the current language by default
+
+    Returns:
+        dict: The translation of each field, which may be shared and must not be modified
+    """
+    locale = locale or get_language()
+    if isinstance(object, dict):
+        values, translations, key = object, object.get("translations"), None
+    else:
+        values, translations = object.__dict__, object.translations
+        updated_at = getattr(object, "updated_at", None)
+        key = (object.pk, updated_at, locale) if object.pk and updated_at else None
+        if key in _translated_fields_cache:
+            return _translated_fields_cache[key]
+    locale_translations = (translations or {}).get(locale) or {}
+    fields = {
+        field: locale_translations.get(field, values.get(field))
+        for field in TRANSLATED_FIELDS
+    }
+    if key is not None:
+        if len(_translated_fields_cache) >= TRANSLATED_FIELDS_CACHE_SIZE:
+            _translated_fields_cache.clear()
+        _translated_fields_cache[key] = fields
+    return fields
+
+
+def translate_object(obj, locale=None):
+    """
+    Translate the fields of the objects having translations in a dict or a list,
+    recursively, without modifying it.
+
+    Args:
+        obj: The dict or list to translate.
+        locale (str): The locale to get the translation for, the current language by default
+
+    Returns:
+        A translated copy of the dicts and lists of obj, other values are shared.
+    """
+    locale = locale or get_language()
+
+    def translate(value):
+        if isinstance(value, dict):
+            translated = {key: translate(item) for key, item in value.items()}
+            if "translations" in value:
+                translated.update(get_translated_fields(value, locale))
+            return translated
+        if isinstance(value, list):
+            return [translate(item) for item in value]
+        return value
+
+    return translate(obj)
+
+
 def update_translations_in_object(obj: Union[dict, list], locale=None):
     """
     Recursively update the translations of 'name' and 'description' fields in a dict or a list.
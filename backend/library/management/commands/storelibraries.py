@@ -1,20 +1,133 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import structlog, signal
-from ciso_assistant.settings import LIBRARIES_PATH
+from ciso_assistant.settings import (
+    LIBRARIES_CACHE_PATH,
+    LIBRARIES_MANIFEST_PATH,
+    LIBRARIES_PARSING_WORKERS,
+    LIBRARIES_PATH,
+)
 from core.models import StoredLibrary
+from core.utils import sha256
 from django.core.management.base import BaseCommand
+from library.helpers import parse_library_file, prune_library_cache
 
 logger = structlog.getLogger(__name__)
 
 signal.signal(signal.SIGINT, signal.SIG_DFL)
 
+# Starting a worker process costs about as much as parsing a few files, so that a
+# few changed files are parsed in process
+MIN_FILES_PER_WORKER = 8
+
+
+def read_manifest(manifest_path: Path) -> dict:
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(manifest_path: Path, manifest: dict) -> None:
+    manifest_path = Path(manifest_path)
+    try:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+    except OSError as e:
+        logger.warning(
+            "Could not write libraries manifest", path=manifest_path, error=e
+        )
+
+
+def manifest_entry(fname: Path, hash_checksum: str) -> dict:
+    stat = fname.stat()
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": hash_checksum,
+    }
+
+
+def get_changed_files(library_files: list[Path], manifest: dict) -> list[Path]:
+    """
+    Get the library files which may have to be stored: files are skipped without being
+    read when their size and modification time match the manifest, and the checksum
+    recorded for them is in the database.
+    """
+    changed_files = []
+    for fname in library_files:
+        entry = manifest.get(str(fname))
+        stat = fname.stat()
+        if not (
+            entry
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+            and entry["sha256"] in StoredLibrary.HASH_CHECKSUM_SET
+        ):
+            changed_files.append(fname)
+    return changed_files
+
+
+def parse_library_files(
+    library_files: list[Path], workers: int, checksums: dict[Path, str] | None = None
+):
+    """
+    Yield (fname, hash_checksum, library_data, error) for each library file, in order.
+    Files are parsed in a pool of worker processes when there are enough of them.
+    checksums holds the checksums already computed for some of the files, if any.
+    """
+    checksums = checksums or {}
+    workers = min(workers, len(library_files) // MIN_FILES_PER_WORKER)
+    if workers <= 1:
+        for fname in library_files:
+            try:
+                yield (
+                    fname,
+                    *parse_library_file(
+                        fname, LIBRARIES_CACHE_PATH, checksums.get(fname)
+                    ),
+                    None,
+                )
+            except Exception as e:
+                yield fname, None, None, e
+        return
+    # Workers are spawned rather than forked, so that they do not share the database
+    # connections. parse_library_file does not depend on Django, so they start fast.
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(
+                parse_library_file, fname, LIBRARIES_CACHE_PATH, checksums.get(fname)
+            )
+            for fname in library_files
+        ]
+        for fname, future in zip(library_files, futures):
+            try:
+                yield fname, *future.result(), None
+            except Exception as e:
+                yield fname, None, None, e
+
 
 class Command(BaseCommand):
     help = "Store libraries in the database"
 
     def add_arguments(self, parser) -> None:
         parser.add_argument("--path", type=str, help="Path to library files")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=LIBRARIES_PARSING_WORKERS,
+            help="Number of processes parsing library files",
+        )
 
     def handle(self, *args, **options):
         StoredLibrary.__init_class__()
@@ -25,15 +138,57 @@ class Command(BaseCommand):
             )
         else:
             library_files = [path]
-        for fname in library_files:
+
+        manifest = read_manifest(LIBRARIES_MANIFEST_PATH)
+        changed_files = get_changed_files(library_files, manifest)
+
+        # Files whose checksum is already in the database do not need to be parsed,
+        # the checksums of the others are passed along so that they are not hashed again
+        files_to_parse = {}
+        for fname in changed_files:
+            try:
+                hash_checksum = sha256(fname.read_bytes())
+            except OSError:
+                logger.error("Invalid library file", filename=fname)
+                continue
+            if hash_checksum in StoredLibrary.HASH_CHECKSUM_SET:
+                manifest[str(fname)] = manifest_entry(fname, hash_checksum)
+            else:
+                files_to_parse[fname] = hash_checksum
+
+        logger.info(
+            "Storing libraries",
+            library_files=len(library_files),
+            changed_files=len(changed_files),
+            files_to_parse=len(files_to_parse),
+        )
+
+        for fname, hash_checksum, library_data, error in parse_library_files(
+            list(files_to_parse), options["workers"], files_to_parse
+        ):
             # logger.info("Begin library file storage", filename=fname)
+            if error is not None:
+                logger.error("Invalid library file", filename=fname, error=error)
+                continue
             try:
-                library = StoredLibrary.store_library_file(fname, True)
+                library = StoredLibrary.store_library_data(
+                    library_data, hash_checksum, True
+                )
                 if library:
                     logger.info(
                         "Successfully stored library",
                         filename=fname,
                         library=library,
                     )
+                manifest[str(fname)] = manifest_entry(fname, hash_checksum)
             except:
                 logger.error("Invalid library file", filename=fname)
+
+        # Forget the files which no longer exist, and the cached contents nobody refers to
+        manifest = {
+            fname: entry for fname, entry in manifest.items() if Path(fname).exists()
+        }
+        write_manifest(LIBRARIES_MANIFEST_PATH, manifest)
+        prune_library_cache(
+            LIBRARIES_CACHE_PATH, {entry["sha256"] for entry in manifest.values()}
+        )
@@ -0,0 +1,73 @@
+import copy
+
+import pytest
+from django.utils import translation
+
+from core.models import Threat
+from library.helpers import get_translated_fields, translate_object
+
+MATRIX_DEFINITION = {
+    "name": "Matrix",
+    "translations": {"fr": {"name": "Matrice"}},
+    "probability": [
+        {
+            "abbreviation": "L",
+            "name": "Low",
+            "description": "Unlikely",
+            "translations": {"fr": {"name": "Faible", "abbreviation": "F"}},
+        },
+        {"abbreviation": "H", "name": "High"},
+    ],
+    "grid": [[0, 1], [1, 1]],
+}
+
+
+class TestTranslateObject:
+    def test_objects_are_translated_without_being_modified(self):
+        definition = copy.deepcopy(MATRIX_DEFINITION)
+
+        translated = translate_object(definition, "fr")
+
+        assert definition == MATRIX_DEFINITION
+        assert translated["name"] == "Matrice"
+        assert translated["probability"][0] == {
+            "abbreviation": "F",
+            "name": "Faible",
+            "description": "Unlikely",
+            "annotation": None,
+            "translations": {"fr": {"name": "Faible", "abbreviation": "F"}},
+        }
+        # Objects without translations are copied as is
+        assert translated["probability"][1] == {"abbreviation": "H", "name": "High"}
+        assert translated["grid"] == definition["grid"]
+        assert translated["grid"] is not definition["grid"]
+
+    def test_current_language_is_used_by_default(self):
+        with translation.override("fr"):
+            assert translate_object(MATRIX_DEFINITION)["name"] == "Matrice"
+        with translation.override("en"):
+            assert translate_object(MATRIX_DEFINITION)["name"] == "Matrix"
+
+
+@pytest.mark.django_db
+class TestGetTranslatedFields:
+    def test_fields_of_saved_objects_are_cached(self):
+        threat = Threat.objects.create(
+            name="Flood",
+            description="Water",
+            translations={"fr": {"name": "Inondation"}},
+        )
+
+        fields = get_translated_fields(threat, "fr")
+        assert fields == {
+            "name": "Inondation",
+            "description": "Water",
+            "abbreviation": None,
+            "annotation": None,
+        }
+        assert get_translated_fields(Threat.objects.get(id=threat.id), "fr") is fields
+        assert get_translated_fields(threat, "en")["name"] == "Flood"
+
+        threat.translations = {"fr": {"name": "Crue"}}
+        threat.save()
+        assert get_translated_fields(threat, "fr")["name"] == "Crue"
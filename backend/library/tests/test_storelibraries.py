@@ -0,0 +1,186 @@
+import os
+import pickle
+
+import pytest
+import yaml
+from django.core.management import call_command
+
+from ciso_assistant.settings import LIBRARIES_PATH
+from core.models import StoredLibrary
+from core.utils import sha256
+from library.helpers import load_library_yaml, parse_library_file, prune_library_cache
+from library.management.commands import storelibraries
+
+LIBRARY_FILES = ["iso27001-2022.yaml", "nist-sp-800-53-rev5.yaml", "dora.yaml"]
+
+
+@pytest.fixture
+def library_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        storelibraries, "LIBRARIES_MANIFEST_PATH", tmp_path / "manifest.json"
+    )
+    monkeypatch.setattr(storelibraries, "LIBRARIES_CACHE_PATH", tmp_path / "cache")
+    library_dir = tmp_path / "libraries"
+    library_dir.mkdir()
+    for name in LIBRARY_FILES:
+        # The comment changes the checksum of the files, not the libraries
+        (library_dir / name).write_bytes(
+            (LIBRARIES_PATH / name).read_bytes() + b"\n# copy\n"
+        )
+    return library_dir
+
+
+@pytest.mark.django_db
+class TestStoreLibraries:
+    def test_unchanged_files_are_skipped(self, library_dir):
+        call_command("storelibraries", path=str(library_dir), workers=2)
+
+        StoredLibrary.__init_class__()
+        manifest = storelibraries.read_manifest(storelibraries.LIBRARIES_MANIFEST_PATH)
+        library_files = sorted(library_dir.iterdir())
+        assert storelibraries.get_changed_files(library_files, manifest) == []
+        for library_file in library_files:
+            assert manifest[str(library_file)]["sha256"] in (
+                StoredLibrary.HASH_CHECKSUM_SET
+            )
+
+        modified_file = library_dir / LIBRARY_FILES[0]
+        modified_file.write_bytes(modified_file.read_bytes() + b"# modified\n")
+        assert storelibraries.get_changed_files(library_files, manifest) == [
+            modified_file
+        ]
+
+    def test_parsed_files_match_sequential_parsing(self, library_dir, monkeypatch):
+        monkeypatch.setattr(storelibraries, "MIN_FILES_PER_WORKER", 1)
+        library_files = sorted(library_dir.iterdir())
+
+        parallel = list(storelibraries.parse_library_files(library_files, workers=3))
+        sequential = list(storelibraries.parse_library_files(library_files, workers=1))
+
+        assert parallel == sequential
+        assert all(error is None for *_, error in parallel)
+
+    def test_few_files_are_parsed_in_process(self, library_dir, monkeypatch):
+        def no_pool(*args, **kwargs):
+            raise AssertionError("No worker process should be started")
+
+        monkeypatch.setattr(storelibraries, "ProcessPoolExecutor", no_pool)
+        library_files = sorted(library_dir.iterdir())
+        assert len(library_files) < storelibraries.MIN_FILES_PER_WORKER
+
+        parsed = list(storelibraries.parse_library_files(library_files, workers=4))
+        assert [fname for fname, *_ in parsed] == library_files
+        assert all(error is None for *_, error in parsed)
+
+    def test_only_changed_files_are_parsed(self, library_dir, monkeypatch):
+        calls = []
+
+        def parse(fname, cache_dir=None, hash_checksum=None):
+            calls.append((fname, hash_checksum))
+            return parse_library_file(fname, cache_dir, hash_checksum)
+
+        monkeypatch.setattr(storelibraries, "parse_library_file", parse)
+        library_files = sorted(library_dir.iterdir())
+
+        call_command("storelibraries", path=str(library_dir), workers=1)
+        # The checksums computed by the command are passed along
+        assert calls == [(fname, sha256(fname.read_bytes())) for fname in library_files]
+
+        calls.clear()
+        call_command("storelibraries", path=str(library_dir), workers=1)
+        assert calls == []
+
+        modified_file = library_dir / LIBRARY_FILES[0]
+        modified_file.write_bytes(modified_file.read_bytes() + b"# modified\n")
+        call_command("storelibraries", path=str(library_dir), workers=1)
+        assert calls == [(modified_file, sha256(modified_file.read_bytes()))]
+
+
+class TestLibraryCache:
+    def test_parsed_content_is_cached_by_checksum(self, library_dir, tmp_path):
+        cache_dir = tmp_path / "cache"
+        library_file = library_dir / LIBRARY_FILES[1]
+
+        hash_checksum, library_data = parse_library_file(library_file, cache_dir)
+
+        cache_file = cache_dir / f"{hash_checksum}.pickle"
+        assert cache_file.exists()
+        assert library_data == parse_library_file(library_file)[1]
+        assert parse_library_file(library_file, cache_dir) == (
+            hash_checksum,
+            library_data,
+        )
+
+        # The cached content is used instead of parsing the file again
+        cache_file.write_bytes(pickle.dumps({"cached": True}))
+        assert parse_library_file(library_file, cache_dir)[1] == {"cached": True}
+
+        # With a known checksum, the file is not even read
+        library_file.unlink()
+        assert parse_library_file(library_file, cache_dir, hash_checksum) == (
+            hash_checksum,
+            {"cached": True},
+        )
+
+    def test_invalid_cache_file_is_ignored(self, tmp_path):
+        content = b"urn: urn:test\nversion: 1\n"
+        load_library_yaml(content, cache_dir=tmp_path)
+        (cache_file,) = tmp_path.iterdir()
+        cache_file.write_bytes(b"not a pickle")
+
+        assert load_library_yaml(content, cache_dir=tmp_path) == {
+            "urn": "urn:test",
+            "version": 1,
+        }
+        assert pickle.loads(cache_file.read_bytes()) == {
+            "urn": "urn:test",
+            "version": 1,
+        }
+
+    def test_invalid_content_is_not_cached(self, tmp_path):
+        with pytest.raises(yaml.YAMLError):
+            load_library_yaml(b"- not a mapping", cache_dir=tmp_path)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_temporary_file_is_removed_when_the_write_fails(
+        self, tmp_path, monkeypatch
+    ):
+        def replace(src, dst):
+            raise OSError("read-only")
+
+        monkeypatch.setattr(os, "replace", replace)
+
+        assert load_library_yaml(b"urn: urn:test\n", cache_dir=tmp_path) == {
+            "urn": "urn:test"
+        }
+        assert list(tmp_path.iterdir()) == []
+
+    def test_unreferenced_cache_files_are_pruned(self, tmp_path):
+        for name in ["kept.pickle", "stale.pickle", "interrupted.tmp", "other.txt"]:
+            (tmp_path / name).write_bytes(b"")
+
+        assert prune_library_cache(tmp_path, {"kept"}) == 2
+        assert sorted(f.name for f in tmp_path.iterdir()) == [
+            "kept.pickle",
+            "other.txt",
+        ]
+        assert prune_library_cache(tmp_path / "missing", set()) == 0
+
+
+@pytest.mark.django_db
+def test_storelibraries_prunes_the_cache(library_dir):
+    cache_dir = storelibraries.LIBRARIES_CACHE_PATH
+    call_command("storelibraries", path=str(library_dir), workers=1)
+    assert len(list(cache_dir.iterdir())) == len(LIBRARY_FILES)
+
+    removed_file = library_dir / LIBRARY_FILES[0]
+    removed_checksum = sha256(removed_file.read_bytes())
+    removed_file.unlink()
+    call_command("storelibraries", path=str(library_dir), workers=1)
+
+    manifest = storelibraries.read_manifest(storelibraries.LIBRARIES_MANIFEST_PATH)
+    assert str(removed_file) not in manifest
+    assert sorted(f.stem for f in cache_dir.iterdir()) == sorted(
+        entry["sha256"] for entry in manifest.values()
+    )
+    assert removed_checksum not in {f.stem for f in cache_dir.iterdir()}
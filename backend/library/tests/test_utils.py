@@ -0,0 +1,115 @@
+import pytest
+from auditlog.models import LogEntry
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    Framework,
+    LoadedLibrary,
+    ReferenceControl,
+    RequirementMapping,
+    RequirementNode,
+    StoredLibrary,
+    Threat,
+)
+from iam.models import Folder
+from library.utils import LibraryImporter
+
+
+def load_library(urn):
+    library = StoredLibrary.objects.get(urn=urn, locale="en")
+    assert library.load() is None
+    return LoadedLibrary.objects.get(urn=urn)
+
+
+@pytest.mark.django_db
+class TestLibraryImporter:
+    def test_import_library_creates_objects_in_bulk(self):
+        library = StoredLibrary.objects.get(
+            urn="urn:intuitem:risk:library:google-saif", locale="en"
+        )
+        content = library.content
+
+        with CaptureQueriesContext(connection) as context:
+            assert library.load() is None
+
+        loaded_library = LoadedLibrary.objects.get(urn=library.urn)
+        framework = Framework.objects.get(library=loaded_library)
+        requirement_nodes = RequirementNode.objects.filter(framework=framework)
+        assert loaded_library.threats.count() == len(content["threats"])
+        assert loaded_library.reference_controls.count() == len(
+            content["reference_controls"]
+        )
+        assert requirement_nodes.count() == len(
+            content["framework"]["requirement_nodes"]
+        )
+        # The number of queries does not depend on the number of objects
+        assert len(context.captured_queries) < 50
+
+        # Threats and reference controls created in bulk are audited
+        for obj in [
+            *loaded_library.threats.all(),
+            *loaded_library.reference_controls.all(),
+        ]:
+            assert LogEntry.objects.filter(
+                object_pk=str(obj.id), action=LogEntry.Action.CREATE
+            ).exists(), obj
+
+        for index, node_data in enumerate(content["framework"]["requirement_nodes"]):
+            node = requirement_nodes.get(urn=node_data["urn"].lower())
+            assert node.order_id == index
+            assert node.parent_urn == (
+                node_data["parent_urn"].lower() if "parent_urn" in node_data else None
+            )
+            assert node.folder == Folder.get_root_folder()
+            assert sorted(node.threats.values_list("urn", flat=True)) == sorted(
+                urn.lower() for urn in node_data.get("threats", [])
+            )
+            assert sorted(
+                node.reference_controls.values_list("urn", flat=True)
+            ) == sorted(urn.lower() for urn in node_data.get("reference_controls", []))
+
+    def test_import_requirement_mapping_set(self):
+        load_library("urn:intuitem:risk:library:iso27001-2013")
+        load_library("urn:intuitem:risk:library:iso27001-2022")
+        library = load_library(
+            "urn:intuitem:risk:library:mapping-iso27001-2013-to-iso27001-2022"
+        )
+
+        mapping_set = library.requirement_mapping_sets.get()
+        mappings_data = StoredLibrary.objects.get(urn=library.urn).content[
+            "requirement_mapping_set"
+        ]["requirement_mappings"]
+        mappings = RequirementMapping.objects.filter(mapping_set=mapping_set)
+        assert mappings.count() == len(mappings_data)
+        assert set(
+            mappings.values_list(
+                "source_requirement__urn", "target_requirement__urn", "relationship"
+            )
+        ) == {
+            (
+                data["source_requirement_urn"].lower(),
+                data["target_requirement_urn"].lower(),
+                data["relationship"],
+            )
+            for data in mappings_data
+        }
+
+    def test_duplicate_threat_is_rejected(self):
+        library = StoredLibrary.objects.get(
+            urn="urn:intuitem:risk:library:google-saif", locale="en"
+        )
+        threat_data = library.content["threats"][0]
+        Threat.objects.create(
+            ref_id=threat_data["ref_id"].upper(), name=threat_data["name"].upper()
+        )
+
+        importer = LibraryImporter(library)
+        assert importer.init() is None
+        with pytest.raises(ValidationError):
+            importer._import_library()
+        assert not LoadedLibrary.objects.filter(urn=library.urn).exists()
+        assert not ReferenceControl.objects.filter(
+            urn__startswith="urn:intuitem:risk:reference_control:google-saif"
+        ).exists()
@@ -0,0 +1,57 @@
+from urllib.parse import urlencode
+
+import pytest
+from django.http import QueryDict
+
+from core.models import StoredLibrary
+from library.views import StoredLibraryFilterSet
+
+MAPPING_LIBRARY_URN = "urn:intuitem:risk:library:mapping-iso27001-2013-to-iso27001-2022"
+
+
+def filter_urns(data: dict) -> set[str]:
+    filterset = StoredLibraryFilterSet(
+        QueryDict(urlencode(data, doseq=True)), queryset=StoredLibrary.objects.all()
+    )
+    assert filterset.is_valid(), filterset.errors
+    return set(filterset.qs.values_list("urn", flat=True))
+
+
+@pytest.mark.django_db
+class TestStoredLibraryFilterSet:
+    def test_filter_object_type(self):
+        framework_urns = filter_urns({"object_type": ["framework"]})
+        assert "urn:intuitem:risk:library:iso27001-2022" in framework_urns
+        assert MAPPING_LIBRARY_URN not in framework_urns
+        # Plural names are kept for backward compatibility
+        assert filter_urns({"object_type": ["frameworks"]}) == framework_urns
+
+        mapping_urns = filter_urns({"object_type": ["requirement_mapping_sets"]})
+        assert MAPPING_LIBRARY_URN in mapping_urns
+
+        assert (
+            filter_urns({"object_type": ["framework", "requirement_mapping_sets"]})
+            == framework_urns | mapping_urns
+        )
+
+    def test_filter_mapping_suggested(self):
+        all_urns = filter_urns({})
+        assert filter_urns({"mapping_suggested": False}) == all_urns
+        # No framework is loaded
+        assert filter_urns({"mapping_suggested": True}) == set()
+
+        StoredLibrary.objects.get(
+            urn="urn:intuitem:risk:library:iso27001-2013", locale="en"
+        ).load()
+        suggested_urns = filter_urns({"mapping_suggested": True})
+        assert MAPPING_LIBRARY_URN in suggested_urns
+        # Only mappings from the loaded framework are suggested
+        assert all(
+            StoredLibrary.objects.get(urn=urn).mapping_source_framework_urns
+            == ["urn:intuitem:risk:framework:iso27001-2013"]
+            for urn in suggested_urns
+        )
+
+        # Loaded mappings are not suggested anymore
+        StoredLibrary.objects.get(urn=MAPPING_LIBRARY_URN).load()
+        assert MAPPING_LIBRARY_URN not in filter_urns({"mapping_suggested": True})
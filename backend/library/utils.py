@@ -4,6 +4,7 @@ from .helpers import get_referential_translation
 from pathlib import Path
 from typing import List, Union
 from django.core.exceptions import SuspiciousFileOperation, ValidationError
+from django.db import models
 from django.http import Http404
 
 # interesting thread: https://stackoverflow.com/questions/27743711/can-i-speedup-yaml
@@ -19,6 +20,7 @@ from core.models import (
     ReferenceControl,
     Threat,
 )
+from core.utils import log_bulk_changes
 from django.db import transaction
 from iam.models import Folder
 
@@ -59,6 +61,55 @@ def preview_library(framework: dict) -> dict[str, list]:
     return preview
 
 
+def get_urn_index(model: type[models.Model], urns, **filters) -> dict:
+    """
+    Map the given URNs, lowercased, to the ids of the objects of the model having them,
+    with a single query. Raise model.DoesNotExist if some of them are missing.
+    """
+    urns = {urn.lower() for urn in urns}
+    urn_index = dict(
+        model.objects.filter(urn__in=urns, **filters).values_list("urn", "id")
+    )
+    if missing_urns := urns - urn_index.keys():
+        raise model.DoesNotExist(
+            "{} not found: {}".format(model.__name__, ", ".join(sorted(missing_urns)))
+        )
+    return urn_index
+
+
+def check_unique_in_folder(objects: list, folder: Folder):
+    """
+    In-memory counterpart of AbstractBaseModel.clean for objects created in bulk in
+    a folder: an object must not have the same fields_to_check values (case
+    insensitive) as another object of the folder.
+    """
+    if not objects:
+        return
+    fields_to_check = type(objects[0]).fields_to_check
+
+    def key(values):
+        return tuple(
+            value.lower() if isinstance(value, str) else value for value in values
+        )
+
+    existing_values = {
+        key(values)
+        for values in type(objects[0])
+        .objects.filter(folder=folder)
+        .values_list(*fields_to_check)
+    }
+    for obj in objects:
+        values = key(getattr(obj, field) for field in fields_to_check)
+        if values in existing_values:
+            raise ValidationError(
+                {
+                    field: f"{getattr(obj, field)} is already used in this scope. Please choose another value."
+                    for field in fields_to_check
+                }
+            )
+        existing_values.add(values)
+
+
 class RequirementNodeImporter:
     REQUIRED_FIELDS = {"urn"}
 
@@ -70,13 +121,14 @@ class RequirementNodeImporter:
         if missing_fields := self.REQUIRED_FIELDS - set(self.requirement_data.keys()):
             return "Missing the following fields : {}".format(", ".join(missing_fields))
 
-    def import_requirement_node(self, framework_object: Framework):
+    def build_requirement_node(self, framework_object: Framework) -> RequirementNode:
+        """Build the requirement node, created in bulk with the others of the framework."""
         parent_urn = self.requirement_data.get("parent_urn")
         if parent_urn:
             parent_urn = parent_urn.lower()
-        requirement_node = RequirementNode.objects.create(
+        return RequirementNode(
             # Should i just inherit the folder from Framework or this is useless ?
-            folder=Folder.get_root_folder(),
+            folder=framework_object.folder,
             framework=framework_object,
             urn=self.requirement_data["urn"].lower(),
             parent_urn=parent_urn,
@@ -95,15 +147,17 @@ class RequirementNodeImporter:
             is_published=True,
             questions=self.requirement_data.get("questions"),
         )
-        for threat in self.requirement_data.get("threats", []):
-            requirement_node.threats.add(
-                Threat.objects.get(urn=threat.lower())
-            )  # URN are not case insensitive in the whole codebase yet, we should fix that and make sure URNs are always transformed into lowercase before being used.
-
-        for reference_control in self.requirement_data.get("reference_controls", []):
-            requirement_node.reference_controls.add(
-                ReferenceControl.objects.get(urn=reference_control.lower())
-            )
+
+    @property
+    def threat_urns(self) -> list[str]:
+        # URN are not case insensitive in the whole codebase yet, we should fix that and make sure URNs are always transformed into lowercase before being used.
+        return [urn.lower() for urn in self.requirement_data.get("threats", [])]
+
+    @property
+    def reference_control_urns(self) -> list[str]:
+        return [
+            urn.lower() for urn in self.requirement_data.get("reference_controls", [])
+        ]
 
 
 class RequirementMappingImporter:
@@ -120,32 +174,21 @@ class RequirementMappingImporter:
         if missing_fields := self.REQUIRED_FIELDS - set(self.data.keys()):
             return "Missing the following fields : {}".format(", ".join(missing_fields))
 
-    def load(
-        self,
-        mapping_set: RequirementMappingSet,
-    ):
-        try:
-            target_requirement = RequirementNode.objects.get(
-                urn=self.data["target_requirement_urn"].lower(), default_locale=True
-            )
-        except RequirementNode.DoesNotExist:
-            logger.error(
-                "Target requirement does not exist",
-                error=self.data["target_requirement_urn"],
-            )
-        try:
-            source_requirement = RequirementNode.objects.get(
-                urn=self.data["source_requirement_urn"].lower(), default_locale=True
-            )
-        except RequirementNode.DoesNotExist:
-            logger.error(
-                "Source requirement does not exist",
-                error=self.data["source_requirement_urn"],
-            )
-        return RequirementMapping.objects.create(
+    def build_requirement_mapping(
+        self, mapping_set: RequirementMappingSet, requirement_ids: dict
+    ) -> RequirementMapping:
+        """
+        Build the requirement mapping, created in bulk with the others of the mapping set.
+        requirement_ids maps the URNs of the requirement nodes to their ids.
+        """
+        return RequirementMapping(
             mapping_set=mapping_set,
-            target_requirement=target_requirement,
-            source_requirement=source_requirement,
+            target_requirement_id=requirement_ids[
+                self.data["target_requirement_urn"].lower()
+            ],
+            source_requirement_id=requirement_ids[
+                self.data["source_requirement_urn"].lower()
+            ],
             relationship=self.data["relationship"],
             annotation=self.data.get("annotation"),
             strength_of_relationship=self.data.get("strength_of_relationship"),
@@ -210,8 +253,21 @@ class RequirementMappingSetImporter:
             source_framework=_source_framework,
             library=library_object,
         )
+        requirement_urns = set()
         for mapping in self._requirement_mappings:
-            mapping.load(mapping_set)
+            requirement_urns.add(mapping.data["target_requirement_urn"])
+            requirement_urns.add(mapping.data["source_requirement_urn"])
+        try:
+            requirement_ids = get_urn_index(
+                RequirementNode, requirement_urns, default_locale=True
+            )
+        except RequirementNode.DoesNotExist as e:
+            logger.error("Requirement does not exist", error=e)
+            raise
+        RequirementMapping.objects.bulk_create(
+            mapping.build_requirement_mapping(mapping_set, requirement_ids)
+            for mapping in self._requirement_mappings
+        )
         return mapping_set
 
     def init(self) -> Union[str, None]:
@@ -325,8 +381,46 @@ class FrameworkImporter:
             translations=self.framework_data.get("translations", {}),
             is_published=True,
         )
-        for requirement_node in self._requirement_nodes:
-            requirement_node.import_requirement_node(framework_object)
+        requirement_nodes = RequirementNode.objects.bulk_create(
+            requirement_node.build_requirement_node(framework_object)
+            for requirement_node in self._requirement_nodes
+        )
+
+        # Threats and reference controls are resolved with one query each, and linked
+        # to the requirement nodes with one bulk insert each
+        threat_ids = get_urn_index(
+            Threat,
+            {urn for node in self._requirement_nodes for urn in node.threat_urns},
+        )
+        reference_control_ids = get_urn_index(
+            ReferenceControl,
+            {
+                urn
+                for node in self._requirement_nodes
+                for urn in node.reference_control_urns
+            },
+        )
+        ThreatLink = RequirementNode.threats.through
+        ReferenceControlLink = RequirementNode.reference_controls.through
+        ThreatLink.objects.bulk_create(
+            ThreatLink(
+                requirementnode_id=requirement_node.id, threat_id=threat_ids[urn]
+            )
+            for importer, requirement_node in zip(
+                self._requirement_nodes, requirement_nodes
+            )
+            for urn in dict.fromkeys(importer.threat_urns)
+        )
+        ReferenceControlLink.objects.bulk_create(
+            ReferenceControlLink(
+                requirementnode_id=requirement_node.id,
+                referencecontrol_id=reference_control_ids[urn],
+            )
+            for importer, requirement_node in zip(
+                self._requirement_nodes, requirement_nodes
+            )
+            for urn in dict.fromkeys(importer.reference_control_urns)
+        )
 
 
 class ThreatImporter:
@@ -340,9 +434,11 @@ class ThreatImporter:
         if missing_fields := self.REQUIRED_FIELDS - set(self.threat_data.keys()):
             return "Missing the following fields : {}".format(", ".join(missing_fields))
 
-    def import_threat(self, library_object: LoadedLibrary):
-        Threat.objects.create(
+    def build_threat(self, library_object: LoadedLibrary, folder: Folder) -> Threat:
+        """Build the threat, created in bulk with the others of the library."""
+        return Threat(
             library=library_object,
+            folder=folder,
             urn=self.threat_data["urn"].lower(),
             ref_id=self.threat_data["ref_id"],
             name=self.threat_data.get("name"),
@@ -386,9 +482,13 @@ class ReferenceControlImporter:
                     csf_function, ", ".join(ReferenceControlImporter.CSF_FUNCTIONS)
                 )
 
-    def import_reference_control(self, library_object: LoadedLibrary):
-        ReferenceControl.objects.create(
+    def build_reference_control(
+        self, library_object: LoadedLibrary, folder: Folder
+    ) -> ReferenceControl:
+        """Build the reference control, created in bulk with the others of the library."""
+        return ReferenceControl(
             library=library_object,
+            folder=folder,
             urn=self.reference_control_data["urn"].lower(),
             ref_id=self.reference_control_data["ref_id"],
             name=self.reference_control_data.get("name"),
@@ -752,13 +852,29 @@ class LibraryImporter:
         return library_object
 
     def import_objects(self, library_object: LoadedLibrary):
-        """Import library objects."""
-
-        for threat in self._threats:
-            threat.import_threat(library_object)
-
-        for reference_control in self._reference_controls:
-            reference_control.import_reference_control(library_object)
+        """
+        Import library objects. Threats, reference controls, requirement nodes and
+        requirement mappings are created in bulk, threats and reference controls
+        being audited like objects created one by one.
+        """
+        root_folder = Folder.get_root_folder()
+
+        threats = [
+            threat.build_threat(library_object, root_folder) for threat in self._threats
+        ]
+        check_unique_in_folder(threats, root_folder)
+        Threat.objects.bulk_create(threats)
+        log_bulk_changes((None, threat) for threat in threats)
+
+        reference_controls = [
+            reference_control.build_reference_control(library_object, root_folder)
+            for reference_control in self._reference_controls
+        ]
+        check_unique_in_folder(reference_controls, root_folder)
+        ReferenceControl.objects.bulk_create(reference_controls)
+        log_bulk_changes(
+            (None, reference_control) for reference_control in reference_controls
+        )
 
         for risk_matrix in self._risk_matrices:
             risk_matrix.import_risk_matrix(library_object)
@@ -21,7 +21,7 @@ import django_filters as df
 from core.helpers import get_sorted_requirement_nodes
 from core.models import StoredLibrary, LoadedLibrary, Framework
 from core.views import BaseModelViewSet
-from iam.models import RoleAssignment, Folder, Permission
+from iam.models import RoleAssignment, Folder, PermissionRegistry
 from library.validators import validate_file_extension
 from .helpers import update_translations, update_translations_in_object
 from .utils import LibraryImporter, preview_library
@@ -82,27 +82,6 @@ class StoredLibraryFilterSet(LibraryMixinFilterSet):
         """
         Returns StoredLibraries containing at least one mapping with a source framework already loaded
         """
-
-        def _extract_requirement_mappings(content):
-            """Extract requirement mappings from library content, handling both dict and list formats."""
-            mapping_set = content.get("requirement_mapping_set") or content.get(
-                "requirement_mapping_sets", []
-            )
-
-            if isinstance(mapping_set, dict):
-                return [mapping_set]
-            elif isinstance(mapping_set, list):
-                return mapping_set
-            else:
-                return []
-
-        def _has_matching_source_framework(requirement_mappings, loaded_framework_urns):
-            """Check if any mapping has a source framework that's loaded."""
-            return any(
-                mapping.get("source_framework_urn") in loaded_framework_urns
-                for mapping in requirement_mappings
-            )
-
         if not value:
             return queryset
 
@@ -114,24 +93,17 @@ class StoredLibraryFilterSet(LibraryMixinFilterSet):
         if not loaded_framework_urns:
             return queryset.none()
 
-        # Filter to libraries that have requirement mappings
-        queryset_with_mappings = queryset.filter(
-            Q(content__requirement_mapping_set__isnull=False)
-            | Q(content__requirement_mapping_sets__isnull=False)
-        ).exclude(urn__in=loaded_library_urns)
-
-        # Extract libraries with matching source frameworks
-        matching_library_pks = []
-
-        for (
-            library
-        ) in queryset_with_mappings.iterator():  # Use iterator for memory efficiency
-            requirement_mappings = _extract_requirement_mappings(library.content)
-
-            if _has_matching_source_framework(
-                requirement_mappings, loaded_framework_urns
-            ):
-                matching_library_pks.append(library.pk)
+        # Only the denormalized source framework URNs are read, not the library content
+        matching_library_pks = [
+            pk
+            for pk, source_framework_urns in queryset.filter(
+                Q(objects_meta__requirement_mapping_set__isnull=False)
+                | Q(objects_meta__requirement_mapping_sets__isnull=False)
+            )
+            .exclude(urn__in=loaded_library_urns)
+            .values_list("pk", "mapping_source_framework_urns")
+            if loaded_framework_urns.intersection(source_framework_urns)
+        ]
 
         return queryset.filter(pk__in=matching_library_pks)
 
@@ -144,7 +116,8 @@ class StoredLibraryFilterSet(LibraryMixinFilterSet):
         if "frameworks" in value:
             value.append("framework")
         union_qs = Q()
-        _value = {f"content__{v}__isnull": False for v in value}
+        # objects_meta has the same keys as the content, and is much smaller
+        _value = {f"objects_meta__{v}__isnull": False for v in value}
         for item in _value:
             union_qs |= Q(**{item: _value[item]})
         return queryset.filter(union_qs)
@@ -172,6 +145,13 @@ class StoredLibraryViewSet(BaseModelViewSet):
 
     search_fields = ["name", "description", "urn", "ref_id"]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # The content of the libraries is not listed
+            queryset = queryset.defer("content")
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "list":
             return StoredLibrarySerializer
@@ -202,7 +182,7 @@ class StoredLibraryViewSet(BaseModelViewSet):
     def destroy(self, request, *args, pk, **kwargs):
         if not RoleAssignment.is_access_allowed(
             user=request.user,
-            perm=Permission.objects.get(codename="delete_storedlibrary"),
+            perm=PermissionRegistry.get("delete_storedlibrary"),
             folder=Folder.get_root_folder(),
         ):
             return Response(status=HTTP_403_FORBIDDEN)
@@ -220,7 +200,7 @@ class StoredLibraryViewSet(BaseModelViewSet):
     def import_library(self, request, pk):
         if not RoleAssignment.is_access_allowed(
             user=request.user,
-            perm=Permission.objects.get(codename="add_loadedlibrary"),
+            perm=PermissionRegistry.get("add_loadedlibrary"),
             folder=Folder.get_root_folder(),
         ):
             return Response(status=HTTP_403_FORBIDDEN)
@@ -433,7 +413,7 @@ class LoadedLibraryViewSet(BaseModelViewSet):
     def destroy(self, request, *args, pk, **kwargs):
         if not RoleAssignment.is_access_allowed(
             user=request.user,
-            perm=Permission.objects.get(codename="delete_loadedlibrary"),
+            perm=PermissionRegistry.get("delete_loadedlibrary"),
             folder=Folder.get_root_folder(),
         ):
             return Response(status=HTTP_403_FORBIDDEN)
@@ -486,8 +466,8 @@ class LoadedLibraryViewSet(BaseModelViewSet):
     def _update(self, request, pk):
         if not RoleAssignment.is_access_allowed(
             user=request.user,
-            perm=Permission.objects.get(
-                codename="add_loadedlibrary"
+            perm=PermissionRegistry.get(
+                "add_loadedlibrary"
             ),  # We should use either this permission or making a new permission "update_loadedlibrary"
             folder=Folder.get_root_folder(),
         ):
@@ -229,11 +229,11 @@ class EscalationThreshold(AbstractBaseModel, FolderMixin):
                 "value": -1,
                 "hexcolor": "#f9fafb",
             }
-        risk_matrix = parsed_matrix
-        if not risk_matrix["impact"][impact].get("hexcolor"):
-            risk_matrix["impact"][impact]["hexcolor"] = "#f9fafb"
+        # The parsed matrix is shared, the default color is only set on the copy
+        definition = parsed_matrix["impact"][impact]
         return {
-            **risk_matrix["impact"][impact],
+            **definition,
+            "hexcolor": definition.get("hexcolor") or "#f9fafb",
             "value": impact,
         }
 
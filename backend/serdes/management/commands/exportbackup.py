@@ -0,0 +1,24 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from serdes.utils import iter_backup, iter_gzip
+
+
+class Command(BaseCommand):
+    help = "Exports a gzipped backup of the database, as served by the backup API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="Path of the backup file to write, '-' for stdout"
+        )
+
+    def handle(self, *args, **kwargs):
+        path = kwargs["path"]
+        outfile = sys.stdout.buffer if path == "-" else open(path, "wb")
+        try:
+            for chunk in iter_gzip(iter_backup()):
+                outfile.write(chunk)
+        finally:
+            if outfile is not sys.stdout.buffer:
+                outfile.close()
@@ -6,16 +6,24 @@ with support for versioning and field validation. It handles the serialization
 of Django model instances to a portable format and back.
 """
 
+import json
 import re
+from itertools import islice
+from typing import IO, Iterator
 
 from django.utils import timezone
 from django.conf import settings
 from django.db.models.query import QuerySet
 from rest_framework import serializers
-from hashlib import sha256
+
+from core.query_optimizer import optimize_queryset
+from core.serializer_fields import hash_value
 
 from .utils import app_dot_model, import_export_serializer_class
 
+# Number of objects fetched and serialized at once on export
+EXPORT_CHUNK_SIZE = 500
+
 
 class LoadBackupSerializer(serializers.Serializer):
     file = serializers.Field
@@ -116,24 +124,50 @@ class ExportSerializer(serializers.Serializer):
             ... }
         """
 
-        meta = {
+        return {
+            "meta": ExportSerializer.get_meta(),
+            "objects": list(ExportSerializer.iter_objects(scope)),
+        }
+
+    @staticmethod
+    def get_meta() -> dict:
+        return {
             "media_version": settings.VERSION,
             "schema_version": settings.SCHEMA_VERSION,
             "exported_at": timezone.now().isoformat(),
         }
 
-        objects = []
+    @staticmethod
+    def iter_objects(
+        scope: list[QuerySet], chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Iterator[dict]:
+        """
+        Serialize the objects of multiple querysets, chunk_size objects at a time.
 
+        Related objects are fetched along with each chunk (see optimize_queryset),
+        so that the number of queries does not depend on the number of objects.
+        """
         for queryset in scope:
-            for obj in queryset:
-                objects.append(
-                    {
-                        "model": app_dot_model(queryset.model),
-                        "id": sha256(str(obj.id).encode()).hexdigest()[:12],
-                        "fields": import_export_serializer_class(queryset.model)(
-                            obj
-                        ).data,
-                    }
-                )
+            model = app_dot_model(queryset.model)
+            serializer_class = import_export_serializer_class(queryset.model)
+            objects = optimize_queryset(queryset, serializer_class).iterator(
+                chunk_size=chunk_size
+            )
+            while chunk := list(islice(objects, chunk_size)):
+                for obj, fields in zip(chunk, serializer_class(chunk, many=True).data):
+                    yield {"model": model, "id": hash_value(obj.id), "fields": fields}
 
-        return {"meta": meta, "objects": objects}
+    @staticmethod
+    def write_data(scope: list[QuerySet], stream: IO[str]) -> None:
+        """
+        Write the same JSON document as dump_data to a text stream, object by object,
+        so that the objects never have to be held in memory all at once.
+        """
+        stream.write('{"meta": ')
+        json.dump(ExportSerializer.get_meta(), stream)
+        stream.write(', "objects": [')
+        for index, obj in enumerate(ExportSerializer.iter_objects(scope)):
+            if index:
+                stream.write(", ")
+            json.dump(obj, stream)
+        stream.write("]}")
@@ -12,8 +12,31 @@ This test suite covers:
 Each section includes comprehensive tests for normal cases, edge cases, and error conditions.
 """
 
+import gzip
+import io
+import json
+import re
+import tracemalloc
+
 import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ciso_assistant.settings import SCHEMA_VERSION, VERSION
+from core.serializer_fields import hash_value
+from serdes import utils as serdes_utils
+from serdes.serializers import ExportSerializer
 from serdes.utils import (
+    app_dot_model,
+    import_export_serializer_class,
+    BACKUP_EXCLUDED_MODELS,
+    BackupStreamReader,
+    iter_backup,
+    iter_gzip,
+    load_backup_objects,
+    read_backup,
     get_model_dependencies,
     build_dependency_graph,
     topological_sort,
@@ -468,3 +491,198 @@ class TestDomainExport:
             risk_scenario in export_data["riskscenario"]
             and threat in export_data["riskscenario"].first().threats.all()
         )
+
+    @pytest.mark.django_db
+    def test_dump_data_query_count_does_not_depend_on_object_count(
+        self, complex_domain_structure
+    ):
+        """
+        Relations are fetched along with each chunk of objects, so exporting a domain
+        runs the same number of queries however many objects it holds.
+        """
+        root = complex_domain_structure["root"]
+
+        def dump():
+            scope = [*get_domain_export_objects(root).values()]
+            with CaptureQueriesContext(connection) as context:
+                data = ExportSerializer.dump_data(scope=scope)
+            return data, len(context.captured_queries)
+
+        # Content types are cached on first use
+        dump()
+        _, query_count = dump()
+
+        risk_assessment = complex_domain_structure["risk_assessment"]
+        for i in range(10):
+            threat = Threat.objects.create(name=f"Threat {i}", folder=root)
+            asset = Asset.objects.create(name=f"Asset {i}", folder=root)
+            applied_control = AppliedControl.objects.create(
+                name=f"Control {i}", folder=root
+            )
+            risk_scenario = RiskScenario.objects.create(
+                name=f"Scenario {i}", risk_assessment=risk_assessment
+            )
+            risk_scenario.threats.add(threat)
+            risk_scenario.assets.add(asset)
+            risk_scenario.applied_controls.add(applied_control)
+
+        data, larger_query_count = dump()
+
+        assert larger_query_count == query_count
+        # The output is the same as when serializing objects one by one
+        scope = [*get_domain_export_objects(root).values()]
+        assert data["objects"] == [
+            {
+                "model": app_dot_model(queryset.model),
+                "id": hash_value(obj.id),
+                "fields": import_export_serializer_class(queryset.model)(obj).data,
+            }
+            for queryset in scope
+            for obj in queryset
+        ]
+
+    @pytest.mark.django_db
+    def test_write_data_matches_dump_data(self, complex_domain_structure):
+        scope = [*get_domain_export_objects(complex_domain_structure["root"]).values()]
+        stream = io.StringIO()
+
+        ExportSerializer.write_data(scope=scope, stream=stream)
+
+        written = json.loads(stream.getvalue())
+        dumped = ExportSerializer.dump_data(scope=scope)
+        assert written["objects"] == json.loads(json.dumps(dumped["objects"]))
+        assert written["meta"].keys() == dumped["meta"].keys()
+
+
+# ============ Backup Export Tests ============
+
+
+class TestBackupExport:
+    """Tests for the streaming full backup export."""
+
+    @pytest.mark.django_db
+    def test_iter_backup_matches_dumpdata(self, framework_fixture):
+        """The streamed backup holds the same objects as dumpdata, in the backup format."""
+        buffer = io.StringIO()
+        call_command(
+            "dumpdata",
+            exclude=[
+                label
+                for label in BACKUP_EXCLUDED_MODELS
+                if label in {model._meta.label_lower for model in apps.get_models()}
+                or "." not in label
+            ],
+            natural_foreign=True,
+            stdout=buffer,
+        )
+
+        backup = gzip.decompress(b"".join(iter_gzip(iter_backup(chunk_size=50))))
+        metadata, objects = json.loads(backup)
+
+        assert metadata == {
+            "meta": [{"media_version": VERSION, "schema_version": str(SCHEMA_VERSION)}]
+        }
+        assert objects == json.loads(buffer.getvalue())
+
+    @pytest.mark.django_db
+    def test_iter_backup_memory_does_not_grow_with_database(self):
+        """
+        Benchmark: the memory used while streaming does not depend on the number of
+        objects in the database.
+        """
+
+        def measure():
+            tracemalloc.start()
+            try:
+                size = sum(len(chunk) for chunk in iter_backup())
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            return size, peak
+
+        size, peak = measure()
+        Threat.objects.bulk_create(
+            Threat(name=f"Threat {i}", folder=Folder.get_root_folder())
+            for i in range(20000)
+        )
+        larger_size, larger_peak = measure()
+
+        assert larger_size > size + 10 * 1024 * 1024
+        assert larger_peak < peak * 1.2
+
+
+# ============ Backup Load Tests ============
+
+
+def iter_backup_of(objects):
+    """Yield a backup holding the given objects, in the iter_backup format."""
+    yield '[{"meta": [{"media_version": "%s", "schema_version": "1"}]}, [' % VERSION
+    yield ", ".join(json.dumps(obj) for obj in objects)
+    yield "]]"
+
+
+def normalize_backup(backup):
+    """
+    Parse a backup, dropping zero milliseconds from timestamps: a restored timestamp
+    with zero microseconds is dumped without them.
+    """
+    return json.loads(re.sub(r"(T\d\d:\d\d:\d\d)\.000Z", r"\1Z", backup))
+
+
+class TestBackupLoad:
+    """Tests for the streaming full backup restore."""
+
+    def test_read_backup_is_incremental(self, monkeypatch):
+        """The backup is parsed lazily, even when values span several reads."""
+        monkeypatch.setattr(BackupStreamReader, "READ_SIZE", 8)
+        backup = gzip.compress(
+            b"".join(chunk.encode() for chunk in iter_backup_of([{"a": "x" * 50}, {}]))
+        )
+        stream = io.TextIOWrapper(gzip.GzipFile(fileobj=io.BytesIO(backup)))
+
+        metadata, objects = read_backup(stream)
+
+        assert metadata == [{"media_version": VERSION, "schema_version": "1"}]
+        assert next(objects) == {"a": "x" * 50}
+        assert list(objects) == [{}]
+
+    def test_read_backup_rejects_malformed_backup(self):
+        with pytest.raises(ValueError):
+            read_backup(io.StringIO('{"meta": []}'))
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize("raw_insert_supported", [True, False])
+    def test_load_backup_objects_restores_backup(
+        self, complex_domain_structure, monkeypatch, raw_insert_supported
+    ):
+        """
+        Objects missing from the database are bulk inserted, existing ones are updated,
+        and the database ends up identical to the backup.
+        Django versions not known to support bulk raw inserts fall back to raw saves.
+        """
+        if not raw_insert_supported:
+            monkeypatch.setattr(
+                serdes_utils, "RAW_INSERT_DJANGO_VERSIONS", ((0, 0),) * 2
+            )
+        backup = "".join(iter_backup(chunk_size=5))
+        RiskScenario.objects.all().delete()
+        Asset.objects.all().delete()
+        Threat.objects.all().delete()
+        AppliedControl.objects.filter(name="Test Control").update(name="Renamed")
+
+        _, objects = read_backup(io.StringIO(backup))
+        progress = []
+        loaded = load_backup_objects(
+            objects,
+            batch_size=5,
+            progress=lambda model, count: progress.append((model, count)),
+        )
+
+        assert normalize_backup("".join(iter_backup())) == normalize_backup(backup)
+        assert loaded["core.riskscenario"] == 1
+        assert ("core.riskscenario", 1) in progress
+        assert list(
+            complex_domain_structure["risk_scenario"].assets.values_list(
+                "name", flat=True
+            )
+        ) == ["Test Asset"]
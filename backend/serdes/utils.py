@@ -1,12 +1,23 @@
-from typing import Iterable
+import io
+import json
+from itertools import groupby, islice
+import zlib
+from typing import Any, Callable, Iterable, Iterator, TextIO
 
+import django
 import django.apps
+from django.core import serializers as django_serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import Serializer as JSONSerializer
+from django.core.serializers.python import Deserializer as PythonDeserializer
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
 from django.db.models import Model, Q
 from django.db.models.deletion import Collector
 from collections import defaultdict
 
+from ciso_assistant.settings import SCHEMA_VERSION, VERSION
 from iam.models import Folder
 from rest_framework.exceptions import ValidationError
 from typing import List, Type, Set, Dict, Optional
@@ -134,6 +145,334 @@ def restore_objects(path: str, format: str = "json"):
     return path
 
 
+BACKUP_EXCLUDED_MODELS = [
+    "contenttypes",
+    "auth.permission",
+    "sessions.session",
+    "iam.ssosettings",
+    "iam.roleassignmentclosure",
+    "knox.authtoken",
+    "auditlog.logentry",
+]
+
+# Objects are read chunk_size rows at a time, and yielded by pieces of about BACKUP_CHUNK_BYTES
+BACKUP_CHUNK_SIZE = 100
+BACKUP_CHUNK_BYTES = 1024 * 1024
+
+
+class BackupJSONSerializer(JSONSerializer):
+    """
+    JSON serializer writing bare objects, without the enclosing array,
+    so that successive batches can be concatenated into a single array.
+    """
+
+    def start_serialization(self):
+        self._init_options()
+
+    def end_serialization(self):
+        pass
+
+
+def get_backup_models() -> List[Type[models.Model]]:
+    """
+    Get the models included in a full backup, sorted so that the targets of
+    natural foreign keys come before the models referencing them (as dumpdata does).
+    """
+    app_list = {}
+    for app_config in django.apps.apps.get_app_configs():
+        if app_config.label in BACKUP_EXCLUDED_MODELS:
+            continue
+        app_list[app_config] = [
+            model
+            for model in app_config.get_models()
+            if app_dot_model(model) not in BACKUP_EXCLUDED_MODELS
+            and not model._meta.proxy
+            and router.allow_migrate_model(DEFAULT_DB_ALIAS, model)
+        ]
+    return django_serializers.sort_dependencies(app_list.items(), allow_cycles=True)
+
+
+def _take_chunk(objects: Iterator[Model], stream: io.StringIO, chunk_size: int):
+    """
+    Yield objects until chunk_size of them or BACKUP_CHUNK_BYTES of output have been
+    serialized. The serializer pulls objects lazily, so each one is written to the
+    stream before the next one is read.
+    """
+    for count, obj in enumerate(objects, start=1):
+        yield obj
+        if count >= chunk_size or stream.tell() >= BACKUP_CHUNK_BYTES:
+            return
+
+
+def iter_backup(chunk_size: int = BACKUP_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yield the JSON backup of the whole database piece by piece, in the format
+    expected by LoadBackupView: [{"meta": [...]}, [objects...]].
+
+    Objects are read with a chunked iterator and serialized in bounded pieces,
+    so that memory usage does not depend on the size of the database.
+    """
+    yield (
+        f'[{{"meta": [{{"media_version": "{VERSION}", "schema_version": "{SCHEMA_VERSION}"}}]}},\n'
+        "["
+    )
+    first = True
+    for model in get_backup_models():
+        # Serialized many-to-many fields are fetched along with each chunk
+        m2m_fields = [
+            field.name
+            for field in model._meta.local_many_to_many
+            if field.serialize and field.remote_field.through._meta.auto_created
+        ]
+        objects = (
+            model._default_manager.order_by(model._meta.pk.name)
+            .prefetch_related(*m2m_fields)
+            .iterator(chunk_size=chunk_size)
+        )
+        while True:
+            stream = io.StringIO()
+            BackupJSONSerializer().serialize(
+                _take_chunk(objects, stream, chunk_size),
+                stream=stream,
+                indent=4,
+                use_natural_foreign_keys=True,
+            )
+            if not stream.tell():
+                break
+            yield stream.getvalue() if first else "," + stream.getvalue()
+            first = False
+    yield "\n]\n]"
+
+
+def iter_gzip(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    Incrementally gzip a stream of text chunks.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        if data := compressor.compress(chunk.encode()):
+            yield data
+    yield compressor.flush()
+
+
+class BackupStreamReader:
+    """
+    Minimal incremental JSON reader for backups, reading the text stream by blocks
+    so that only the value being decoded has to be held in memory.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+
+    def _fill(self, size: Optional[int] = None) -> bool:
+        data = self.stream.read(size or self.READ_SIZE)
+        if not data:
+            return False
+        self.buffer = self.buffer[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character, without consuming it."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of backup")
+
+    def expect(self, char: str):
+        if (found := self.peek()) != char:
+            raise ValueError(f"Malformed backup: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """
+        Decode the next object or array. The read size is doubled on each attempt,
+        so that large values are not re-decoded too many times.
+        """
+        self.peek()
+        size = self.READ_SIZE
+        while True:
+            try:
+                value, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+                size *= 2
+
+
+def read_backup(stream: TextIO) -> tuple[list[dict], Iterator[dict]]:
+    """
+    Read a backup in the format produced by iter_backup: [{"meta": [...]}, [objects...]].
+
+    Returns the metadata and a lazy iterator over the serialized objects, so that the
+    metadata can be checked before anything is loaded.
+    """
+    reader = BackupStreamReader(stream)
+    reader.expect("[")
+    metadata = reader.value()
+    if not isinstance(metadata, dict) or "meta" not in metadata:
+        raise ValueError("Malformed backup: missing metadata")
+    reader.expect(",")
+    reader.expect("[")
+
+    def objects():
+        if reader.peek() == "]":
+            return
+        while True:
+            yield reader.value()
+            if reader.peek() == "]":
+                return
+            reader.expect(",")
+
+    return metadata["meta"], objects()
+
+
+def _is_excluded_from_backup(label: str) -> bool:
+    return (
+        label in BACKUP_EXCLUDED_MODELS or label.split(".")[0] in BACKUP_EXCLUDED_MODELS
+    )
+
+
+# Django versions on which Manager._insert() is known to keep its signature
+RAW_INSERT_DJANGO_VERSIONS = ((4, 2), (6, 0))
+
+
+def raw_insert(
+    model: Type[models.Model], objects: list[models.Model], using: str
+) -> None:
+    """
+    Insert objects as raw saves would (e.g. loaddata), but in batches.
+
+    bulk_create() refuses multi-table inherited models and fills in parent tables, while a
+    raw save only writes the model's own table, with the primary keys as they are. The
+    private Manager._insert() behind bulk_create() is used to do the latter, on the Django
+    versions it is known to work with. Other versions fall back to raw saves.
+    """
+    if not (
+        RAW_INSERT_DJANGO_VERSIONS[0]
+        <= django.VERSION[:2]
+        < RAW_INSERT_DJANGO_VERSIONS[1]
+    ):
+        for obj in objects:
+            Model.save_base(obj, using=using, raw=True)
+        return
+    if not objects:
+        return
+    fields = model._meta.local_concrete_fields
+    max_batch_size = connections[using].ops.bulk_batch_size(fields, objects) or len(
+        objects
+    )
+    for start in range(0, len(objects), max_batch_size):
+        model._base_manager.using(using)._insert(
+            objects[start : start + max_batch_size],
+            fields=fields,
+            using=using,
+            raw=True,
+        )
+
+
+def load_backup_objects(
+    objects: Iterable[dict],
+    batch_size: int = BACKUP_CHUNK_SIZE,
+    progress: Optional[Callable[[str, int], None]] = None,
+    using: str = DEFAULT_DB_ALIAS,
+) -> Dict[str, int]:
+    """
+    Load serialized backup objects into the database, as loaddata would, but in batches.
+
+    Consecutive objects of the same model are deserialized together and inserted with
+    bulk raw inserts, while many-to-many relations are gathered and inserted per through
+    table. Objects already present (e.g. created when the database was flushed) are
+    saved one by one, as loaddata does. Foreign key constraints are only checked once
+    everything is loaded.
+
+    progress, if given, is called with the model label and the number of objects of
+    this model loaded so far after each batch.
+
+    Returns the number of objects loaded per model.
+    """
+    connection = connections[using]
+    loaded: Dict[str, int] = defaultdict(int)
+    loaded_models: Set[Type[models.Model]] = set()
+    deferred = []
+
+    def insert_batch(batch: list[dict]):
+        label = batch[0]["model"].lower()
+        deserialized = list(
+            PythonDeserializer(batch, using=using, handle_forward_references=True)
+        )
+        model = type(deserialized[0].object)
+        loaded_models.add(model)
+        existing = set(
+            model._base_manager.using(using)
+            .filter(pk__in=[obj.object.pk for obj in deserialized])
+            .values_list("pk", flat=True)
+        )
+        new_objects = []
+        through_rows = defaultdict(list)
+        for obj in deserialized:
+            if obj.deferred_fields:
+                deferred.append(obj)
+            if obj.object.pk in existing:
+                obj.save(using=using)
+                continue
+            new_objects.append(obj.object)
+            for field_name, values in (obj.m2m_data or {}).items():
+                field = model._meta.get_field(field_name)
+                through = field.remote_field.through
+                source = through._meta.get_field(field.m2m_field_name()).attname
+                target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+                through_rows[through].extend(
+                    through(**{source: obj.object.pk, target: value})
+                    for value in values
+                )
+        raw_insert(model, new_objects, using)
+        for through, rows in through_rows.items():
+            loaded_models.add(through)
+            through._base_manager.using(using).bulk_create(rows, batch_size=batch_size)
+        loaded[label] += len(deserialized)
+        if progress is not None:
+            progress(label, loaded[label])
+
+    with transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            # Objects are grouped by runs of the same model, so that each batch is
+            # loaded before the natural keys of the following models are resolved
+            objects = (
+                obj
+                for obj in objects
+                if not _is_excluded_from_backup(obj["model"].lower())
+            )
+            for label, model_objects in groupby(
+                objects, key=lambda obj: obj["model"].lower()
+            ):
+                while batch := list(islice(model_objects, batch_size)):
+                    insert_batch(batch)
+                logger.info("backup model loaded", model=label, count=loaded[label])
+            for obj in deferred:
+                obj.save_deferred_fields(using=using)
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in loaded_models]
+        )
+        # Reset the sequences of the tables with auto-incremented primary keys
+        if sequence_sql := connection.ops.sequence_reset_sql(
+            no_style(), list(loaded_models)
+        ):
+            with connection.cursor() as cursor:
+                for line in sequence_sql:
+                    cursor.execute(line)
+    return dict(loaded)
+
+
 def app_dot_model(model: Model) -> str:
     """
     Get the app label and model name of a model.
@@ -1,21 +1,21 @@
 import gzip
 import io
-import json
 import sys
 from datetime import datetime
 
 import structlog
 from django.core import management
-from django.core.management.commands import dumpdata
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.parsers import FileUploadParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ciso_assistant.settings import SCHEMA_VERSION, VERSION
+from ciso_assistant.settings import VERSION
 from core.utils import compare_schema_versions
+from iam.models import RoleAssignment
 from serdes.serializers import LoadBackupSerializer
+from serdes.utils import iter_backup, iter_gzip, load_backup_objects, read_backup
 
 from auditlog.models import LogEntry
 from django.db.models.signals import post_save
@@ -32,36 +32,14 @@ class ExportBackupView(APIView):
     def get(self, request, *args, **kwargs):
         if not request.user.has_backup_permission:
             return Response(status=status.HTTP_403_FORBIDDEN)
-        response = HttpResponse(content_type="application/json")
+        # The backup is streamed and gzipped on the fly, so that it never has to fit in memory
+        response = StreamingHttpResponse(
+            iter_gzip(iter_backup()), content_type="application/json"
+        )
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         response["Content-Disposition"] = (
             f'attachment; filename="ciso-assistant-db-{timestamp}.json"'
         )
-
-        buffer = io.StringIO()
-        buffer.write(
-            f'[{{"meta": [{{"media_version": "{VERSION}", "schema_version": "{SCHEMA_VERSION}"}}]}},\n'
-        )
-        # Here we dump th data to stdout
-        # NOTE: We will not be able to dump selected folders with this method.
-        management.call_command(
-            dumpdata.Command(),
-            exclude=[
-                "contenttypes",
-                "auth.permission",
-                "sessions.session",
-                "iam.ssosettings",
-                "knox.authtoken",
-                "auditlog.logentry",
-            ],
-            indent=4,
-            stdout=buffer,
-            natural_foreign=True,
-        )
-        buffer.write("]")
-        buffer.seek(0)
-        buffer_data = gzip.compress(buffer.getvalue().encode())
-        response.write(buffer_data)
         return response
 
 
@@ -69,7 +47,7 @@ class LoadBackupView(APIView):
     parser_classes = (FileUploadParser,)
     serializer_class = LoadBackupSerializer
 
-    def load_backup(self, request, decompressed_data, backup_version, current_version):
+    def load_backup(self, request, backup_objects, backup_version, current_version):
         # Temporarily disconnect the problematic signal
 
         post_save.disconnect(add_user_info_to_log_entry, sender=LogEntry)
@@ -86,6 +64,7 @@ class LoadBackupView(APIView):
                     "contenttypes",
                     "sessions.session",
                     "iam.ssosettings",
+                    "iam.roleassignmentclosure",
                     "knox.authtoken",
                 ],
             )
@@ -97,42 +76,21 @@ class LoadBackupView(APIView):
             )
         current_backup = backup_buffer.getvalue()
 
-        # Prepare to load the uploaded backup.
-        # Reset sys.stdin so loaddata reads from our provided backup data.
-        sys.stdin = io.StringIO(decompressed_data)
         request.session.flush()
 
         try:
             last_model = None
 
-            def fixture_callback(sender, **kwargs):
+            def progress_callback(model, count):
                 nonlocal last_model
-                if "instance" in kwargs:
-                    instance = kwargs["instance"]
-                    last_model = (
-                        f"{instance._meta.app_label}.{instance._meta.model_name}"
-                    )
-                    logger.debug(f"Loaded: {last_model} with pk={instance.pk}")
+                last_model = model
+                logger.debug("Loading backup", model=model, count=count)
 
-            # Connect to the post_save signal
-
-            post_save.connect(fixture_callback)
             with disable_auditlog():
                 management.call_command("flush", interactive=False)
-                management.call_command(
-                    "loaddata",
-                    "-",
-                    format="json",
-                    verbosity=2,
-                    exclude=[
-                        "contenttypes",
-                        "auth.permission",
-                        "sessions.session",
-                        "iam.ssosettings",
-                        "knox.authtoken",
-                        "auditlog.logentry",
-                    ],
-                )
+                # The uploaded backup is parsed and loaded incrementally, by batches
+                load_backup_objects(backup_objects, progress=progress_callback)
+                RoleAssignment.refresh_closures()
         except Exception as e:
             logger.error("Error while loading backup", exc_info=e)
             logger.error(
@@ -149,6 +107,7 @@ class LoadBackupView(APIView):
                     format="json",
                     verbosity=0,
                 )
+                RoleAssignment.refresh_closures()
             except Exception as restore_error:
                 logger.error("Error restoring original backup", exc_info=restore_error)
                 return Response(
@@ -163,7 +122,6 @@ class LoadBackupView(APIView):
                 )
             return Response({}, status=status.HTTP_400_BAD_REQUEST)
         finally:
-            post_save.disconnect(fixture_callback)
             post_save.connect(add_user_info_to_log_entry, sender=LogEntry)
         return Response({}, status=status.HTTP_200_OK)
 
@@ -178,14 +136,21 @@ class LoadBackupView(APIView):
                 {"error": "backupLoadNoData"}, status=status.HTTP_400_BAD_REQUEST
             )
         backup_file = request.data["file"]
-        data = backup_file.read()
-        is_gzip = data.startswith(GZIP_MAGIC_NUMBER)
-        full_decompressed_data = gzip.decompress(data) if is_gzip else data
-        # Performances could be improved (by avoiding the json.loads + json.dumps calls with a direct raw manipulation on the JSON body)
-        # But performances of the backup loading is not that much important.
-        full_decompressed_data = json.loads(full_decompressed_data)
-        metadata, decompressed_data = full_decompressed_data
-        metadata = metadata["meta"]
+        is_gzip = backup_file.read(len(GZIP_MAGIC_NUMBER)) == GZIP_MAGIC_NUMBER
+        backup_file.seek(0)
+        # The backup is decompressed and parsed on the fly, the objects being read
+        # only once the metadata has been checked
+        stream = io.TextIOWrapper(
+            gzip.GzipFile(fileobj=backup_file) if is_gzip else backup_file,
+            encoding="utf-8",
+        )
+        try:
+            metadata, backup_objects = read_backup(stream)
+        except ValueError as e:
+            logger.error("Invalid backup file", exc_info=e)
+            return Response(
+                {"error": "InvalidBackupFile"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
         current_version = VERSION.split("-")[0]
         backup_version = None
@@ -210,7 +175,6 @@ class LoadBackupView(APIView):
             )
         compare_schema_versions(schema_version_int, backup_version)
 
-        decompressed_data = json.dumps(decompressed_data)
         return self.load_backup(
-            request, decompressed_data, backup_version, current_version
+            request, backup_objects, backup_version, current_version
         )
@@ -213,6 +213,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_structlog.middlewares.RequestMiddleware",
     "core.custom_middleware.AuditlogMiddleware",
+    "core.custom_middleware.RBACContextMiddleware",
     "allauth.account.middleware.AccountMiddleware",
 ]
 
@@ -389,6 +390,20 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # SQLIte file can be changed, useful for tests
 SQLITE_FILE = os.environ.get("SQLITE_FILE", BASE_DIR / "db/ciso-assistant.sqlite3")
 LIBRARIES_PATH = library_path = BASE_DIR / "library/libraries"
+# Checksums of the library files already stored, to skip unchanged files at startup
+LIBRARIES_MANIFEST_PATH = os.environ.get(
+    "LIBRARIES_MANIFEST_PATH", BASE_DIR / "db" / "libraries_manifest.json"
+)
+# Parsed content of the library files, keyed by their checksum
+# Contents no longer referred to by the manifest are pruned by storelibraries
+LIBRARIES_CACHE_PATH = os.environ.get(
+    "LIBRARIES_CACHE_PATH", BASE_DIR / "db" / "libraries_cache"
+)
+# Number of processes parsing library files. The CPU count seen by a container is
+# usually the one of the host, so it is capped by default
+LIBRARIES_PARSING_WORKERS = int(
+    os.environ.get("LIBRARIES_PARSING_WORKERS", min(4, os.cpu_count() or 1))
+)
 
 if "POSTGRES_NAME" in os.environ:
     DATABASES = {
@@ -504,5 +519,26 @@ HUEY = {
     "results": True,  # would be interesting for debug
     "immediate": False,  # set to False to run in "live" mode regardless of DEBUG, otherwise it will follow
 }
+## Dashboard metrics snapshots
+# Snapshots are shared between the backend workers and huey, which refreshes them in the background
+METRICS_CACHE_PATH = os.environ.get(
+    "METRICS_CACHE_PATH", BASE_DIR / "db" / "metrics_cache"
+)
+METRICS_SNAPSHOT_TTL = int(os.environ.get("METRICS_SNAPSHOT_TTL", 60))  # seconds
+METRICS_SNAPSHOT_MAX_AGE = int(
+    os.environ.get("METRICS_SNAPSHOT_MAX_AGE", 15 * 60)
+)  # seconds
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "metrics": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": METRICS_CACHE_PATH,
+        "TIMEOUT": METRICS_SNAPSHOT_MAX_AGE,
+    },
+}
+
 AUDITLOG_RETENTION_DAYS = int(os.environ.get("AUDITLOG_RETENTION_DAYS", 90))
 AUDITLOG_MAX_RECORDS = int(os.environ.get("AUDITLOG_MAX_RECORDS", 50000))